@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Check and simulate many circuit definition files in parallel.
+
+Used in the Logic Simulator project to validate and simulate batches of
+definition files, for example in a test pipeline. Each file is handled by a
+separate job in a pool of worker processes, and the results are collected
+into one JSON report.
+
+Usage
+-----
+Show help: batch.py -h
+Check and simulate files: batch.py [-n <cycles>] [-j <jobs>] [-s <seed>]
+                          [-o <report path>] <file path or glob> ...
+
+The seed defaults to 0, so reports of the same files can be compared.
+"""
+import concurrent.futures
+import getopt
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from simulator import Simulator
+
+
+def run_job(path, cycles, seed=0):
+    """Check and simulate one definition file and return its results.
+
+    A new set of simulator instances is made for each file, seeded with seed
+    so that the run can be reproduced. If seed is None, the start-up state
+    is random. The result is a dictionary that can be
+    serialised to JSON, with the errors found, the time taken by each step
+    and a digest of the monitored signals.
+    """
+    result = {"path": path, "seed": seed, "valid": False, "errors": [],
+              "timings": {},
+              "cycles": 0, "oscillating": False, "monitors": [],
+              "trace_digest": None}
+    if not os.path.isfile(path):
+        result["errors"] = [{"code": None, "message": "File not found."}]
+        return result
+
+    start_time = time.perf_counter()
+    names = Names()
+    devices = Devices(names, seed)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner(path, names)
+    parser = Parser(names, devices, network, monitors, scanner,
+                    print_errors=False)
+    result["valid"] = parser.parse_network()
+    result["errors"] = parser.diagnostics.to_list()
+    result["timings"]["parse"] = time.perf_counter() - start_time
+    if not result["valid"]:
+        return result
+
+    start_time = time.perf_counter()
+    simulator = Simulator(names, devices, network, monitors)
+    result["oscillating"] = not simulator.run(cycles)
+    result["cycles"] = simulator.cycles
+    result["monitors"] = simulator.get_monitor_names()
+    # The digest changes if any monitored signal or its name changes
+    digest = hashlib.sha256()
+    digest.update(json.dumps(result["monitors"]).encode())
+    digest.update(simulator.traces().tobytes())
+    result["trace_digest"] = digest.hexdigest()
+    result["timings"]["simulate"] = time.perf_counter() - start_time
+    return result
+
+
+def find_files(pattern_list):
+    """Return the sorted list of files matching the paths or globs given."""
+    path_set = set()
+    for pattern in pattern_list:
+        match_list = glob.glob(pattern)
+        if match_list:
+            path_set.update(match_list)
+        else:  # reported as not found
+            path_set.add(pattern)
+    return sorted(path_set)
+
+
+def run_batch(path_list, cycles, jobs=None, seed=0):
+    """Check and simulate the files in path_list on a pool of processes.
+
+    jobs is the number of worker processes, by default one per core. Every
+    job uses the same seed. Return the report as a dictionary, with the
+    results in the order of path_list.
+    """
+    start_time = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        result_list = list(executor.map(run_job, path_list,
+                                        [cycles] * len(path_list),
+                                        [seed] * len(path_list)))
+    return {"files": len(result_list),
+            "valid": sum(result["valid"] for result in result_list),
+            "cycles": cycles,
+            "seed": seed,
+            "wall_time": time.perf_counter() - start_time,
+            "results": result_list}
+
+
+def main(arg_list):
+    """Parse the command line options and arguments, and run the batch.
+
+    Exit with status 1 if any file is not valid.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: batch.py -h\n"
+                     "Check and simulate files: batch.py [-n <cycles>] "
+                     "[-j <jobs>] [-s <seed>] [-o <report path>] "
+                     "<file path or glob> ...")
+    try:
+        options, arguments = getopt.getopt(arg_list, "hn:j:s:o:")
+        cycles = 10
+        jobs = None
+        seed = 0
+        report_path = None
+        for option, value in options:
+            if option == "-h":  # print the usage message
+                print(usage_message)
+                sys.exit()
+            elif option == "-n":
+                cycles = int(value)
+            elif option == "-j":
+                jobs = int(value)
+            elif option == "-s":
+                seed = int(value)
+            elif option == "-o":
+                report_path = value
+    except (getopt.GetoptError, ValueError):
+        print("Error: Invalid command line arguments.\n")
+        print(usage_message)
+        sys.exit()
+
+    if not arguments:
+        print("Error: At least one file path required.\n")
+        print(usage_message)
+        sys.exit()
+
+    report = run_batch(find_files(arguments), cycles, jobs, seed)
+    report_text = json.dumps(report, indent=2)
+    if report_path is None:
+        print(report_text)
+    else:
+        with open(report_path, "w") as report_file:
+            report_file.write(report_text)
+    if report["valid"] != report["files"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
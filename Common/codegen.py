@@ -0,0 +1,341 @@
+"""Generate a Python function that simulates a whole network.
+
+Used in the Logic Simulator project as a faster backend for
+network.execute_network(). Instead of calling a method for every device and
+looking up every input in a dictionary, the network is turned into a single
+function with a local variable for each signal, which is compiled once and
+called once per cycle.
+
+Classes
+-------
+CodeGenerator - generates and compiles the function that simulates a cycle.
+"""
+import collections
+import hashlib
+
+from optimise import Optimiser
+
+
+class CodeGenerator:
+
+    """Generate and compile a function that simulates one cycle of a network.
+
+    The function gives the same signals as network.execute_network(). Clocks,
+    switches, D-types, RC devices and the protected gates found by
+    optimise.Optimiser() are simulated as the network does, by repeating
+    their updates until the signals settle, as their results depend on the
+    order in which signals change within a cycle. The other gates only see
+    settled signals, so they are evaluated once each after the settle loop,
+    with the gates driving them first. They can always settle, even if the
+    network would need more than its iteration limit for them.
+
+    The compiled code only depends on the structure of the network, so it is
+    kept in code_cache and reused by networks with the same structure. The
+    cache holds the code of the last code_cache_size networks compiled.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    get_netlist_key(self): Returns a hash of the structure of the network.
+
+    generate_source(self): Returns the source of the function that
+                           simulates a cycle.
+
+    compile(self): Returns the function that simulates a cycle.
+    """
+
+    # {netlist key: code object of the module that defines the function},
+    # least recently used first
+    code_cache = collections.OrderedDict()
+    code_cache_size = 16
+
+    def __init__(self, names, devices, network):
+        """Initialise the signal variables."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+
+        # number of update iterations before the network is declared
+        # unstable, as in network.execute_network()
+        self.iteration_limit = 20
+        # update_table[signal][target] is network.update_signal(signal,
+        # target) for the signal constants and a HIGH or LOW target
+        self.update_table = ((self.devices.LOW, self.devices.RISING),
+                             (self.devices.FALLING, self.devices.HIGH),
+                             (self.devices.FALLING, self.devices.HIGH),
+                             (self.devices.LOW, self.devices.RISING))
+        # {(device_id, output_id): name of the local variable}
+        self.signal_variables = {}
+        self.optimiser = Optimiser(names, devices, network)
+
+    def get_netlist_key(self):
+        """Return a hash of the structure of the network.
+
+        Networks with the same devices, connections, removed and pruned
+        devices have the same key.
+        """
+        netlist = [
+            [(device.device_id, device.device_kind,
+              tuple(device.inputs.items()), tuple(device.outputs))
+             for device in self.devices.devices_list],
+            sorted(self.network.skipped_devices),
+            None if self.network.active_devices is None
+            else sorted(self.network.active_devices),
+            self.network.derived_outputs]
+        return hashlib.sha1(repr(netlist).encode()).hexdigest()
+
+    def compile(self):
+        """Return the function that simulates a cycle of the network.
+
+        The function returns True if the signals settle, like
+        network.execute_network(), and stores them in the device outputs.
+        """
+        key = self.get_netlist_key()
+        if key in self.code_cache:
+            self.code_cache.move_to_end(key)
+            code = self.code_cache[key]
+        else:
+            code = compile(self.generate_source(), "<network>", "exec")
+            self.code_cache[key] = code
+            if len(self.code_cache) > self.code_cache_size:
+                self.code_cache.popitem(last=False)
+        namespace = {"update_table": self.update_table}
+        for device in self.devices.devices_list:
+            namespace["device_{}".format(device.device_id)] = device
+            namespace["outputs_{}".format(device.device_id)] = device.outputs
+        exec(code, namespace)
+        return namespace["execute_cycle"]
+
+    def generate_source(self):
+        """Return the source of a module defining execute_cycle()."""
+        kind_list = [self.devices.SWITCH, self.devices.D_TYPE,
+                     self.devices.CLOCK, self.devices.AND, self.devices.OR,
+                     self.devices.NAND, self.devices.NOR, self.devices.XOR,
+                     self.devices.RC, self.devices.NOT]
+        simulated = {}  # {device_kind: [device_id]} in execution order
+        for device_kind in kind_list:
+            if device_kind in [self.devices.CLOCK, self.devices.RC]:
+                simulated[device_kind] = self.devices.find_devices(
+                    device_kind)
+            else:
+                simulated[device_kind] = self.network.find_simulated_devices(
+                    device_kind)
+            for device_id in simulated[device_kind]:
+                if None in self.devices.get_device(device_id).inputs.values():
+                    # the network fails on the unconnected input
+                    return "def execute_cycle():\n    return False\n"
+
+        [protected, order] = self.optimiser.find_protected_devices()
+        levelized = set()
+        for device_kind in self.optimiser.gate_kinds:
+            levelized.update(device_id for device_id in simulated[device_kind]
+                             if device_id not in protected)
+
+        self.signal_variables = {}
+        for device in self.devices.devices_list:
+            for output_id in device.outputs:
+                self.signal_variables[(device.device_id, output_id)] = \
+                    "signal_{}".format(len(self.signal_variables))
+
+        line_list = ["def execute_cycle():"]
+        for [device_id, output_id], variable in \
+                self.signal_variables.items():
+            line_list.append("    {} = outputs_{}[{!r}]".format(
+                variable, device_id, output_id))
+        line_list.extend(self._get_timer_lines(simulated))
+
+        line_list.append("    for iteration in range({}):".format(
+            self.iteration_limit))
+        line_list.append("        steady = True")
+        for device_kind in kind_list:
+            for device_id in simulated[device_kind]:
+                if device_id not in levelized:
+                    line_list.extend("        " + line for line
+                                     in self._get_update_lines(device_id))
+        line_list.append("        if steady:")
+        line_list.append("            break")
+        line_list.append("    else:")
+        store_lines = self._get_store_lines(simulated)
+        line_list.extend("    " + line for line in store_lines)
+        line_list.append("        return False")
+
+        # Gates that only see settled signals, in levelized order
+        for device_id in order:
+            if device_id in levelized:
+                line_list.append("    " + self._get_gate_expression(
+                    device_id))
+        for device_id, output_id, source_device_id, source_output_id in \
+                self.network.derived_outputs:
+            line_list.append("    {} = {}".format(
+                self.signal_variables[(device_id, output_id)],
+                self.signal_variables[(source_device_id, source_output_id)]))
+        line_list.extend(store_lines)
+        line_list.append("    return True")
+        return "\n".join(line_list) + "\n"
+
+    def _get_input_variables(self, device_id):
+        """Return the variables of the signals at the inputs of a device."""
+        device = self.devices.get_device(device_id)
+        return [self.signal_variables[connected_output]
+                for connected_output in device.inputs.values()]
+
+    def _get_timer_lines(self, simulated):
+        """Return the lines run once per cycle before the signals settle.
+
+        They start the clock edges, count the RC timers and read the switch
+        levels and D-type memories into local variables.
+        """
+        line_list = []
+        for device_id in simulated[self.devices.CLOCK]:
+            device = "device_{}".format(device_id)
+            variable = self.signal_variables[(device_id, None)]
+            line_list.extend([
+                "    if {0}.clock_counter == {0}.clock_half_period:",
+                "        {0}.clock_counter = 0",
+                "        if {1} == {2}:",
+                "            {1} = {3}",
+                "        elif {1} == {4}:",
+                "            {1} = {5}",
+                "    {0}.clock_counter += 1"])
+            line_list[-7:] = [line.format(
+                device, variable, self.devices.HIGH, self.devices.FALLING,
+                self.devices.LOW, self.devices.RISING)
+                for line in line_list[-7:]]
+        for device_id in simulated[self.devices.RC]:
+            line_list.extend([
+                "    if device_{0}.rc_counter is None:",
+                "        device_{0}.rc_counter = 0",
+                "    device_{0}.rc_counter += 1",
+                "    rc_due_{0} = device_{0}.rc_counter == "
+                "device_{0}.rc_constant + 1"])
+            line_list[-4:] = [line.format(device_id)
+                              for line in line_list[-4:]]
+        for device_id in simulated[self.devices.SWITCH]:
+            line_list.append("    switch_state_{0} = device_{0}.switch_state"
+                             .format(device_id))
+        for device_id in simulated[self.devices.D_TYPE]:
+            line_list.append("    memory_{0} = device_{0}.dtype_memory"
+                             .format(device_id))
+        return line_list
+
+    def _get_update_lines(self, device_id):
+        """Return the lines that update a device once in the settle loop.
+
+        The signals are updated towards their targets as by
+        network.update_signal(), so signals in the loop can be RISING or
+        FALLING.
+        """
+        device = self.devices.get_device(device_id)
+        device_kind = device.device_kind
+        [HIGH, LOW, RISING, FALLING] = [self.devices.HIGH, self.devices.LOW,
+                                        self.devices.RISING,
+                                        self.devices.FALLING]
+        variable = self.signal_variables.get((device_id, None))
+        input_list = self._get_input_variables(device_id)
+
+        if device_kind == self.devices.SWITCH:
+            return self._get_target_lines(
+                variable, "switch_state_{}".format(device_id))
+        elif device_kind == self.devices.CLOCK:
+            return ["if {} == {}:".format(variable, RISING),
+                    "    {} = {}".format(variable, HIGH),
+                    "    steady = False",
+                    "elif {} == {}:".format(variable, FALLING),
+                    "    {} = {}".format(variable, LOW),
+                    "    steady = False"]
+        elif device_kind == self.devices.RC:
+            line_list = ["if rc_due_{} and {} in ({}, {}):".format(
+                device_id, variable, HIGH, FALLING)]
+            line_list.extend("    " + line for line
+                             in self._get_target_lines(variable, LOW))
+            return line_list
+        elif device_kind == self.devices.D_TYPE:
+            memory = "memory_{}".format(device_id)
+            inputs = device.inputs
+            [clock, data, set_signal, clear] = [
+                self.signal_variables[inputs[input_id]] for input_id
+                in [self.devices.CLK_ID, self.devices.DATA_ID,
+                    self.devices.SET_ID, self.devices.CLEAR_ID]]
+            return ["if {} == {}:".format(clock, RISING),
+                    "    if {} in ({}, {}):".format(data, HIGH, FALLING),
+                    "        {} = {}".format(memory, HIGH),
+                    "    elif {} in ({}, {}):".format(data, LOW, RISING),
+                    "        {} = {}".format(memory, LOW),
+                    "if {} == {}:".format(set_signal, HIGH),
+                    "    {} = {}".format(memory, HIGH),
+                    "if {} == {}:".format(clear, HIGH),
+                    "    {} = {}".format(memory, LOW)] + \
+                self._get_target_lines(self.signal_variables[
+                    (device_id, self.devices.Q_ID)], memory) + \
+                self._get_target_lines(self.signal_variables[
+                    (device_id, self.devices.QBAR_ID)],
+                    "{} - {}".format(HIGH, memory))
+
+        # Gates, with RISING and FALLING inputs as the network reads them
+        if device_kind == self.devices.XOR:
+            target = "{} if {} == {} else {}".format(LOW, input_list[0],
+                                                     input_list[1], HIGH)
+        elif device_kind == self.devices.NOT:
+            target = "{} if {} == {} else {}".format(LOW, input_list[0],
+                                                     HIGH, HIGH)
+        else:
+            [x, y] = self.optimiser.gate_rules[device_kind]
+            target = "{} if {} else {}".format(
+                y, " and ".join("{} == {}".format(signal, x)
+                                for signal in input_list),
+                self.network.invert_signal(y))
+        return self._get_target_lines(variable, target)
+
+    def _get_target_lines(self, variable, target):
+        """Return the lines that update a signal towards a target."""
+        return ["new_signal = update_table[{}][{}]".format(variable, target),
+                "if new_signal != {}:".format(variable),
+                "    {} = new_signal".format(variable),
+                "    steady = False"]
+
+    def _get_gate_expression(self, device_id):
+        """Return the line that evaluates a gate from settled signals.
+
+        Settled signals are HIGH (1) or LOW (0), so gates are bit operations.
+        """
+        device_kind = self.devices.get_device(device_id).device_kind
+        input_list = self._get_input_variables(device_id)
+        if device_kind in [self.devices.AND, self.devices.NAND]:
+            expression = " & ".join(input_list)
+        elif device_kind in [self.devices.OR, self.devices.NOR]:
+            expression = " | ".join(input_list)
+        elif device_kind == self.devices.XOR:
+            expression = "{} ^ {}".format(input_list[0], input_list[1])
+        else:
+            expression = input_list[0]
+        if device_kind in [self.devices.NAND, self.devices.NOR,
+                           self.devices.NOT]:
+            expression = "({}) ^ 1".format(expression)
+        return "{} = {}".format(self.signal_variables[(device_id, None)],
+                                expression)
+
+    def _get_store_lines(self, simulated):
+        """Return the lines that store the signals and D-type memories."""
+        line_list = []
+        for device_kind, device_id_list in simulated.items():
+            for device_id in device_id_list:
+                device = self.devices.get_device(device_id)
+                for output_id in device.outputs:
+                    line_list.append("    outputs_{}[{!r}] = {}".format(
+                        device_id, output_id,
+                        self.signal_variables[(device_id, output_id)]))
+                if device_kind == self.devices.D_TYPE:
+                    line_list.append(
+                        "    device_{0}.dtype_memory = memory_{0}".format(
+                            device_id))
+        for device_id, output_id, source_device_id, source_output_id in \
+                self.network.derived_outputs:
+            line_list.append("    outputs_{}[{!r}] = {}".format(
+                device_id, output_id,
+                self.signal_variables[(device_id, output_id)]))
+        return line_list
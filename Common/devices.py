@@ -55,6 +55,8 @@ class Devices:
     Parameters
     ----------
     names: instance of the names.Names() class.
+    seed: seed for the random start-up state of D-types and clocks, or None
+          to use the global random generator.
 
     Public methods
     --------------
@@ -95,16 +97,38 @@ class Devices:
 
     cold_startup(self): Simulates cold start-up of D-types and clocks.
 
+    cold_start_device(self, device): Simulates cold start-up of one device.
+
+    set_seed(self, seed): Sets the seed for cold start-up.
+
+    get_random(self, device): Returns the random generator of a device.
+
+    begin_build(self): Defers device initialisation until finalize().
+
+    finalize(self): Runs cold start-up once for the whole netlist.
+
     make_device(self, device_id, device_kind, device_property=None): Creates
                        the specified device and returns errors if unsuccessful.
     """
 
-    def __init__(self, names):
+    def __init__(self, names, seed=None):
         """Initialise devices list and constants."""
 
         self.names = names
+        self.seed = seed
 
         self.devices_list = []
+        # devices_dictionary stores {device_id: Device} for fast lookup
+        self.devices_dictionary = {}
+        self.input_count = 0  # total number of inputs of all devices
+
+        # True between begin_build() and finalize(). While building, devices
+        # are not initialised as they are made.
+        self.building = False
+
+        # IDs of switches whose levels the optimiser has propagated into the
+        # network, which can no longer be set
+        self.fixed_switches = set()
 
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR", "NOT"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "RC"]
@@ -130,10 +154,7 @@ class Devices:
 
     def get_device(self, device_id):
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        return self.devices_dictionary.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -154,6 +175,7 @@ class Devices:
         new_device = Device(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.devices_dictionary[device_id] = new_device
 
     def add_input(self, device_id, input_id):
         """Add the specified input to the specified device.
@@ -162,7 +184,9 @@ class Devices:
         """
         device = self.get_device(device_id)
         if device is not None:
-            device.inputs.setdefault(input_id)
+            if input_id not in device.inputs:
+                device.inputs[input_id] = None
+                self.input_count += 1
             return True
         else:
             return False
@@ -215,13 +239,16 @@ class Devices:
     def set_switch(self, device_id, signal):
         """Set the switch state of the specified device to signal.
 
-        Return True if successful.
+        Return True if successful. Switches fixed by the optimiser cannot be
+        set.
         """
         device = self.get_device(device_id)
         if device is None:
             return False
         elif device.device_kind != self.SWITCH:
             return False
+        elif device_id in self.fixed_switches:
+            return False
         else:
             device.switch_state = signal
             return True
@@ -241,7 +268,10 @@ class Devices:
         self.add_device(device_id, self.CLOCK)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        self.add_output(device_id, output_id=None)
+        if not self.building:
+            # Clock initialised to a random point in its cycle
+            self.cold_start_device(device)
 
     def make_gate(self, device_id, device_kind, no_of_inputs):
         """Make logic gates with the specified number of inputs."""
@@ -260,7 +290,9 @@ class Devices:
             self.add_input(device_id, input_id)
         for output_id in self.dtype_output_ids:
             self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
+        if not self.building:
+            # D-type initialised to a random state
+            self.cold_start_device(self.get_device(device_id))
 
     def make_rc(self, device_id, rc_constant):
         """Make an RC device."""
@@ -277,22 +309,67 @@ class Devices:
         begin from a random point in their cycles.
         """
         for device in self.devices_list:
-            if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
-            elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = \
-                    random.randrange(device.clock_half_period)
-
-            elif device.device_kind == self.RC:
-                # Reinitialise RC device
-                device.rc_counter = 0
-                self.add_output(device.device_id, output_id=None,
-                                signal=self.HIGH)
+            self.cold_start_device(device)
+
+    def cold_start_device(self, device):
+        """Simulate cold start-up of a single device.
+
+        Devices other than D-types, clocks and RC devices are left unchanged.
+        """
+        if device.device_kind == self.D_TYPE:
+            device.dtype_memory = self.get_random(device).choice(
+                [self.LOW, self.HIGH])
+
+        elif device.device_kind == self.CLOCK:
+            device_random = self.get_random(device)
+            clock_signal = device_random.choice([self.LOW, self.HIGH])
+            device.outputs[None] = clock_signal
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = device_random.randrange(
+                device.clock_half_period)
+
+        elif device.device_kind == self.RC:
+            # Reinitialise RC device
+            device.rc_counter = 0
+            device.outputs[None] = self.HIGH
+
+    def set_seed(self, seed):
+        """Set the seed for cold start-up.
+
+        If seed is None, the global random generator is used.
+        """
+        self.seed = seed
+
+    def get_random(self, device):
+        """Return the random generator used to start up the device.
+
+        If a seed is set, each device has its own generator derived from the
+        seed and the device name, so its start-up state does not depend on
+        the other devices or on the order they are started in.
+        """
+        if self.seed is None:
+            return random
+        device_name = self.names.get_name_string(device.device_id)
+        return random.Random("{}/{}".format(self.seed, device_name))
+
+    def begin_build(self):
+        """Defer the initialisation of devices until finalize() is called.
+
+        Making a clock or a D-type normally initialises it straight away. When
+        many devices are made in bulk, e.g. by the parser, the initialisation
+        is instead done once for the whole netlist by finalize().
+        """
+        self.building = True
+
+    def finalize(self):
+        """Simulate cold start-up once for the whole netlist.
+
+        Unconnected inputs are found by network.Network() instead, which
+        counts the connections as they are made.
+        """
+        for device in self.devices_list:
+            self.cold_start_device(device)
+        self.building = False
 
     def make_device(self, device_id, device_kind, device_property=None):
         """Create the specified device.
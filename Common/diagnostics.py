@@ -0,0 +1,141 @@
+"""Collect and report errors found in the definition file.
+
+Used in the Logic Simulator project by the parser to store every error it
+detects as a structured record, so that errors can be printed, counted or
+serialised by the command line interface, the GUI and other tools.
+
+Classes
+-------
+Diagnostic - stores a single error and its location.
+Diagnostics - collects errors and renders them as text.
+"""
+
+
+class Diagnostic:
+    """Store a single error and its location in the definition file.
+
+    Parameters
+    ----------
+    code: error code.
+    message: error message.
+    line: line number of the error (starting at 1), or None if unknown.
+    column: column of the first character marked by the error (starting at
+            1), or None if the error has no marker.
+    span: number of characters marked by the error, or None.
+    text: text of the line containing the error, or None.
+    notes: list of extra lines of information about the error.
+
+    Public methods
+    --------------
+    to_dict(self): Returns the error as a dictionary.
+
+    render(self): Returns the error as console text.
+    """
+
+    def __init__(self, code, message, line=None, column=None, span=None,
+                 text=None, notes=None):
+        """Initialise error properties."""
+        self.code = code
+        self.message = message
+        self.line = line
+        self.column = column
+        self.span = span
+        self.text = text
+        if notes is None:
+            notes = []
+        self.notes = notes
+
+    def to_dict(self):
+        """Return the error as a dictionary that can be serialised."""
+        return {"code": self.code, "message": self.message,
+                "line": self.line, "column": self.column, "span": self.span,
+                "text": self.text, "notes": list(self.notes)}
+
+    def render(self):
+        """Return the error as text in the format printed on the console.
+
+        The line containing the error is shown below the message, with a
+        caret under the last character marked by the error.
+        """
+        lines = [self.message]
+        if self.line is not None and self.text is not None:
+            prefix = "Line {}: ".format(self.line)
+            lines.append(prefix + self.text)
+            if self.column is not None:
+                caret_index = self.column + self.span - 2
+                # Keep tabs so that the caret lines up with the text
+                arrow_line = "".join(
+                    [char if char.isspace() else " "
+                     for char in self.text[:caret_index]])
+                lines.append(" " * len(prefix) + arrow_line + "^")
+        lines.extend(self.notes)
+        return "\n".join(lines)
+
+
+class Diagnostics:
+    """Collect errors and render them as text.
+
+    Errors are stored in the order they are added. They can be printed as
+    they are added (echo), printed later (render) or serialised (to_list).
+
+    Parameters
+    ----------
+    echo: print each error when it is added.
+    max_printed: maximum number of errors to print when echoing, or None for
+                 no limit.
+
+    Public methods
+    --------------
+    add(self, diagnostic): Stores an error and prints it if echo is set.
+
+    render(self, limit=None): Returns the first limit errors as text.
+
+    to_list(self): Returns all errors as a list of dictionaries.
+    """
+
+    def __init__(self, echo=True, max_printed=None):
+        """Initialise the list of errors."""
+        self.echo = echo
+        self.max_printed = max_printed
+        self.diagnostic_list = []
+
+    def __len__(self):
+        """Return the number of errors collected."""
+        return len(self.diagnostic_list)
+
+    def __iter__(self):
+        """Iterate over the errors collected."""
+        return iter(self.diagnostic_list)
+
+    def add(self, diagnostic):
+        """Store the error and print it if echo is set.
+
+        Once max_printed errors have been printed, further errors are stored
+        but not printed.
+        """
+        self.diagnostic_list.append(diagnostic)
+        if self.echo:
+            number_added = len(self.diagnostic_list)
+            if self.max_printed is None or number_added <= self.max_printed:
+                print(diagnostic.render())
+            elif number_added == self.max_printed + 1:
+                print("Further errors are not printed.")
+
+    def render(self, limit=None):
+        """Return the first limit errors as text.
+
+        Return all errors if limit is None. A final line reports how many
+        errors were left out.
+        """
+        if limit is None:
+            limit = len(self.diagnostic_list)
+        text_list = [diagnostic.render()
+                     for diagnostic in self.diagnostic_list[:limit]]
+        number_left = len(self.diagnostic_list) - limit
+        if number_left > 0:
+            text_list.append("... and {} more errors.".format(number_left))
+        return "\n".join(text_list)
+
+    def to_list(self):
+        """Return all errors as a list of dictionaries."""
+        return [diagnostic.to_dict() for diagnostic in self.diagnostic_list]
@@ -6,14 +6,20 @@ or adjust the network properties.
 
 Classes:
 --------
+SignalTrace - stores the drawing geometry of one signal trace.
 MyGLCanvas - handles all canvas drawing operations.
 Gui - configures the main window and all the widgets.
 """
 import wx
+import collections
 import os
+import time
+import threading
 import wx.glcanvas as wxcanvas
 import wx.lib.scrolledpanel as scrolled
+import numpy as np
 from OpenGL import GL, GLUT
+from OpenGL.arrays import vbo
 
 from names import Names
 from devices import Devices
@@ -21,10 +27,156 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from stimulus import Stimulus
+from watchpoints import Watchpoints
 import gettext
 gettext.install('logsim')
 
 
+class SignalTrace:
+    """Store the drawing geometry of one signal trace.
+
+    The geometry is kept at several levels of detail, built when the trace
+    changes. Level 0 has one bin per cycle. Each higher level merges pairs
+    of bins of the level below, so a bin of level k covers 2**k cycles and
+    stores the lowest and highest signal level reached in those cycles. A
+    bin whose lowest and highest levels differ contains a transition.
+
+    Drawing at the coarsest level whose bins are no wider than one pixel
+    keeps the number of vertices proportional to the canvas width, however
+    many cycles were simulated.
+
+    Parameters
+    ----------
+    bits: list of values 0, 1, 0.5 (rising), -0.5 (falling) or 2 (blank).
+
+    Public methods
+    --------------
+    set_bits(self, bits): Rebuilds the levels of detail from a list of bits.
+
+    choose_level(self, cycles_per_pixel): Returns the level to draw at.
+
+    get_buffer(self, level): Returns the vertex buffer and the vertex x
+                             coordinates of a level.
+
+    delete(self): Frees the vertex buffers.
+    """
+
+    def __init__(self, bits):
+        """Initialise the levels of detail and vertex buffers."""
+        # {level: [vertex_buffer, vertex_x, up_to_date]}, filled on demand
+        self.buffers = {}
+        self.set_bits(bits)
+
+    def set_bits(self, bits):
+        """Rebuild the levels of detail from a list of bits.
+
+        Vertex buffers that already exist are marked as out of date and are
+        refilled the next time they are drawn.
+        """
+        bits = np.asarray(bits, dtype=np.float32)
+        drawn = np.flatnonzero(bits != 2)
+        if drawn.size == 0:  # blank trace
+            bits = bits[:0]
+            self.first_cycle = 0
+        else:  # blank cycles at the start of the signal are not drawn
+            self.first_cycle = int(drawn[0])
+            bits = bits[self.first_cycle:]
+        self.num_cycles = len(bits)
+
+        # Level at the end of each cycle: high, or approaching high
+        self.end_level = ((bits == 1) | (bits == 0.5)).astype(np.float32)
+        # Low and high cycles start at their own level (drawing a vertical
+        # line from the previous level), rising and falling cycles start
+        # where the previous cycle ended
+        previous_level = np.concatenate(([0], self.end_level[:-1]))
+        self.start_level = np.where((bits == 0) | (bits == 1), bits,
+                                    previous_level).astype(np.float32)
+
+        # Multi-resolution pyramid of (lowest, highest) levels per bin
+        low = np.minimum(np.minimum(previous_level, self.start_level),
+                         self.end_level)
+        high = np.maximum(np.maximum(previous_level, self.start_level),
+                          self.end_level)
+        self.levels = [(low, high)]
+        while len(low) > 1:
+            if len(low) % 2:  # repeat the last bin to pair up all bins
+                low = np.append(low, low[-1])
+                high = np.append(high, high[-1])
+            low = np.minimum(low[0::2], low[1::2])
+            high = np.maximum(high[0::2], high[1::2])
+            self.levels.append((low, high))
+
+        for level_buffer in self.buffers.values():
+            level_buffer[2] = False
+
+    def choose_level(self, cycles_per_pixel):
+        """Return the coarsest level whose bins are no wider than a pixel."""
+        if cycles_per_pixel < 2:
+            return 0
+        level = int(np.floor(np.log2(cycles_per_pixel)))
+        return min(level, len(self.levels) - 1)
+
+    def build_vertices(self, level):
+        """Return the line strip vertices of a level as a float32 array.
+
+        Each vertex is [cycle, level], where level is between 0 and 1. At
+        level 0, rising and falling cycles are drawn as slopes. At higher
+        levels, a bin with a transition is drawn from its lowest to its
+        highest level, so busy stretches of the trace appear filled.
+        """
+        if level == 0:
+            cycles = np.arange(self.num_cycles, dtype=np.float32)
+            start_x = self.first_cycle + cycles
+            end_x = start_x + 1
+            start_y = self.start_level
+            end_y = self.end_level
+        else:
+            bin_width = 2 ** level
+            [start_y, end_y] = self.levels[level]
+            start_x = self.first_cycle + np.arange(
+                len(start_y), dtype=np.float32) * bin_width
+            end_x = np.minimum(start_x + bin_width,
+                               self.first_cycle + self.num_cycles)
+
+        # Two vertices per bin: its start and its end
+        x = np.empty(2 * len(start_x), dtype=np.float32)
+        y = np.empty(2 * len(start_x), dtype=np.float32)
+        x[0::2] = start_x
+        x[1::2] = end_x
+        y[0::2] = start_y
+        y[1::2] = end_y
+
+        # Drop vertices in the middle of horizontal runs
+        keep = np.ones(len(x), dtype=bool)
+        keep[1:-1] = (y[1:-1] != y[:-2]) | (y[1:-1] != y[2:])
+        return np.ascontiguousarray(np.column_stack((x[keep], y[keep])))
+
+    def get_buffer(self, level):
+        """Return [vertex_buffer, vertex_x] for the given level.
+
+        The vertices are built and uploaded the first time a level is drawn.
+        vertex_x holds the (sorted) x coordinates of the vertices, for
+        finding the range of vertices that is visible.
+        """
+        if level not in self.buffers:
+            vertices = self.build_vertices(level)
+            self.buffers[level] = [vbo.VBO(vertices, usage='GL_STATIC_DRAW'),
+                                   vertices[:, 0], True]
+        elif not self.buffers[level][2]:
+            vertices = self.build_vertices(level)
+            # Reuse the buffer, data is copied again on the next bind
+            self.buffers[level][0].set_array(vertices)
+            self.buffers[level][1:] = [vertices[:, 0], True]
+        return self.buffers[level][:2]
+
+    def delete(self):
+        """Free the vertex buffers. Requires a current OpenGL context."""
+        for level_buffer in self.buffers.values():
+            level_buffer[0].delete()
+        self.buffers = {}
+
+
 class MyGLCanvas(wxcanvas.GLCanvas):
     """Handle all drawing operations.
 
@@ -58,8 +210,32 @@ class MyGLCanvas(wxcanvas.GLCanvas):
     render_rectangle(self, corner, height, width, color, opacity):
     Draws a rectangle
 
-    render_signal(self, corner_y, bits, size): Draw the signal, given a list
-                                               of bits
+    render_signal(self, corner_y, device_name, size): Draw the signal of
+                                               a monitored device
+
+    update_traces(self): Rebuild the geometry of the signal traces
+
+    get_text_list(self, text, color): Return the display list that draws
+                                      a line of text
+
+    clear_text_cache(self): Delete the display lists of cached text
+
+    get_panels_fit(self): Return the number of panels that fit in the frame
+
+    get_visible_panels(self, size, max_devices_fit): Return the range of
+                                        panel indices that are on screen
+
+    scroll_panels(self, first_panel): Scroll the panels so that the given
+                                      device is in the bottom panel
+
+    update_scrollbar(self): Update the scrollbar to the scroll position
+
+    get_cursor_position(self, mouse_x, mouse_y): Return the panel and cycle
+                                                 under the mouse
+
+    request_redraw(self): Ask for a redraw at the end of the current frame
+
+    on_redraw_timer(self, event): Redraw at the end of a frame if needed
     """
 
     def __init__(self, parent):
@@ -90,6 +266,12 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         self.Bind(wx.EVT_SIZE, self.on_size)
         self.Bind(wx.EVT_MOUSE_EVENTS, self.on_mouse)
 
+        # Redraws requested within one frame are coalesced into one
+        self.frame_interval = 16  # milliseconds
+        self.redraw_pending = False
+        self.redraw_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_redraw_timer, self.redraw_timer)
+
         # Color mappings from string to RGB value
         self.colormap = {
             'red': [1.0, 0.0, 0.0],
@@ -129,6 +311,9 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         # number of cycles that correspond to one big mark on the grid (changed
         # by wx 'Cycles' button)
         self.grid_big_value = 20
+        # cycle number at the left edge of the grid (changed by scrolling
+        # through time)
+        self.grid_first_value = 0
 
         # how much to the left of the grid marker you draw the value text
         self.grid_hor_text_offset = 10
@@ -151,6 +336,36 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         # Is set upon initialisation of Gui class instance
         self.devices_monitored = []
 
+        # Index of the monitored device shown in the bottom panel of the
+        # frame, changed by scrolling
+        self.first_panel = 0
+        # Vertical wx.ScrollBar kept in step with first_panel, if any
+        self.scrollbar = None
+        # Function called with the [panel index, cycle] under the mouse, or
+        # None, when the mouse moves
+        self.cursor_readout = None
+
+        # Geometry of each signal trace, built by update_traces()
+        # {device_name: SignalTrace}
+        self.traces = {}
+        # Traces that are no longer monitored. Their buffers are deleted
+        # in render() when the OpenGL context is current.
+        self.stale_traces = []
+
+        # Display list of each line of text drawn, so that the characters
+        # of a label are only sent to OpenGL once. Labels change with zoom
+        # and pan, so only the most recently drawn are kept.
+        # {(text, color): display_list_id}, least recently used first
+        self.text_lists = collections.OrderedDict()
+        self.text_list_limit = 512
+        # Set when the monitored devices change, the cache is cleared in
+        # render()
+        self.text_changed = False
+
+        # Time spent in the last frame, in seconds, in total and in the
+        # label and trace passes
+        self.render_times = {'frame': 0.0, 'labels': 0.0, 'traces': 0.0}
+
     def init_gl(self):
         """
         Configure and initialise the OpenGL context.
@@ -165,8 +380,6 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         GL.glOrtho(0, size.width, 0, size.height, -1, 1)
         GL.glMatrixMode(GL.GL_MODELVIEW)
         GL.glLoadIdentity()
-        GL.glTranslated(self.pan_x, self.pan_y, 0.0)
-        GL.glScaled(self.zoom, self.zoom, self.zoom)
         GL.glEnable(GL.GL_BLEND)
         GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
 
@@ -175,12 +388,29 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         Handle all drawing operations.
         """
         size = self.GetClientSize()
+        frame_start = time.perf_counter()
+        self.render_times['labels'] = 0.0
+        self.render_times['traces'] = 0.0
 
         self.SetCurrent(self.context)
         if not self.init:
-            # Configure the viewport, modelview and projection matrices
+            # Configure the viewport and projection matrices
             self.init_gl()
             self.init = True
+        self.redraw_pending = False
+
+        # Pan and zoom are applied to all the cached geometry by the
+        # modelview matrix
+        GL.glMatrixMode(GL.GL_MODELVIEW)
+        GL.glLoadIdentity()
+        GL.glTranslated(self.pan_x, self.pan_y, 0.0)
+        GL.glScaled(self.zoom, self.zoom, self.zoom)
+
+        # Free buffers of traces that are no longer monitored
+        while self.stale_traces:
+            self.stale_traces.pop().delete()
+        if self.text_changed:
+            self.clear_text_cache()
 
         # Clear everything
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
@@ -195,69 +425,42 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         # Keep text close to the y-axis when zooming
         self.y_axis_label_offset = self.origin_x - 7 * self.max_margin / self.zoom
 
-        # Max number of devices that will fit in un-resized window
-        max_devices_fit = (
-            size.height - self.top_offset - self.bottom_offset) // (
-            self.inter_panel_spacing + self.panel_height)
-        num_devices_now = len(self.devices_monitored)
+        # Max number of devices that will fit in the window. Further
+        # devices are reached by scrolling
+        max_devices_fit = self.get_panels_fit()
+        self.scroll_panels(self.first_panel)  # keep scroll position valid
 
         # Draw the other 3 edges of the main frame and y-axis label
-        if num_devices_now > max_devices_fit:  # push label up
-            max_height_panels = self.bottom_offset + \
-                (self.panel_height + self.inter_panel_spacing) * num_devices_now
-
-            # left vertical line
-            self.render_line_strip([[self.origin_x, self.origin_y], [
-                                   self.origin_x, max_height_panels]], 'black')
-
-            # right vertical line
-            self.render_line_strip([[size.width -
-                                     self.right_offset, max_height_panels],
-                                    [size.width - self.right_offset,
-                                    self.origin_y]],
-                                   'black')
-
-            # top horizontal line
-            self.render_line_strip([[self.origin_x, max_height_panels],
-                                    [size.width - self.right_offset,
-                                    max_height_panels]],
-                                   'black')
-
-            # y-axis label (name and type of device)
-            self.render_text('Name\n[Type]', self.y_axis_label_offset +
-                             30 / self.zoom, max_height_panels + 30,
-                             'black')
-        else:
-            # left vertical line
-            self.render_line_strip([[self.origin_x, self.origin_y], [
-                                   self.origin_x, size.height -
-                                   self.top_offset]],
-                                   'black')
-
-            # right vertical line
-            self.render_line_strip([[size.width - self.right_offset,
-                                     size.height - self.top_offset],
-                                    [size.width - self.right_offset,
-                                     self.origin_y]],
-                                   'black')
-
-            # top horizontal line
-            self.render_line_strip([[self.origin_x,
-                                     size.height - self.top_offset],
-                                    [size.width - self.right_offset,
-                                     size.height - self.top_offset]],
-                                   'black')
-
-            # y-axis label (name and type of device)
-            self.render_text(
-                'Name\n[Type]',
-                self.y_axis_label_offset +
-                30 /
-                self.zoom,
-                size.height -
-                self.top_offset -
-                10,
-                'black')
+        # left vertical line
+        self.render_line_strip([[self.origin_x, self.origin_y], [
+                               self.origin_x, size.height -
+                               self.top_offset]],
+                               'black')
+
+        # right vertical line
+        self.render_line_strip([[size.width - self.right_offset,
+                                 size.height - self.top_offset],
+                                [size.width - self.right_offset,
+                                 self.origin_y]],
+                               'black')
+
+        # top horizontal line
+        self.render_line_strip([[self.origin_x,
+                                 size.height - self.top_offset],
+                                [size.width - self.right_offset,
+                                 size.height - self.top_offset]],
+                               'black')
+
+        # y-axis label (name and type of device)
+        self.render_text(
+            'Name\n[Type]',
+            self.y_axis_label_offset +
+            30 /
+            self.zoom,
+            size.height -
+            self.top_offset -
+            10,
+            'black')
 
         # Adjust small and big intervals to occupy window area
         big_interval = int(
@@ -279,7 +482,8 @@ class MyGLCanvas(wxcanvas.GLCanvas):
                 # draw a longer line for large intervals
                 self.render_line_strip(
                     [[x, self.origin_y], [x, self.origin_y - 10]], 'black')
-                self.render_text(str(round(self.grid_big_value *
+                self.render_text(str(round(self.grid_first_value +
+                                           self.grid_big_value *
                                            (x -
                                             self.origin_x) /
                                            (self.grid_big_interval), 1)), x -
@@ -290,19 +494,22 @@ class MyGLCanvas(wxcanvas.GLCanvas):
                 self.render_line_strip(
                     [[x, self.origin_y], [x, self.origin_y - 5]], 'black')
 
-        # Draw device outputs
-        for index, device in enumerate(self.devices_monitored):
+        # Draw device outputs, only for the panels that are visible
+        [first_visible, last_visible] = self.get_visible_panels(
+            size, max_devices_fit)
+        for index in range(first_visible, last_visible):
             # Extract device properties
+            device = self.devices_monitored[index]
             device_type = device[0]
             device_name = device[1]
-            device_signal = device[2]
 
             # Corner => bottom-left corner
             corner_x = self.origin_x
-            # height depends on number of devices that
-            # have been rendered upto now, therefore need index value
+            # height depends on the position of the panel in the frame,
+            # counted from the first panel scrolled to
             corner_y = self.bottom_offset + \
-                (self.panel_height + self.inter_panel_spacing) * (index)
+                (self.panel_height + self.inter_panel_spacing) * (
+                    index - self.first_panel)
 
             # Assign color according to device type
             if device_type == 'CLOCK':
@@ -342,12 +549,15 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             # render device type below device_name
             self.render_text(
                 device_type, self.y_axis_label_offset, corner_y + 10, 'black')
-            self.render_signal(corner_y, device_signal, size)
+            trace_start = time.perf_counter()
+            self.render_signal(corner_y, device[1], size)
+            self.render_times['traces'] += time.perf_counter() - trace_start
 
         # We have been drawing to the back buffer, flush the graphics pipeline
         # and swap the back buffer to the front
         GL.glFlush()
         self.SwapBuffers()
+        self.render_times['frame'] = time.perf_counter() - frame_start
 
     def on_paint(self, event):
         """
@@ -355,7 +565,7 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         """
         self.SetCurrent(self.context)
         if not self.init:
-            # Configure the viewport, modelview and projection matrices
+            # Configure the viewport and projection matrices
             self.init_gl()
             self.init = True
         self.render()
@@ -364,9 +574,27 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         """
         Handle the canvas resize event.
         """
-        # Forces reconfiguration of the viewport, modelview and projection
-        # matrices on the next paint event
+        # Forces reconfiguration of the viewport and projection matrices on
+        # the next paint event
         self.init = False
+        self.update_scrollbar()
+
+    def request_redraw(self):
+        """
+        Ask for the canvas to be redrawn at the end of the current frame
+        Requests made before then are served by the same redraw
+        """
+        self.redraw_pending = True
+        if not self.redraw_timer.IsRunning():
+            self.redraw_timer.StartOnce(self.frame_interval)
+
+    def on_redraw_timer(self, event):
+        """
+        Handle the end of a frame: redraw if a redraw has been requested
+        and not already done by a paint event
+        """
+        if self.redraw_pending:
+            self.render()
 
     def on_mouse(self, event):
         """
@@ -385,17 +613,30 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             text = "".join(["Mouse left canvas at: ", str(event.GetX()),
                             ", ", str(event.GetY())])
 
+        if event.Moving() and self.cursor_readout is not None:
+            self.cursor_readout(self.get_cursor_position(event.GetX(),
+                                                         event.GetY()))
+        if event.Leaving() and self.cursor_readout is not None:
+            self.cursor_readout(None)
+
         if event.Dragging():
             self.pan_x += event.GetX() - self.last_mouse_x
             self.pan_y -= event.GetY() - self.last_mouse_y
             self.last_mouse_x = event.GetX()
             self.last_mouse_y = event.GetY()
-            self.init = False
             text = "".join(["Mouse dragged to: ", str(event.GetX()),
                             ", ", str(event.GetY()), ". Pan is now: ",
                             str(self.pan_x), ", ", str(self.pan_y)])
 
-        if event.GetWheelRotation() < 0:
+        if event.GetWheelRotation() and event.ShiftDown():
+            # Shift + wheel scrolls through the monitored devices
+            if event.GetWheelRotation() < 0:
+                self.scroll_panels(self.first_panel - 1)
+            else:
+                self.scroll_panels(self.first_panel + 1)
+            text = "".join(["Scrolled to device: ", str(self.first_panel)])
+
+        elif event.GetWheelRotation() < 0:
             self.zoom *= (1.0 + (
                 event.GetWheelRotation() / (20 * event.GetWheelDelta())))
 
@@ -403,11 +644,10 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             self.zoom = min(self.zoom, self.max_zoom)
             self.zoom = max(self.zoom, self.min_zoom)
 
-            self.init = False
             text = "".join(["Negative mouse wheel rotation. Zoom is now: ",
                             str(self.zoom)])
 
-        if event.GetWheelRotation() > 0:
+        elif event.GetWheelRotation() > 0:
             self.zoom /= (1.0 - (
                 event.GetWheelRotation() / (20 * event.GetWheelDelta())))
 
@@ -415,33 +655,61 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             self.zoom = min(self.zoom, self.max_zoom)
             self.zoom = max(self.zoom, self.min_zoom)
 
-            self.init = False
             text = "".join(["Positive mouse wheel rotation. Zoom is now: ",
                             str(self.zoom)])
 
         if text:
-            self.render()
-        else:
-            self.Refresh()  # triggers the paint event
+            # Several mouse events can arrive within one frame, they are
+            # drawn together
+            self.request_redraw()
 
     def render_text(self, text, x_pos, y_pos, color):
         """
         Handle text drawing operations.
         """
+        text_start = time.perf_counter()
         if isinstance(color, str):
             color = self.colormap[color]
 
         GL.glColor4f(color[0], color[1], color[2], 1.0)
-        GL.glRasterPos2f(x_pos, y_pos)
+        for line in text.split('\n'):
+            GL.glRasterPos2f(x_pos, y_pos)
+            GL.glCallList(self.get_text_list(line, color))
+            y_pos = y_pos - 20
+        self.render_times['labels'] += time.perf_counter() - text_start
 
+    def get_text_list(self, text, color):
+        """
+        Return the display list that draws a line of text, compiling
+        it the first time the text is drawn in this color
+        The least recently used list is deleted once there are more
+        than text_list_limit
+        """
+        key = (text, tuple(color))
+        if key in self.text_lists:
+            self.text_lists.move_to_end(key)
+            return self.text_lists[key]
         font = GLUT.GLUT_BITMAP_HELVETICA_12
-
+        list_id = GL.glGenLists(1)
+        GL.glNewList(list_id, GL.GL_COMPILE)
         for character in text:
-            if character == '\n':
-                y_pos = y_pos - 20
-                GL.glRasterPos2f(x_pos, y_pos)
-            else:
-                GLUT.glutBitmapCharacter(font, ord(character))
+            GLUT.glutBitmapCharacter(font, ord(character))
+        GL.glEndList()
+        self.text_lists[key] = list_id
+        if len(self.text_lists) > self.text_list_limit:
+            [old_key, old_list_id] = self.text_lists.popitem(last=False)
+            GL.glDeleteLists(old_list_id, 1)
+        return list_id
+
+    def clear_text_cache(self):
+        """
+        Delete the display lists of cached text
+        Requires a current OpenGL context
+        """
+        for list_id in self.text_lists.values():
+            GL.glDeleteLists(list_id, 1)
+        self.text_lists.clear()
+        self.text_changed = False
 
     def render_line_strip(self, vertices, color):
         """Draw a line strip based on a list of points/vertices
@@ -451,11 +719,9 @@ class MyGLCanvas(wxcanvas.GLCanvas):
             color = self.colormap[color]  # get RGB from string
 
         GL.glColor4f(color[0], color[1], color[2], 1.0)
-        for index in range(len(vertices) - 1):
-            vertex, next_vertex = vertices[index], vertices[index + 1]
-            GL.glBegin(GL.GL_LINE_STRIP)
+        GL.glBegin(GL.GL_LINE_STRIP)
+        for vertex in vertices:
             GL.glVertex2f(vertex[0], vertex[1])
-            GL.glVertex2f(next_vertex[0], next_vertex[1])
         GL.glEnd()
 
     def render_rectangle(self, corner, height, width, color, opacity):
@@ -473,45 +739,178 @@ class MyGLCanvas(wxcanvas.GLCanvas):
         GL.glVertex2f(corner[0], corner[1] + height)
         GL.glEnd()
 
-    def render_signal(self, corner_y, bits, size):
-        """Draw the signal
+    def render_signal(self, corner_y, device_name, size):
+        """Draw the signal of the monitored device device_name
         corner_y is the y-coordinate of the bottom-left corner of the
         panel that the signal belongs to
-        bits contains a list of values 0, 1, 0.5 (rising),
-         -0.5 (falling) or 2 (blank)
+        The trace is drawn from a vertex buffer with a single call, at the
+        level of detail that matches the current zoom. Only the vertices
+        inside the visible part of the panel are drawn
         """
-        x_prev = self.origin_x  # starting value of x
+        if device_name not in self.traces:
+            return
+        trace = self.traces[device_name]
+        if trace.num_cycles == 0:
+            return
+
         # since there are 10 small intervals in one big interval
         x_interval = self.grid_small_interval * 10 / self.grid_big_value
         # don't allow signal to go outside right edge of panel
         x_max = size.width - self.right_offset
         # keep signal slightly above bottom edge of panel
         y_base = corner_y + self.signal_above_panel
-        y_prev = y_base  # starting value of y
 
-        for index, bit in enumerate(bits):
-            if x_prev + x_interval >= x_max:  # signal about to go outside
-                break
-            elif bit in [-0.5, 0.5]:  # rising / falling
-                # if -0.5, y is going to be zero; if +0.5, y is going to be 1
-                y_next = y_base + (bit + 0.5) * self.signal_height
-                # for either case, add 0.5 to get value being approached
-                self.render_line_strip(
-                    [[x_prev, y_prev], [x_prev + x_interval, y_next]], 'black')
-            elif bit in [0, 1]:  # low / high
-                y_next = y_base + bit * self.signal_height
-                # transition directly from 0 to 1 or vice versa
-                if index != 0 and bits[index - 1] in [0, 1]:
-                    # only if 0->1 directly allowed (No rising or falling edge)
-                    self.render_line_strip(
-                        [[x_prev, y_prev], [x_prev, y_next]], 'black')
-                # continue signal for 1 cycle if in [1,0]
-                self.render_line_strip(
-                    [[x_prev, y_next], [x_prev + x_interval, y_next]], 'black')
-            else:  # bit is None, so don't draw anything, just move on to next
-                y_next = y_prev
-            x_prev = x_prev + x_interval
-            y_prev = y_next
+        # Visible part of the panel in window coordinates
+        window_left = max(0, self.pan_x + self.zoom * self.origin_x)
+        window_right = min(size.width, self.pan_x + self.zoom * x_max)
+        if window_right <= window_left:
+            return
+
+        # Pick the level of detail from the width of a cycle on screen
+        pixels_per_cycle = self.zoom * x_interval
+        level = trace.choose_level(1 / pixels_per_cycle)
+        [trace_buffer, vertex_x] = trace.get_buffer(level)
+
+        # Range of vertices within the visible cycles
+        [first_cycle, last_cycle] = [
+            ((window_x - self.pan_x) / self.zoom - self.origin_x) / x_interval
+            for window_x in (window_left, window_right)]
+        first = max(int(np.searchsorted(vertex_x, first_cycle,
+                                        side='right')) - 1, 0)
+        last = min(int(np.searchsorted(vertex_x, last_cycle,
+                                       side='left')) + 1, len(vertex_x))
+        if last - first < 2:
+            return
+
+        color = self.colormap[self.signal_color]
+        GL.glColor4f(color[0], color[1], color[2], 1.0)
+
+        # Clip to the panel in window coordinates (after pan and zoom)
+        GL.glEnable(GL.GL_SCISSOR_TEST)
+        GL.glScissor(int(window_left), 0, int(window_right - window_left),
+                     size.height)
+
+        # Vertices are in cycles (x) and signal levels 0 or 1 (y)
+        GL.glPushMatrix()
+        GL.glTranslatef(self.origin_x, y_base, 0.0)
+        GL.glScalef(x_interval, self.signal_height, 1.0)
+
+        trace_buffer.bind()
+        try:
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glVertexPointer(2, GL.GL_FLOAT, 0, trace_buffer)
+            GL.glDrawArrays(GL.GL_LINE_STRIP, first, last - first)
+        finally:
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            trace_buffer.unbind()
+
+        GL.glPopMatrix()
+        GL.glDisable(GL.GL_SCISSOR_TEST)
+
+    def update_traces(self):
+        """Rebuild the geometry of the signal traces
+        Called whenever devices_monitored changes. The levels of detail are
+        built once here, so panning and zooming only redraw them
+        """
+        old_traces = self.traces
+        num_old_traces = len(old_traces)
+        self.traces = {}
+        for device in self.devices_monitored:
+            device_name = device[1]
+            if device_name in old_traces:
+                trace = old_traces.pop(device_name)
+                trace.set_bits(device[2])
+            else:
+                trace = SignalTrace(device[2])
+            self.traces[device_name] = trace
+        self.stale_traces.extend(old_traces.values())
+        # Labels are cached by their text, so new grid marker values only
+        # add entries that the LRU limit bounds. The cache is only cleared
+        # when the names of the monitored devices change
+        if old_traces or len(self.traces) != num_old_traces:
+            self.text_changed = True
+        self.update_scrollbar()
+
+    def get_panels_fit(self):
+        """
+        Return the number of panels that fit in the frame
+        """
+        size = self.GetClientSize()
+        return max(1, (size.height - self.top_offset - self.bottom_offset) //
+                   (self.inter_panel_spacing + self.panel_height))
+
+    def get_visible_panels(self, size, max_devices_fit):
+        """
+        Return [first, last] indices (last excluded) of the monitored
+        devices whose panels are inside the frame and inside the window
+        after pan and zoom. Computed directly from the layout, so the
+        cost does not depend on the number of monitored devices
+        """
+        panel_step = self.panel_height + self.inter_panel_spacing
+        # Window edges in the coordinates that panels are drawn in
+        y_low = -self.pan_y / self.zoom
+        y_high = (size.height - self.pan_y) / self.zoom
+        # Panel positions within the frame that intersect the window
+        first_slot = max(0, int(np.ceil(
+            (y_low - self.bottom_offset - self.panel_height) / panel_step)))
+        last_slot = min(max_devices_fit, int(np.floor(
+            (y_high - self.bottom_offset) / panel_step)) + 1)
+        first = min(self.first_panel + first_slot,
+                    len(self.devices_monitored))
+        last = min(self.first_panel + last_slot, len(self.devices_monitored))
+        return [first, max(first, last)]
+
+    def scroll_panels(self, first_panel):
+        """
+        Scroll the panels so that device first_panel is shown in the
+        bottom panel of the frame
+        """
+        max_first_panel = max(0, len(self.devices_monitored) -
+                              self.get_panels_fit())
+        first_panel = min(max(0, first_panel), max_first_panel)
+        if first_panel != self.first_panel:
+            self.first_panel = first_panel
+            self.update_scrollbar()
+            self.request_redraw()
+
+    def get_cursor_position(self, mouse_x, mouse_y):
+        """
+        Return [index, cycle] of the monitored device panel and the cycle
+        under the mouse, or None if the mouse is not over a trace. The
+        mouse position is in window coordinates, y counted from the top
+        """
+        size = self.GetClientSize()
+        x_interval = self.grid_small_interval * 10 / self.grid_big_value
+        panel_step = self.panel_height + self.inter_panel_spacing
+        # Undo pan and zoom
+        x = (mouse_x - self.pan_x) / self.zoom
+        y = (size.height - mouse_y - self.pan_y) / self.zoom
+        if x < self.origin_x or x > size.width - self.right_offset:
+            return None
+        slot = int(np.floor((y - self.bottom_offset) / panel_step))
+        if slot < 0 or slot >= self.get_panels_fit() or \
+                y - self.bottom_offset - slot * panel_step > \
+                self.panel_height:
+            return None
+        index = self.first_panel + slot
+        if index >= len(self.devices_monitored):
+            return None
+        cycle = int((x - self.origin_x) / x_interval) + \
+            int(self.grid_first_value)
+        return [index, cycle]
+
+    def update_scrollbar(self):
+        """
+        Update the scrollbar to the scroll position. The thumb is at the
+        bottom when the first device is in the bottom panel
+        """
+        if self.scrollbar is None:
+            return
+        panels_fit = self.get_panels_fit()
+        num_panels = max(len(self.devices_monitored), panels_fit)
+        self.scrollbar.SetScrollbar(
+            num_panels - panels_fit - self.first_panel, panels_fit,
+            num_panels, panels_fit)
 
 
 class Gui(wx.Frame):
@@ -535,6 +934,17 @@ class Gui(wx.Frame):
 
     load_file(self, event): Open file dialog to allow selection of new file
 
+    load_stimulus(self, event): Open file dialog to select a stimulus file
+
+    update_radiobuttons(self): Show the switch levels set by a stimulus
+
+    add_watch(self, kind): Ask for a condition to watch, break or assert on
+
+    show_watch_hits(self): Show the cycles where each watchpoint hit
+
+    show_cursor_readout(self, position): Show the signal and edges under
+                                         the mouse in the status bar
+
     on_spin(self, event): Handle event when the user changes the
                             spin control value.
 
@@ -542,8 +952,43 @@ class Gui(wx.Frame):
 
     on_continue_button(self, event): Handle event when user continues sim.
 
-    run_network(self, restart, num_cycles): Run the network for
-                                            a given number of cycles
+    on_scroll(self, event): Handle event when user moves the scrollbar.
+
+    on_time_scroll(self, event): Handle event when user scrolls through time.
+
+    show_latest_window(self): Move the window to the last cycles recorded.
+
+    update_time_scrollbar(self): Update the time scrollbar to the window.
+
+    on_cancel_button(self, event): Handle event when user cancels a run.
+
+    on_close(self, event): Stop the simulation before the window closes.
+
+    start_simulation(self, restart, num_cycles): Run the network on a
+                                            worker thread
+
+    stop_simulation(self): Cancel the running simulation and wait for it
+
+    simulation_worker(self, restart, num_cycles): Run the network on the
+                                            worker thread
+
+    on_simulation_progress(self, worker, cycles_run): Show the cycles
+                                            recorded so far
+
+    on_simulation_done(self, worker, cycles_run, oscillating_cycles): Show
+                                            the output of a finished run
+
+    set_running(self, running): Enable or disable controls during a run
+
+    report_oscillation(self, oscillating_cycles, cycles_run): Report
+                                            cycles that failed to settle
+
+    report_watch_stop(self): Report the break or assertion that stopped
+                                            a run
+
+    run_network(self, restart, num_cycles, progress=None,
+                cancel_event=None): Run the network for
+                                    a given number of cycles
 
     update_canvas_monitors(self):  Update the device properties stored
                                     separately in canvas
@@ -561,9 +1006,11 @@ class Gui(wx.Frame):
                                 selects a radio button
     """
 
-    def __init__(self, title, path, names, devices, network, monitors):
+    def __init__(self, title, path, names, devices, network, monitors,
+                 stimulus=None):
         """
-        Initialise widgets and layout.
+        Initialise widgets and layout. If given, the switch changes in
+        stimulus are applied while the simulation runs
         """
         super().__init__(parent=None, title=title, size=(900, 600))
 
@@ -571,11 +1018,27 @@ class Gui(wx.Frame):
         fileMenu = wx.Menu()
         menuBar = wx.MenuBar()
         fileMenu.Append(wx.FD_OPEN, _("&Open File"))
+        self.stimulus_menu_id = fileMenu.Append(
+            wx.ID_ANY, _("Load &Stimulus")).GetId()
         fileMenu.Append(wx.ID_ABOUT, _("&About"))
         fileMenu.Append(wx.ID_EXIT, _("&Exit"))
 
+        # Configure the watch menu
+        watchMenu = wx.Menu()
+        self.watch_menu_id = watchMenu.Append(
+            wx.ID_ANY, _("Add &Watch")).GetId()
+        self.break_menu_id = watchMenu.Append(
+            wx.ID_ANY, _("Add &Break")).GetId()
+        self.assert_menu_id = watchMenu.Append(
+            wx.ID_ANY, _("Add &Assertion")).GetId()
+        self.watch_hits_menu_id = watchMenu.Append(
+            wx.ID_ANY, _("Show &Hits")).GetId()
+        self.clear_watch_menu_id = watchMenu.Append(
+            wx.ID_ANY, _("&Clear Watches")).GetId()
+
         # Add items to menubar and bind handler
         menuBar.Append(fileMenu, _("&File"))
+        menuBar.Append(watchMenu, _("&Watch"))
         self.SetMenuBar(menuBar)
         self.Bind(wx.EVT_MENU, self.on_menu)
 
@@ -585,18 +1048,48 @@ class Gui(wx.Frame):
         self.devices = devices
         self.network = network
         self.monitors = monitors
+        # switch changes applied while the simulation runs, if any
+        self.stimulus = stimulus
+        # conditions checked after every cycle
+        self.watchpoints = Watchpoints(names, devices)
 
         # define initial number and maximum allowed number of cycles
         self.num_cycles = 200  # initial value
-        self.num_cycles_max = 2000
+        # signals are recorded to disk, so this is only limited by the spin
+        # control
+        self.num_cycles_max = 100000000
+
+        # The canvas shows a window of at most window_cycles_max cycles,
+        # starting at window_start, out of view_cycles cycles that can be
+        # reached with the time scrollbar
+        self.window_cycles_max = 10000
+        self.window_start = 0
+        self.view_cycles = self.num_cycles
+        self.time_scrollbar = None
+
+        # Translated signals of the window shown, kept between updates so
+        # that only newly recorded cycles are translated
+        # {(device_id, output_id): [window_start, signal_array, length]}
+        self.signal_buffers = {}
+        # seconds between canvas updates while a simulation runs
+        self.progress_interval = 0.2
+
+        # worker thread running the simulation, None when idle
+        self.worker = None
+        self.cancel_event = threading.Event()
+        # number of cycles recorded when the current run started
+        self.run_first_cycle = 0
+
+        # record every output to disk so long runs fit and monitors can be
+        # added without re-running
+        self.monitors.start_disk_recording()
 
         # pass True so that clocks and dtypes are initialised
-        self.run_network(True, self.num_cycles)
+        [cycles_run, oscillating_cycles] = self.run_network(
+            True, self.num_cycles)
+        self.report_oscillation(oscillating_cycles, cycles_run)
         self.canvas = MyGLCanvas(self)  # initialise canvas for drawing signals
         self.update_canvas_monitors()  # Pass device data to canvas for display
-        self.canvas.grid_big_value = self.num_cycles / \
-            5  # There are 5 big intervals on the grid and
-        # num_cycles is the maximum x value displayed
 
         # deal with monitor name lengths
         # push everything in frame to the right based on max length
@@ -616,10 +1109,38 @@ class Gui(wx.Frame):
             self, wx.ID_ANY, _("Run"), size=self.button_size)
         self.continue_button = wx.Button(
             self, wx.ID_ANY, _("Continue"), size=self.button_size)
+        self.gauge = wx.Gauge(self, wx.ID_ANY, range=1,
+                              size=self.button_size)
+        self.cancel_button = wx.Button(
+            self, wx.ID_ANY, _("Cancel"), size=self.button_size)
+        self.cancel_button.Disable()
+
+        # horizontal scrollbar for scrolling through time
+        self.time_scrollbar = wx.ScrollBar(self, wx.ID_ANY,
+                                           style=wx.SB_HORIZONTAL)
+        self.update_time_scrollbar()
+
+        # vertical scrollbar for scrolling through monitored devices
+        self.scrollbar = wx.ScrollBar(self, wx.ID_ANY, style=wx.SB_VERTICAL)
+        self.canvas.scrollbar = self.scrollbar
+        self.canvas.update_scrollbar()
+
+        # status bar showing the signal under the mouse
+        self.CreateStatusBar()
+        self.canvas.cursor_readout = self.show_cursor_readout
+        self.level_strings = {self.devices.LOW: "LOW",
+                              self.devices.HIGH: "HIGH",
+                              self.devices.RISING: "RISING",
+                              self.devices.FALLING: "FALLING",
+                              self.devices.BLANK: "BLANK"}
 
         # Bind events to widgets
         self.run_button.Bind(wx.EVT_BUTTON, self.on_run_button)
+        self.scrollbar.Bind(wx.EVT_SCROLL, self.on_scroll)
+        self.time_scrollbar.Bind(wx.EVT_SCROLL, self.on_time_scroll)
         self.continue_button.Bind(wx.EVT_BUTTON, self.on_continue_button)
+        self.cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel_button)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
 
         # Configure sizers for layout and add widgets to sizers
         self.main_sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -627,7 +1148,13 @@ class Gui(wx.Frame):
         self.side_sizer_cycles = wx.BoxSizer(wx.VERTICAL)
         self.side_sizer_monitor = wx.BoxSizer(wx.VERTICAL)
 
-        self.main_sizer.Add(self.canvas, 5, wx.EXPAND | wx.ALL, 5)
+        self.canvas_sizer = wx.BoxSizer(wx.VERTICAL)
+
+        self.main_sizer.Add(self.canvas_sizer, 5, wx.EXPAND | wx.ALL, 5)
+        self.canvas_sizer.Add(self.canvas, 1, wx.EXPAND)
+        self.canvas_sizer.Add(self.time_scrollbar, 0, wx.EXPAND | wx.TOP, 5)
+        self.main_sizer.Add(self.scrollbar, 0, wx.EXPAND | wx.TOP |
+                            wx.BOTTOM, 5)
         self.main_sizer.Add(self.side_sizer_parent, 1, wx.ALL, 5)
         self.side_sizer_parent.Add(self.side_sizer_cycles, 1, wx.ALL, 5)
         self.side_sizer_parent.Add(self.side_sizer_monitor, 1, wx.ALL, 5)
@@ -636,6 +1163,8 @@ class Gui(wx.Frame):
         self.side_sizer_cycles.Add(self.spin, 1, wx.ALL, 5)
         self.side_sizer_cycles.Add(self.run_button, 1, wx.ALL, 5)
         self.side_sizer_cycles.Add(self.continue_button, 1, wx.ALL, 5)
+        self.side_sizer_cycles.Add(self.gauge, 1, wx.ALL, 5)
+        self.side_sizer_cycles.Add(self.cancel_button, 1, wx.ALL, 5)
 
         # Add 'Monitors' header
         self.text_monitors = wx.StaticText(
@@ -727,6 +1256,8 @@ class Gui(wx.Frame):
                 else:
                     radio_0.SetValue(True)
 
+                self.radiobutton_list.append([radio_0, radio_1])
+
                 sub_side_sizer = wx.BoxSizer(wx.HORIZONTAL)
                 sub_side_sizer.Add(radio_0, 1, wx.ALL, 5)
                 sub_side_sizer.Add(radio_1, 1, wx.ALL, 5)
@@ -740,16 +1271,22 @@ class Gui(wx.Frame):
         Re-initialise the window with new logic file
         without having to re-draw or close window
         """
+        self.stop_simulation()
+        # keep the settings given on the command line
+        network.set_compiled(self.network.compiled)
+        monitors.set_pruning(self.monitors.prune)
+        # close the trace file of the previous network
+        self.monitors.stop_disk_recording()
         self.path = path
         self.names = names
         self.devices = devices
         self.network = network
         self.monitors = monitors
-
-        # Pass True so that clocks and dtypes are initialised
-        self.run_network(True, self.num_cycles)
-        self.update_canvas_monitors()
-        self.canvas.grid_big_value = self.num_cycles / 5
+        self.monitors.start_disk_recording()
+        self.signal_buffers = {}
+        # the stimulus and watches refer to the previous network
+        self.stimulus = None
+        self.watchpoints = Watchpoints(names, devices)
 
         self.scrolled_panel.Destroy()
 
@@ -757,6 +1294,9 @@ class Gui(wx.Frame):
 
         self.side_sizer_monitor.Layout()  # Draw sizer again to show new output
 
+        # Pass True so that clocks and dtypes are initialised
+        self.start_simulation(True, self.num_cycles)
+
     def on_menu(self, event):
         """
         Handle the event when the user selects a menu item.
@@ -765,6 +1305,19 @@ class Gui(wx.Frame):
         Id = event.GetId()
         if Id == wx.FD_OPEN:
             self.load_file(None)
+        elif Id == self.stimulus_menu_id:
+            self.load_stimulus(None)
+        elif Id == self.watch_menu_id:
+            self.add_watch(self.watchpoints.WATCH)
+        elif Id == self.break_menu_id:
+            self.add_watch(self.watchpoints.BREAK)
+        elif Id == self.assert_menu_id:
+            self.add_watch(self.watchpoints.ASSERT)
+        elif Id == self.watch_hits_menu_id:
+            self.show_watch_hits()
+        elif Id == self.clear_watch_menu_id:
+            self.watchpoints.clear()
+            self.monitors.set_observed_signals([])
         elif Id == wx.ID_EXIT:
             self.Close(True)
         elif Id == wx.ID_ABOUT:
@@ -788,35 +1341,140 @@ class Gui(wx.Frame):
             if path[-4:] == '.txt':
                 # Initialise instances
                 names = Names()
-                devices = Devices(names)
+                # keep the seed chosen on the command line
+                devices = Devices(names, self.devices.seed)
                 network = Network(names, devices)
                 monitors = Monitors(names, devices, network)
                 scanner = Scanner(path, names)
-                parser = Parser(names, devices, network, monitors, scanner)
+                parser = Parser(names, devices, network, monitors, scanner,
+                                print_errors=False)
 
                 if parser.parse_network():
                     self.reset(path, names, devices, network, monitors)
                 else:
-                    wx.MessageBox(
+                    # Show the first few errors found by the parser
+                    msg = "\n\n".join([
                         _("Error: Invalid logic circuit definition file"),
+                        parser.diagnostics.render(limit=5)])
+                    wx.MessageBox(
+                        msg,
                         _("Error"),
                         wx.ICON_INFORMATION | wx.OK)
         open_file_dialog.Destroy()
 
+    def load_stimulus(self, event):
+        """
+        Open a file dialog window to allow the user to select a stimulus
+        file, whose switch changes are applied from the next run
+        """
+        open_file_dialog = wx.FileDialog(self, _("Load Stimulus"), "", "",
+                                         "Text files (*.txt)|*.txt",
+                                         wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
+        open_file_dialog.ShowModal()
+        path = open_file_dialog.GetPath()
+
+        if path:
+            stimulus = Stimulus(self.names, self.devices)
+            error_list = stimulus.load_file(path)
+            if error_list:
+                # Show the first few errors found in the file
+                msg = "\n\n".join(
+                    [_("Error: Invalid stimulus file")] + error_list[:5])
+                wx.MessageBox(
+                    msg,
+                    _("Error"),
+                    wx.ICON_INFORMATION | wx.OK)
+            else:
+                self.stimulus = stimulus
+        open_file_dialog.Destroy()
+
+    def update_radiobuttons(self):
+        """
+        Set the switch radio buttons to the switch levels, which a stimulus
+        may have changed during a run
+        """
+        for radio_0, radio_1 in self.radiobutton_list:
+            [device_id, output_id] = self.devices.get_signal_ids(radio_0.name)
+            device = self.devices.get_device(device_id)
+            if device.outputs[output_id] == self.devices.HIGH:
+                radio_1.SetValue(True)
+            else:
+                radio_0.SetValue(True)
+
+    def add_watch(self, kind):
+        """
+        Ask the user for a condition on the signals, such as
+        d1.Q == HIGH and n1 == LOW, and check it after every cycle
+        """
+        if self.worker is not None:
+            return  # the worker thread is checking the watchpoints
+        watch_dialog = wx.TextEntryDialog(
+            self, _("Condition, e.g. d1.Q == HIGH and n1 == LOW"),
+            _("Add Watch"))
+        if watch_dialog.ShowModal() == wx.ID_OK:
+            error = self.watchpoints.add_watch(watch_dialog.GetValue(), kind)
+            if error is not None:
+                wx.MessageBox(_("Error: ") + error, _("Error"),
+                              wx.ICON_INFORMATION | wx.OK)
+            else:
+                self.monitors.set_observed_signals(
+                    self.watchpoints.get_signals())
+        watch_dialog.Destroy()
+
+    def show_watch_hits(self):
+        """
+        Show the cycles where each watch, break and assertion hit
+        """
+        report = self.watchpoints.get_report()
+        wx.MessageBox("\n".join(report) if report else _("No watches"),
+                      _("Watch Hits"), wx.ICON_INFORMATION | wx.OK)
+
+    def show_cursor_readout(self, position):
+        """
+        Show the signal level under the mouse and the edges either side of
+        it in the status bar. position is [index, cycle] of the monitored
+        device and the cycle, or None to clear the status bar
+        """
+        monitor_list = list(self.monitors.monitors_dictionary)
+        if position is None or position[0] >= len(monitor_list):
+            self.SetStatusText("")
+            return
+        [index, cycle] = position
+        [device_id, output_id] = monitor_list[index]
+        edge_trace = self.monitors.get_edge_trace(device_id, output_id)
+        signal = edge_trace.get_signal(cycle)
+        if signal is None:
+            self.SetStatusText("")
+            return
+        previous_edge = edge_trace.get_previous_edge(cycle)
+        next_edge = edge_trace.get_next_edge(cycle)
+        self.SetStatusText(
+            _("{} at cycle {}: {}    previous edge: {}    next edge: {}    "
+              "rising edges so far: {}").format(
+                self.devices.get_signal_name(device_id, output_id), cycle,
+                self.level_strings[signal],
+                "-" if previous_edge is None else previous_edge,
+                "-" if next_edge is None else next_edge,
+                edge_trace.count_edges(self.devices.RISING, 0, cycle + 1)))
+
     def on_run_button(self, event):
         """
         Handle the event when the user clicks the run button:
         -Update the values assigned to grid markers (update x axis)
-        -Then re-run simulation
+        -Then re-run simulation in the background
         """
         spin_value = self.spin.GetValue()
-        # since there are 5 big subdivisions in the grid
-        self.canvas.grid_big_value = spin_value / 5
-        self.monitors.reset_monitors()
-        self.run_network(True, spin_value)
-        self.update_canvas_monitors()
-        self.num_cycles = spin_value  # update num_cycles
-        self.canvas.render()  # Display new output
+        self.start_simulation(True, spin_value)
+
+    def on_scroll(self, event):
+        """
+        Handle the event when the user moves the scrollbar. The thumb at
+        the bottom shows the first monitored device in the bottom panel
+        """
+        max_first_panel = self.scrollbar.GetRange() - \
+            self.scrollbar.GetThumbSize()
+        self.canvas.scroll_panels(
+            max_first_panel - self.scrollbar.GetThumbPosition())
 
     def on_continue_button(self, event):
         """
@@ -827,13 +1485,8 @@ class Gui(wx.Frame):
         """
         spin_value = self.spin.GetValue()
         if spin_value + self.num_cycles <= self.num_cycles_max:
-            # add these cycles to the present number of cycles
-            self.canvas.grid_big_value = (self.num_cycles + spin_value) / 5
             # don't restart clocks and dtypes
-            self.run_network(False, spin_value)
-            self.update_canvas_monitors()
-            self.num_cycles = self.num_cycles + spin_value  # update num_cycles
-            self.canvas.render()  # Display new output
+            self.start_simulation(False, spin_value)
         else:
             msg = _('Error: Cannot run for more than a total'
                     ' of {} cycles').format(self.num_cycles_max)
@@ -842,57 +1495,292 @@ class Gui(wx.Frame):
                 _("Error"),
                 wx.ICON_INFORMATION | wx.OK)
 
-    def run_network(self, restart, num_cycles):
+    def on_cancel_button(self, event):
+        """
+        Handle the event when the user cancels a running simulation.
+        The cycles already simulated are kept
+        """
+        self.cancel_event.set()
+
+    def on_close(self, event):
+        """
+        Stop the simulation before the window is destroyed
+        """
+        self.stop_simulation()
+        self.monitors.stop_disk_recording()
+        event.Skip()
+
+    def on_time_scroll(self, event):
+        """
+        Handle the event when the user scrolls through time. The signals in
+        the new window are read from disk
+        """
+        self.window_start = self.time_scrollbar.GetThumbPosition()
+        self.update_canvas_monitors()
+        self.canvas.request_redraw()  # Display new output
+
+    def show_latest_window(self):
+        """
+        Move the window so that it ends at the last cycle recorded
+        """
+        self.window_start = self.monitors.get_cycles_recorded() - \
+            self.window_cycles_max
+
+    def update_time_scrollbar(self):
+        """
+        Update the time scrollbar to the window shown
+        """
+        if self.time_scrollbar is None:
+            return
+        view_cycles = max(self.view_cycles,
+                          self.monitors.get_cycles_recorded(), 1)
+        window_cycles = min(view_cycles, self.window_cycles_max)
+        self.time_scrollbar.SetScrollbar(self.window_start, window_cycles,
+                                         view_cycles, window_cycles)
+
+    def start_simulation(self, restart, num_cycles):
+        """
+        Run the network for a given number of cycles on a worker thread so
+        that the window stays responsive. The gauge shows the progress and
+        the canvas is redrawn as cycles are recorded
+        """
+        self.stop_simulation()
+        if restart:
+            self.monitors.reset_monitors()
+            self.watchpoints.reset_hits()
+            self.signal_buffers = {}
+            self.num_cycles = 0
+        self.watchpoints.stop = None
+        self.run_first_cycle = self.num_cycles
+        self.view_cycles = self.num_cycles + num_cycles
+        self.gauge.SetRange(max(num_cycles, 1))
+        self.gauge.SetValue(0)
+        self.set_running(True)
+
+        self.cancel_event.clear()
+        self.worker = threading.Thread(target=self.simulation_worker,
+                                       args=(restart, num_cycles))
+        self.worker.daemon = True
+        self.worker.start()
+
+    def stop_simulation(self):
+        """
+        Cancel the simulation running on the worker thread, if any, and
+        wait for it to finish. Results it still posts are ignored
+        """
+        if self.worker is None:
+            return
+        self.cancel_event.set()
+        self.worker.join()
+        self.worker = None
+        self.set_running(False)
+
+    def simulation_worker(self, restart, num_cycles):
+        """
+        Run the network on the worker thread. The window is only updated
+        through wx.CallAfter, which runs the update on the main thread
+        """
+        worker = threading.current_thread()
+
+        def progress(cycles_run):
+            wx.CallAfter(self.on_simulation_progress, worker, cycles_run)
+
+        [cycles_run, oscillating_cycles] = self.run_network(
+            restart, num_cycles, progress, self.cancel_event)
+        wx.CallAfter(self.on_simulation_done, worker, cycles_run,
+                     oscillating_cycles)
+
+    def on_simulation_progress(self, worker, cycles_run):
+        """
+        Show the cycles recorded so far while the simulation runs
+        """
+        if worker is not self.worker:
+            return  # result of a cancelled run
+        self.gauge.SetValue(cycles_run)
+        self.show_latest_window()
+        self.update_canvas_monitors()
+        self.canvas.request_redraw()  # Display new output
+
+    def on_simulation_done(self, worker, cycles_run, oscillating_cycles):
+        """
+        Show the output of a finished or cancelled simulation and report
+        oscillation once for the whole run
+        """
+        if worker is not self.worker:
+            return  # result of a cancelled run
+        self.worker = None
+        self.set_running(False)
+        # oscillating cycles are not recorded
+        self.num_cycles = self.monitors.get_cycles_recorded()
+        self.view_cycles = self.num_cycles
+        self.show_latest_window()
+        self.update_canvas_monitors()
+        if self.stimulus is not None:
+            self.update_radiobuttons()
+        self.canvas.render()  # Display new output
+        self.report_oscillation(oscillating_cycles, cycles_run)
+        self.report_watch_stop()
+
+    def set_running(self, running):
+        """
+        Enable the Cancel button while a simulation runs and disable the
+        controls that would change the network, the stimulus, the watches
+        or the traces the worker thread is recording
+        """
+        self.cancel_button.Enable(running)
+        self.run_button.Enable(not running)
+        self.continue_button.Enable(not running)
+        self.spin.Enable(not running)
+        self.scrolled_panel.Enable(not running)
+        self.time_scrollbar.Enable(not running)
+        menu_bar = self.GetMenuBar()
+        for menu_id in [self.stimulus_menu_id, self.watch_menu_id,
+                        self.break_menu_id, self.assert_menu_id,
+                        self.clear_watch_menu_id]:
+            menu_bar.Enable(menu_id, not running)
+        if not running:
+            self.gauge.SetValue(0)
+
+    def report_oscillation(self, oscillating_cycles, cycles_run):
+        """
+        Tell the user how many cycles failed to settle, if any
+        """
+        if oscillating_cycles:
+            msg = _("Error: Network oscillating in {} of {} cycles").format(
+                oscillating_cycles, cycles_run)
+            wx.MessageBox(msg, _("Error"), wx.ICON_INFORMATION | wx.OK)
+
+    def report_watch_stop(self):
+        """
+        Tell the user which break or assertion stopped the run, if any
+        """
+        if self.watchpoints.stop is not None:
+            [watchpoint, cycle] = self.watchpoints.stop
+            if watchpoint.kind == self.watchpoints.ASSERT:
+                msg = _("Assertion failed at cycle {}: {}")
+            else:
+                msg = _("Stopped at cycle {}: {}")
+            wx.MessageBox(msg.format(cycle, watchpoint.expression),
+                          _("Watch"), wx.ICON_INFORMATION | wx.OK)
+
+    def run_network(self, restart, num_cycles, progress=None,
+                    cancel_event=None):
         """
         Run the network for a given number of cycles.
-        If required, re-start dtypes and clocks before doing so
+        If required, re-start dtypes and clocks before doing so.
+        Return [cycles_run, oscillating_cycles]. If given, progress is
+        called with the number of cycles run every progress_interval
+        seconds, and the run stops early once cancel_event is set. Switch
+        changes in the stimulus, if one is loaded, are applied before the
+        cycles they are scheduled at, and the run stops after a cycle where
+        a break hits or an assertion fails
         """
         if restart:
             self.devices.cold_startup()
-        for _ in range(num_cycles):
+        cycles_run = 0
+        oscillating_cycles = 0
+        last_progress = time.perf_counter()
+        for index in range(num_cycles):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if self.stimulus is not None:
+                self.stimulus.apply(self.run_first_cycle + index)
             if self.network.execute_network():
                 self.monitors.record_signals()
+                if self.watchpoints.check(self.run_first_cycle + index):
+                    cycles_run += 1
+                    break
             else:
-                wx.MessageBox(_("Error: Network oscillating"), _(
-                    "Error"), wx.ICON_INFORMATION | wx.OK)
+                oscillating_cycles += 1
+            cycles_run += 1
+            if progress is not None and \
+                    time.perf_counter() - last_progress > \
+                    self.progress_interval:
+                progress(cycles_run)
+                last_progress = time.perf_counter()
+        return [cycles_run, oscillating_cycles]
 
     def update_canvas_monitors(self):
         """
         List out monitored devices and their properties from scratch,
         update canvas monitors
+        Only the window of cycles starting at window_start is read, and
+        the windows either side of it are prefetched. Cycles already
+        translated are kept, also when the window slides forward as a
+        long run progresses, so only new cycles are appended
         """
+        view_cycles = max(self.view_cycles,
+                          self.monitors.get_cycles_recorded(), 1)
+        window_cycles = min(view_cycles, self.window_cycles_max)
+        self.window_start = min(max(self.window_start, 0),
+                                view_cycles - window_cycles)
+        window_end = self.window_start + window_cycles
+
         self.canvas.devices_monitored.clear()
+        signal_buffers = {}
         for device_id, output_id in self.monitors.monitors_dictionary:
             device_name = self.devices.get_signal_name(device_id, output_id)
             device_type = self.translate_device_kind(
                 self.devices.get_device(device_id).device_kind)
-            signal_list = self.monitors.monitors_dictionary[
-                (device_id, output_id)]
-            device_signal = self.translate_signal(signal_list)
+
+            [buffer_start, signal_array, length] = self.signal_buffers.get(
+                (device_id, output_id), [None, None, 0])
+            if buffer_start is None or \
+                    not buffer_start <= self.window_start < \
+                    buffer_start + length:  # no cycles to keep
+                signal_array = np.empty(window_cycles, dtype=np.float32)
+                length = 0
+            elif buffer_start != self.window_start:  # window slid forward
+                shift = self.window_start - buffer_start
+                length -= shift
+                signal_array[:length] = signal_array[shift:shift + length]
+            signal_list = self.monitors.get_signal_window(
+                device_id, output_id, self.window_start + length, window_end)
+            if length + len(signal_list) > len(signal_array):
+                signal_array = np.resize(signal_array, max(
+                    2 * len(signal_array), length + len(signal_list)))
+            signal_array[length:length + len(signal_list)] = \
+                self.translate_signal(signal_list)
+            length += len(signal_list)
+            signal_buffers[(device_id, output_id)] = [
+                self.window_start, signal_array, length]
+
             self.canvas.devices_monitored.append(
-                [device_type, device_name, device_signal])
+                [device_type, device_name, signal_array[:length]])
+        self.signal_buffers = signal_buffers
+
+        # There are 5 big intervals on the grid
+        self.canvas.grid_big_value = window_cycles / 5
+        self.canvas.grid_first_value = self.window_start
+        self.monitors.prefetch_window(self.window_start - window_cycles,
+                                      self.window_start)
+        self.monitors.prefetch_window(window_end, window_end + window_cycles)
+        self.update_time_scrollbar()
+        self.canvas.update_traces()
 
     def translate_signal(self, signal_list):
         """
         Convert from format in devices class to custom gui format
+        The whole list is converted at once through a lookup table indexed
+        by the signal constants, returning a float32 array
         """
-        device_signal = []
-        for signal in signal_list:
-            if signal == self.devices.HIGH:
-                device_signal.append(1)
-            elif signal == self.devices.LOW:
-                device_signal.append(0)
-            elif signal == self.devices.RISING:
-                device_signal.append(0.5)
-            elif signal == self.devices.FALLING:
-                device_signal.append(-0.5)
-            elif signal == self.devices.BLANK:
-                device_signal.append(2)
-            else:  # report an error
-                device_signal.append(2)
-                wx.MessageBox(_('Error: Corrupt signal value'),
-                              _("Error"), wx.ICON_INFORMATION | wx.OK)
-        return device_signal
+        # gui value of each signal constant, unknown signals are blank
+        signal_lookup = np.full(len(self.devices.signal_types), 2,
+                                dtype=np.float32)
+        signal_lookup[self.devices.HIGH] = 1
+        signal_lookup[self.devices.LOW] = 0
+        signal_lookup[self.devices.RISING] = 0.5
+        signal_lookup[self.devices.FALLING] = -0.5
+        signal_lookup[self.devices.BLANK] = 2
+
+        signal_array = np.asarray(signal_list, dtype=np.intp)
+        corrupt = (signal_array < 0) | (signal_array >= len(signal_lookup))
+        if corrupt.any():  # report an error
+            signal_array = np.where(corrupt, self.devices.BLANK,
+                                    signal_array)
+            wx.MessageBox(_('Error: Corrupt signal value'),
+                          _("Error"), wx.ICON_INFORMATION | wx.OK)
+        return signal_lookup[signal_array]
 
     def translate_device_kind(self, device_kind):
         """
@@ -932,9 +1820,8 @@ class Gui(wx.Frame):
         value = event.GetEventObject().GetValue()
         if value:
             [device_id, output_id] = self.devices.get_signal_ids(device_name)
-            self.monitors.make_monitor(device_id, output_id, 0)
-            self.monitors.reset_monitors()
-            self.run_network(True, self.num_cycles)
+            # the history of the output is taken from the shadow record
+            self.monitors.make_monitor(device_id, output_id, self.num_cycles)
             self.update_canvas_monitors()
             self.canvas.render()  # Display new output
         else:
@@ -942,6 +1829,7 @@ class Gui(wx.Frame):
                 if device[1] == device_name:
                     self.canvas.devices_monitored.pop(
                         index)  # remove from canvas monitors
+                    self.canvas.update_traces()
                     [device_id, output_id] = self.devices.get_signal_ids(
                         device_name)
                     # remove from local monitor instance
@@ -8,9 +8,17 @@ Usage
 -----
 Show help: logsim.py -h
 Command line user interface: logsim.py -c <file path>
+Reproducible start-up: logsim.py --seed <integer> ...
+Scheduled switch changes: logsim.py --stimulus <stimulus path> ...
+Simplify the network first: logsim.py --optimise ...
+Only simulate what the monitors need: logsim.py --prune -c <file path>
+    (oscillations in the rest of the network are not reported)
+Simulate with generated code: logsim.py --compile ...
+Command script: logsim.py -s <script path, or - for stdin> -c <file path>
 Graphical user interface: logsim.py <file path>
 """
 import getopt
+import random
 import sys
 import os
 
@@ -23,22 +31,68 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
+from stimulus import Stimulus
+from optimise import Optimiser
 from userint import UserInterface
 from gui import Gui
 
 
+def load_stimulus(path, names, devices):
+    """Return the stimulus.Stimulus() read from path, or None if no path.
+
+    Print the errors and exit if the stimulus file is not valid.
+    """
+    if path is None:
+        return None
+    stimulus = Stimulus(names, devices)
+    error_list = stimulus.load_file(path)
+    if error_list:
+        for error in error_list:
+            print("Error: " + error)
+        sys.exit(1)
+    return stimulus
+
+
+def optimise_network(names, devices, network, stream=None):
+    """Simplify the network and print the number of gates removed.
+
+    Switches are not treated as constant, as they can be set while the
+    simulator runs. The message is written to stream (default standard
+    output).
+    """
+    optimiser = Optimiser(names, devices, network)
+    count_dictionary = optimiser.optimise()
+    print("Optimised network: {} gates removed.".format(
+        sum(count_dictionary.values())), file=stream)
+
+
 def main(arg_list):
     """Parse the command line options and arguments specified in arg_list.
 
     Run either the command line user interface, the graphical user interface,
     or display the usage message.
     """
-    usage_message = ("Usage:\n"
-                    "Show help: logsim.py -h\n"
-                    "Command line user interface: logsim.py -c <file path> [lang=<language code>]\n"
-                    "Graphical user interface: logsim.py <file path> [lang=<language code>]")
+    usage_message = (
+        "Usage:\n"
+        "Show help: logsim.py -h\n"
+        "Command line user interface: "
+        "logsim.py -c <file path> [lang=<language code>]\n"
+        "Command script: "
+        "logsim.py -s <script path, or - for stdin> -c <file path>\n"
+        "Reproducible start-up: logsim.py --seed <integer> ...\n"
+        "Scheduled switch changes: "
+        "logsim.py --stimulus <stimulus path> ...\n"
+        "Simplify the network first: logsim.py --optimise ...\n"
+        "Only simulate what the monitors need: "
+        "logsim.py --prune -c <file path>\n"
+        "    (oscillations in the rest of the network are not reported)\n"
+        "Simulate with generated code: logsim.py --compile ...\n"
+        "Graphical user interface: "
+        "logsim.py <file path> [lang=<language code>]")
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
+        options, arguments = getopt.getopt(
+            arg_list, "hc:s:",
+            ["seed=", "stimulus=", "optimise", "prune", "compile"])
     except getopt.GetoptError:
         print("Error: Invalid command line arguments.\n")
         print(usage_message)
@@ -46,11 +100,56 @@ def main(arg_list):
 
     # Initialise instances of the four inner simulator classes
     names = Names()
-    devices = Devices(names)
+    # a random seed is chosen and printed unless one is given, so every run
+    # can be reproduced with --seed
+    devices = Devices(names, random.randrange(1 << 31))
     network = Network(names, devices)
     monitors = Monitors(names, devices, network)
 
 
+    # commands are read from a script instead of the user, if given
+    script_path = None
+    # switch changes applied while the simulation runs, if given
+    stimulus_path = None
+    # gates are removed before the simulation starts, if given
+    optimise = False
+    # only the devices that the monitors depend on are simulated, if given
+    prune = False
+    for option, path in options:
+        if option == "-s":
+            script_path = path
+        elif option == "--stimulus":
+            stimulus_path = path
+        elif option == "--optimise":
+            optimise = True
+        elif option == "--prune":
+            prune = True
+        elif option == "--compile":  # generate a function for the network
+            network.set_compiled(True)
+        elif option == "--seed":  # make the clock and D-type start-up
+            try:                  # state reproducible
+                devices.set_seed(int(path))
+            except ValueError:
+                print("Error: The seed must be an integer.\n")
+                print(usage_message)
+                sys.exit()
+
+    # the graphical user interface records every output, so every device
+    # is simulated
+    if prune and "-c" not in [option for option, path in options] and \
+            "-h" not in [option for option, path in options]:
+        print("Error: --prune needs -c <file path>.\n")
+        print(usage_message)
+        sys.exit()
+
+    # a script is only run by the command line user interface
+    if script_path is not None and \
+            "-c" not in [option for option, path in options] and \
+            "-h" not in [option for option, path in options]:
+        print("Error: A command script needs -c <file path>.\n")
+        print(usage_message)
+        sys.exit()
+
     for option, path in options:
         if option == "-h":  # print the usage message
             print(usage_message)
@@ -59,11 +158,37 @@ def main(arg_list):
             scanner = Scanner(path, names)
             parser = Parser(names, devices, network, monitors, scanner)
             if parser.parse_network():
+                # a script writes only JSON lines to standard output
+                info_stream = sys.stdout if script_path is None \
+                    else sys.stderr
+                print("Start-up seed: {}".format(devices.seed),
+                      file=info_stream)
+                if optimise:
+                    optimise_network(names, devices, network, info_stream)
+                monitors.set_pruning(prune)
                 # Initialise an instance of the userint.UserInterface() class
                 userint = UserInterface(names, devices, network, monitors)
-                userint.command_interface()
+                userint.stimulus = load_stimulus(stimulus_path, names,
+                                                 devices)
+                if script_path is None:
+                    userint.command_interface()
+                elif script_path == "-":
+                    if not userint.command_script(sys.stdin):
+                        sys.exit(1)
+                else:
+                    try:
+                        script = open(script_path)
+                    except OSError:
+                        print("Error: Cannot open command script.")
+                        sys.exit(1)
+                    with script:
+                        if not userint.command_script(script):
+                            sys.exit(1)
+            elif script_path is not None:
+                sys.exit(1)  # the script cannot run on an invalid network
 
-    if not options:  # no option given, use the graphical user interface
+    # no -c option given, use the graphical user interface
+    if "-c" not in [option for option, path in options]:
 
         if len(arguments) != 1:  # wrong number of arguments
             print("Error: One file path required.\n")
@@ -75,6 +200,10 @@ def main(arg_list):
         parser = Parser(names, devices, network, monitors, scanner)
         
         if parser.parse_network():
+            print("Start-up seed: {}".format(devices.seed))
+            if optimise:
+                optimise_network(names, devices, network)
+            stimulus = load_stimulus(stimulus_path, names, devices)
             # Initialise an instance of the gui.Gui() class
             app = wx.App()
             # Set app to be in system language (or default to English)
@@ -89,7 +218,7 @@ def main(arg_list):
             lang.install()
             # Initialise GUI
             gui = Gui("Logic Simulator", path, names, devices, network,
-                      monitors)
+                      monitors, stimulus)
             gui.Show(True)
             app.MainLoop()
 
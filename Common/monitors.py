@@ -9,6 +9,11 @@ Monitors - records and displays specified output signals.
 
 """
 import collections
+import re
+import sys
+
+from optimise import Optimiser
+from traces import ChangeTrace, EdgeTrace, FileEdgeTrace, TraceFile
 
 
 class Monitors:
@@ -26,8 +31,8 @@ class Monitors:
 
     Public methods
     --------------
-    make_monitor(self, device_id, output_id): Sets a specified monitor on the
-                                              specified output.
+    make_monitor(self, device_id, output_id, cycles_completed=0): Sets a
+                                specified monitor on the specified output.
 
     remove_monitor(self, device_id, output_id): Removes a monitor from the
                                                 specified output.
@@ -44,7 +49,41 @@ class Monitors:
 
     get_margin(self): Returns the length of the longest monitor's name.
 
-    display_signals(self): Displays signal trace(s) in the text console.
+    get_signal_text(self, device_id, output_id, start=0, end=None): Returns
+                    the signal trace of a monitor as text.
+
+    display_signals(self, start=0, end=None, width=None, compress=None,
+                    stream=None): Displays signal trace(s) in the text
+                                  console.
+
+    start_shadow_recording(self): Records every output from now on, so
+                                  monitors can be added with their history.
+
+    stop_shadow_recording(self): Stops recording outputs that are not
+                                 monitored.
+
+    start_disk_recording(self, path=None): Records every output to a file
+                                           instead of memory from now on.
+
+    stop_disk_recording(self): Stops recording outputs to a file.
+
+    get_cycles_recorded(self): Returns the number of cycles recorded.
+
+    get_signal_window(self, device_id, output_id, start, end): Returns the
+                            recorded signal of a monitor over a range of
+                            cycles.
+
+    prefetch_window(self, start, end): Starts reading a range of cycles
+                                       from the file in the background.
+
+    get_edge_trace(self, device_id, output_id): Returns the edge index of a
+                                                monitor.
+
+    set_pruning(self, prune): Turns on or off simulating only the devices
+                              that the monitors depend on.
+
+    set_observed_signals(self, signal_list): Sets outputs that must be
+                                             simulated besides the monitors.
     """
 
     def __init__(self, names, devices, network):
@@ -57,6 +96,59 @@ class Monitors:
         # {(device_id, output_id): [signal_list]}
         self.monitors_dictionary = collections.OrderedDict()
 
+        # shadow_traces stores the history of every output while shadow
+        # recording is on, otherwise it is None
+        # {(device_id, output_id): ChangeTrace}
+        self.shadow_traces = None
+        # [(trace, device.outputs, output_id)] for fast recording
+        self.shadow_list = []
+
+        # trace_file stores the history of every output while disk
+        # recording is on, otherwise it is None
+        self.trace_file = None
+        # {(device_id, output_id): index of the signal in trace_file}
+        self.trace_file_index = {}
+        # [(device.outputs, output_id)] in trace_file order
+        self.trace_file_list = []
+
+        # edge_traces stores the signal of every monitor with an index of
+        # its edges, for fast queries. While disk recording is on, the edges
+        # are found in the file when they are asked for instead.
+        # {(device_id, output_id): EdgeTrace or FileEdgeTrace}
+        self.edge_traces = {}
+        # [(trace, device.outputs, output_id)] of the EdgeTrace objects, for
+        # fast recording
+        self.edge_list = []
+
+        # If prune is True, only the devices that the monitored and observed
+        # outputs depend on are simulated, unless every output is recorded
+        self.prune = False
+        # [(device_id, output_id)] read by other parts of the simulator, such
+        # as watchpoints
+        self.observed_signals = []
+        # D-types and devices on feedback loops that are not simulated while
+        # pruning. They keep a level, which is lost while they are skipped.
+        self.unsimulated_devices = set()
+        # True if unsimulated_devices must be added to stale_devices when
+        # the next cycle is recorded
+        self.mark_stale = False
+        # Devices whose level may be wrong as they were skipped for some
+        # cycles since the last reset, and monitors that depend on them,
+        # which record BLANK signals
+        self.stale_devices = set()
+        self.stale_monitors = set()
+        # {device_id: clock level of the previous cycle} for the stale
+        # D-types that are simulated again, which are correct again after a
+        # clock edge or a set or clear
+        self.resync_dtypes = {}
+
+        # character used for each signal level in the text console
+        self.signal_characters = {self.devices.HIGH: "-",
+                                  self.devices.LOW: "_",
+                                  self.devices.RISING: "/",
+                                  self.devices.FALLING: "\\",
+                                  self.devices.BLANK: " "}
+
         [self.NO_ERROR, self.NOT_OUTPUT,
          self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
 
@@ -75,12 +167,47 @@ class Monitors:
         else:
             # If n simulation cycles have been completed before making this
             # monitor, then initialise the signal trace with an n-length list
-            # of BLANK signals. Otherwise, initialise the trace with an empty
-            # list.
-            self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+            # of BLANK signals, or with the recorded history of the output if
+            # shadow recording is on. Otherwise, initialise the trace with an
+            # empty list.
+            signal_list = []
+            if self.trace_file is not None:
+                # the history is read from the file by get_signal_window
+                cycles_completed = 0
+            elif self.shadow_traces is not None and \
+                    (device_id, output_id) in self.shadow_traces:
+                signal_list = self.shadow_traces[
+                    (device_id, output_id)].to_list(0, cycles_completed)
+            self.monitors_dictionary[(device_id, output_id)] = \
+                [self.devices.BLANK] * (cycles_completed -
+                                        len(signal_list)) + signal_list
+
+            self._make_edge_trace(device_id, output_id)
+            self._update_pruning()
             return self.NO_ERROR
 
+    def _make_edge_trace(self, device_id, output_id):
+        """Index the edges of a monitor's history recorded so far."""
+        self._remove_edge_trace(device_id, output_id)
+        if self.trace_file is not None:
+            edge_trace = FileEdgeTrace(
+                self.devices, self.trace_file,
+                self.trace_file_index[(device_id, output_id)])
+        else:
+            edge_trace = EdgeTrace(self.devices)
+            edge_trace.extend(self.monitors_dictionary[(device_id,
+                                                        output_id)])
+            self.edge_list.append((edge_trace, self.devices.get_device(
+                device_id).outputs, output_id))
+        self.edge_traces[(device_id, output_id)] = edge_trace
+
+    def _remove_edge_trace(self, device_id, output_id):
+        """Delete the edge index of a monitor, if it has one."""
+        edge_trace = self.edge_traces.pop((device_id, output_id), None)
+        if edge_trace is not None:
+            self.edge_list = [edge for edge in self.edge_list
+                              if edge[0] is not edge_trace]
+
     def remove_monitor(self, device_id, output_id):
         """Remove the specified signal from the monitors dictionary.
 
@@ -90,6 +217,8 @@ class Monitors:
             return False
         else:
             del self.monitors_dictionary[(device_id, output_id)]
+            self._remove_edge_trace(device_id, output_id)
+            self._update_pruning()
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -105,12 +234,52 @@ class Monitors:
     def record_signals(self):
         """Record the current signal level for every monitor.
 
-        This function is called at every simulation cycle.
+        This function is called at every simulation cycle. While disk
+        recording is on, the signals are only stored in the file. Monitors
+        that depend on a device that was not simulated record BLANK signals.
         """
+        if self.mark_stale:
+            self.mark_stale = False
+            self._set_stale_devices(self.stale_devices |
+                                    self.unsimulated_devices)
+        if self.resync_dtypes:
+            self._resync_dtypes()
+        if self.stale_monitors:
+            self._record_stale_signals()
+            return
+        for trace, outputs, output_id in self.edge_list:
+            trace.append(outputs[output_id])
+        if self.trace_file is not None:
+            self.trace_file.append([outputs[output_id] for outputs, output_id
+                                    in self.trace_file_list])
+            return
         for device_id, output_id in self.monitors_dictionary:
             signal_level = self.get_monitor_signal(device_id, output_id)
             self.monitors_dictionary[(device_id,
                                       output_id)].append(signal_level)
+        for trace, outputs, output_id in self.shadow_list:
+            trace.append(outputs[output_id])
+
+    def _record_stale_signals(self):
+        """Record the signals of the monitors, with BLANK for stale ones."""
+        if self.trace_file is not None:
+            self.trace_file.append([outputs[output_id] for outputs, output_id
+                                    in self.trace_file_list])
+            return
+        for (device_id, output_id), trace in self.edge_traces.items():
+            trace.append(self._get_recorded_signal(device_id, output_id))
+        for (device_id, output_id), signal_list in \
+                self.monitors_dictionary.items():
+            signal_list.append(self._get_recorded_signal(device_id,
+                                                         output_id))
+        for trace, outputs, output_id in self.shadow_list:
+            trace.append(outputs[output_id])
+
+    def _get_recorded_signal(self, device_id, output_id):
+        """Return the level to record for a monitor, BLANK if stale."""
+        if (device_id, output_id) in self.stale_monitors:
+            return self.devices.BLANK
+        return self.network.get_output_signal(device_id, output_id)
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -137,6 +306,15 @@ class Monitors:
         """
         for device_id, output_id in self.monitors_dictionary:
             self.monitors_dictionary[(device_id, output_id)] = []
+        for trace, outputs, output_id in self.shadow_list:
+            trace.clear()
+        for trace in self.edge_traces.values():
+            trace.clear()
+        if self.trace_file is not None:
+            self.trace_file.clear()
+        # a new run starts from cold start-up
+        self._set_stale_devices(set())
+        self.mark_stale = bool(self.unsimulated_devices)
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -155,23 +333,270 @@ class Monitors:
         else:
             return None
 
-    def display_signals(self):
-        """Display the signal trace(s) in the text console."""
+    def get_signal_text(self, device_id, output_id, start=0, end=None):
+        """Return the signal trace of a monitor as text.
+
+        Each cycle from start to end (end excluded, default the last cycle
+        recorded) is one character. Return None if the monitor does not
+        exist.
+        """
+        if end is None:
+            end = self.get_cycles_recorded()
+        signal_list = self.get_signal_window(device_id, output_id, start, end)
+        if signal_list is None:
+            return None
+        return "".join([self.signal_characters.get(signal, "")
+                        for signal in signal_list])
+
+    def display_signals(self, start=0, end=None, width=None, compress=None,
+                        stream=None):
+        """Display the signal trace(s) in the text console.
+
+        Only cycles start to end are shown (end excluded, default the last
+        cycle recorded). If width is given, lines are wrapped to width
+        characters. If compress is given, runs of more than compress equal
+        characters are shown as the character, 'x' and the run length, for
+        example '_x500'. The text is written to stream (default standard
+        output) in one call.
+        """
+        if stream is None:
+            stream = sys.stdout
         margin = self.get_margin()
+        name_list = []
+        text_list = []
         for device_id, output_id in self.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
-            name_length = len(monitor_name)
-            signal_list = self.monitors_dictionary[(device_id, output_id)]
-            print(monitor_name + (margin - name_length) * " ", end=": ")
-            for signal in signal_list:
-                if signal == self.devices.HIGH:
-                    print("-", end="")
-                if signal == self.devices.LOW:
-                    print("_", end="")
-                if signal == self.devices.RISING:
-                    print("/", end="")
-                if signal == self.devices.FALLING:
-                    print("\\", end="")
-                if signal == self.devices.BLANK:
-                    print(" ", end="")
-            print("\n", end="")
+            name_list.append(monitor_name + (margin - len(monitor_name)) * " "
+                             + ": ")
+            text = self.get_signal_text(device_id, output_id, start, end)
+            if compress is not None:
+                text = re.sub(r"(.)\1{%d,}" % compress,
+                              lambda run: "{}x{}".format(run.group(1),
+                                                         len(run.group(0))),
+                              text)
+            text_list.append(text)
+
+        if width is None or not text_list:
+            line_list = [name + text for name, text in zip(name_list,
+                                                           text_list)]
+        elif compress is None:
+            # Wrap in blocks of cycles, so that the traces stay lined up
+            trace_width = max(width - margin - 2, 1)
+            longest = max(len(text) for text in text_list)
+            line_list = []
+            for offset in range(0, max(longest, 1), trace_width):
+                if offset:
+                    line_list.append("")  # blank line between blocks
+                line_list.extend([name + text[offset:offset + trace_width]
+                                  for name, text in zip(name_list,
+                                                        text_list)])
+        else:
+            # Compressed traces are not lined up, wrap each one without
+            # splitting runs
+            trace_width = max(width - margin - 2, 1)
+            line_list = []
+            for name, text in zip(name_list, text_list):
+                line = name
+                for token in re.findall(r".x\d+|.", text):
+                    if len(line) + len(token) > len(name) + trace_width and \
+                            len(line) > len(name):
+                        line_list.append(line)
+                        line = " " * len(name)
+                    line = line + token
+                line_list.append(line)
+
+        stream.write("".join([line + "\n" for line in line_list]))
+
+    def start_shadow_recording(self):
+        """Record every output of every device from now on.
+
+        The signals are stored as traces.ChangeTrace() objects, which only
+        keep the cycles at which a signal changes. A monitor made later on a
+        recorded output starts with the output's history instead of BLANK
+        signals, so no re-simulation is needed.
+        """
+        self.shadow_traces = {}
+        self.shadow_list = []
+        for device_id in self.devices.find_devices():
+            device = self.devices.get_device(device_id)
+            for output_id in device.outputs:
+                trace = ChangeTrace()
+                self.shadow_traces[(device_id, output_id)] = trace
+                self.shadow_list.append((trace, device.outputs, output_id))
+        self._update_pruning()
+
+    def stop_shadow_recording(self):
+        """Stop recording outputs and delete their history."""
+        self.shadow_traces = None
+        self.shadow_list = []
+        self._update_pruning()
+
+    def start_disk_recording(self, path=None):
+        """Record every output of every device to a file from now on.
+
+        The signals are stored in a traces.TraceFile() at path, or in a
+        temporary file if path is None, instead of in the monitors
+        dictionary, so long runs do not fill the memory. Monitors, including
+        ones made later, are read back a window at a time with
+        get_signal_window, and their edges are found in the file by
+        traces.FileEdgeTrace() objects.
+        """
+        self.stop_disk_recording()
+        self.trace_file_index = {}
+        self.trace_file_list = []
+        for device_id in self.devices.find_devices():
+            device = self.devices.get_device(device_id)
+            for output_id in device.outputs:
+                self.trace_file_index[(device_id, output_id)] = len(
+                    self.trace_file_list)
+                self.trace_file_list.append((device.outputs, output_id))
+        self.trace_file = TraceFile(len(self.trace_file_list), path)
+        for device_id, output_id in self.monitors_dictionary:
+            self._make_edge_trace(device_id, output_id)
+        self._update_pruning()
+
+    def stop_disk_recording(self):
+        """Stop recording outputs to a file and close the file."""
+        if self.trace_file is not None:
+            self.trace_file.close()
+        self.trace_file = None
+        self.trace_file_index = {}
+        self.trace_file_list = []
+        for device_id, output_id in self.monitors_dictionary:
+            self._make_edge_trace(device_id, output_id)
+        self._update_pruning()
+
+    def get_cycles_recorded(self):
+        """Return the number of cycles recorded since the last reset."""
+        if self.trace_file is not None:
+            return len(self.trace_file)
+        length_list = [len(signal_list) for signal_list
+                       in self.monitors_dictionary.values()]
+        return max(length_list, default=0)
+
+    def get_signal_window(self, device_id, output_id, start, end):
+        """Return the signal list of a monitor from cycle start to end.
+
+        end is excluded. Return None if the monitor does not exist.
+        """
+        if (device_id, output_id) not in self.monitors_dictionary:
+            return None
+        if (device_id, output_id) in self.trace_file_index:
+            return self.trace_file.get_signal(
+                self.trace_file_index[(device_id, output_id)], start, end)
+        return self.monitors_dictionary[(device_id, output_id)][
+            max(start, 0):max(end, 0)]
+
+    def prefetch_window(self, start, end):
+        """Start reading cycles start to end from the file in the background.
+
+        Does nothing unless disk recording is on.
+        """
+        if self.trace_file is not None:
+            self.trace_file.prefetch(start, end)
+
+    def get_edge_trace(self, device_id, output_id):
+        """Return the traces.EdgeTrace() of a monitor.
+
+        The edge trace holds every cycle recorded since the last reset, and
+        answers queries such as the cycle of the nth rising edge, the edges
+        in a range of cycles or the signal level at a cycle by binary search.
+        While disk recording is on, a traces.FileEdgeTrace() with the same
+        queries is returned instead. Return None if the monitor does not
+        exist.
+        """
+        return self.edge_traces.get((device_id, output_id))
+
+    def set_pruning(self, prune):
+        """Turn on or off simulating only what the monitors depend on.
+
+        While pruning is on, network.execute_network() only runs the devices
+        in the fan-in cone of the monitored and observed outputs, which is
+        found again whenever they change. The other devices keep their last
+        outputs, and oscillations among them are not detected. D-types and
+        devices on feedback loops outside the cone lose their levels, so a
+        monitor made later that depends on them records BLANK signals until
+        they are correct again: a D-type after a clock edge, set or clear
+        with correct inputs, a loop after the next reset. Every device is
+        simulated while shadow or disk recording is on, as every output is
+        recorded.
+        """
+        self.prune = prune
+        self._update_pruning()
+
+    def set_observed_signals(self, signal_list):
+        """Set the outputs that must be simulated besides the monitors.
+
+        signal_list is a list of (device ID, output ID) tuples, such as the
+        outputs read by watchpoints.
+        """
+        self.observed_signals = list(signal_list)
+        self._update_pruning()
+
+    def _update_pruning(self):
+        """Set the devices that the network simulates."""
+        if not self.prune or self.shadow_traces is not None or \
+                self.trace_file is not None:
+            self.network.set_active_devices(None)
+            self.unsimulated_devices = set()
+        else:
+            cone = self.network.get_simulation_cone(
+                list(self.monitors_dictionary) + self.observed_signals)
+            self.network.set_active_devices(cone)
+            [loop_devices, order] = Optimiser(
+                self.names, self.devices, self.network).find_loop_devices()
+            self.unsimulated_devices = set(
+                self.devices.find_devices(self.devices.D_TYPE)) | \
+                loop_devices
+            self.unsimulated_devices.difference_update(cone)
+        self.mark_stale = bool(self.unsimulated_devices)
+        self._set_stale_devices(self.stale_devices)
+
+    def _set_stale_devices(self, device_set):
+        """Set the stale devices and find the monitors that depend on them.
+
+        The stale D-types that are simulated are checked after every cycle
+        by _resync_dtypes().
+        """
+        self.stale_devices = device_set
+        self.stale_monitors = set()
+        if device_set:
+            for signal in self.monitors_dictionary:
+                if not device_set.isdisjoint(
+                        self.network.get_simulation_cone([signal])):
+                    self.stale_monitors.add(signal)
+        active_devices = self.network.active_devices
+        self.resync_dtypes = {
+            device_id: self.resync_dtypes.get(device_id)
+            for device_id in device_set
+            if self.devices.get_device(device_id).device_kind ==
+            self.devices.D_TYPE and
+            (active_devices is None or device_id in active_devices)}
+
+    def _resync_dtypes(self):
+        """Remove the D-types that are correct again from the stale devices.
+
+        A D-type is correct again once it is set or cleared, or clocked in a
+        cycle after the one it was first simulated in, by inputs that do not
+        depend on a stale device.
+        """
+        resynced = set()
+        for device_id, last_clock in self.resync_dtypes.items():
+            inputs = self.devices.get_device(device_id).inputs
+            clock = self.network.get_output_signal(
+                *inputs[self.devices.CLK_ID])
+            self.resync_dtypes[device_id] = clock
+            input_list = []
+            for input_id in [self.devices.SET_ID, self.devices.CLEAR_ID]:
+                if self.network.get_output_signal(*inputs[input_id]) == \
+                        self.devices.HIGH:
+                    input_list = [inputs[input_id]]
+            if not input_list and last_clock == self.devices.LOW and \
+                    clock == self.devices.HIGH:
+                input_list = [inputs[self.devices.CLK_ID],
+                              inputs[self.devices.DATA_ID]]
+            if input_list and self.stale_devices.isdisjoint(
+                    self.network.get_simulation_cone(input_list)):
+                resynced.add(device_id)
+        if resynced:
+            self._set_stale_devices(self.stale_devices - resynced)
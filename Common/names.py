@@ -44,6 +44,8 @@ class Names:
         """Initialise names list."""
         self.error_code_count = 0  # how many error codes have been declared
         self.name_table = []
+        # name_dictionary stores {name_string: name_id} for fast lookup
+        self.name_dictionary = {}
 
     def unique_error_codes(self, num_error_codes):
         """Return a list of unique integer error codes."""
@@ -58,13 +60,7 @@ class Names:
 
         If the name string is not present in the names list, return None.
         """
-        try:
-            name_id = self.name_table.index(name_string)
-        # Exception is raised if name_string not in the list
-        except ValueError:
-            return None
-        else:
-            return name_id
+        return self.name_dictionary.get(name_string)
 
     def lookup(self, name_string_list):
         """Return a list of name IDs for each name string in name_string_list.
@@ -94,4 +90,5 @@ class Names:
         """Add name_string to the name table."""
         name_id = len(self.name_table)
         self.name_table.append(name_string)
+        self.name_dictionary[name_string] = name_id
         return name_id
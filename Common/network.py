@@ -6,6 +6,7 @@ Classes
 --------
 Network - builds and executes the network.
 """
+from codegen import CodeGenerator
 
 
 class Network:
@@ -37,6 +38,40 @@ class Network:
 
     check_network(self): Checks if all inputs in the network are connected.
 
+    find_unconnected_inputs(self): Returns the names of all unconnected
+                                   inputs.
+
+    get_fanout(self, device_id, output_id): Returns the inputs connected to
+                                            the given output.
+
+    get_fanin(self, device_id): Returns the outputs connected to the inputs
+                                of the given device.
+
+    get_fanin_cone(self, signal_list): Returns the devices that the given
+                                       outputs transitively depend on.
+
+    get_fanout_cone(self, signal_list): Returns the devices that the given
+                                        outputs transitively drive.
+
+    reconnect_input(self, device_id, input_id, output): Connects an input to
+                                                        a different output.
+
+    get_simulation_cone(self, signal_list): Returns the devices that must be
+                                            executed for the given outputs
+                                            to be correct.
+
+    find_simulated_devices(self, device_kind): Returns the devices of a kind
+                                               that are executed each cycle.
+
+    set_active_devices(self, device_set): Sets the devices that are executed
+                                          each cycle.
+
+    set_compiled(self, compiled): Turns on or off simulating the network
+                                  with a compiled function.
+
+    update_derived_outputs(self): Copies the outputs of devices that are not
+                                  executed from their equivalent outputs.
+
     update_signal(self, signal, target): Updates the signal in the direction of
                                          the target.
 
@@ -70,6 +105,29 @@ class Network:
          self.INPUT_CONNECTED, self.PORT_ABSENT,
          self.DEVICE_ABSENT] = self.names.unique_error_codes(6)
         self.steady_state = True  # for checking if signals have settled
+        # number of inputs connected by make_connection
+        self.connected_input_count = 0
+
+        # fanout_dictionary stores
+        # {(output_device_id, output_id): [(input_device_id, input_id)]}
+        self.fanout_dictionary = {}
+
+        # Devices that execute_network skips, set by a netlist optimisation.
+        # Their outputs are either constant or listed in derived_outputs.
+        self.skipped_devices = set()
+        # derived_outputs stores
+        # [(device_id, output_id, source_device_id, source_output_id)]
+        # for outputs that are copies of another output
+        self.derived_outputs = []
+        # Devices that execute_network runs, or None to run all of them. Set
+        # to the cone of the observed outputs when pruning the network.
+        self.active_devices = None
+
+        # If compiled is True, execute_network calls compiled_cycle, a
+        # function generated for the whole network, which is generated again
+        # when the network changes
+        self.compiled = False
+        self.compiled_cycle = None
 
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
@@ -131,6 +189,11 @@ class Network:
                 # Make connection
                 first_device.inputs[first_port_id] = (second_device_id,
                                                       second_port_id)
+                self.connected_input_count += 1
+                self.compiled_cycle = None
+                self.fanout_dictionary.setdefault(
+                    (second_device_id, second_port_id), []).append(
+                        (first_device_id, first_port_id))
                 error_type = self.NO_ERROR
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
@@ -146,6 +209,11 @@ class Network:
                 else:
                     second_device.inputs[second_port_id] = (first_device_id,
                                                             first_port_id)
+                    self.connected_input_count += 1
+                    self.compiled_cycle = None
+                    self.fanout_dictionary.setdefault(
+                        (first_device_id, first_port_id), []).append(
+                            (second_device_id, second_port_id))
                     error_type = self.NO_ERROR
             else:
                 error_type = self.PORT_ABSENT
@@ -157,13 +225,163 @@ class Network:
 
     def check_network(self):
         """Return True if all inputs in the network are connected."""
-        for device_id in self.devices.find_devices():
+        return self.connected_input_count == self.devices.input_count
+
+    def find_unconnected_inputs(self):
+        """Return a list of the names of all unconnected inputs.
+
+        The names are of the form "device.port". Return an empty list if all
+        inputs in the network are connected.
+        """
+        unconnected_inputs = []
+        if self.check_network():
+            return unconnected_inputs
+        for device in self.devices.devices_list:
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is None:
+                    unconnected_inputs.append(self.devices.get_signal_name(
+                        device.device_id, input_id))
+        return unconnected_inputs
+
+    def get_fanout(self, device_id, output_id):
+        """Return the inputs connected to the given output.
+
+        The inputs are returned as a list of (device ID, input ID) tuples. The
+        list is empty if the output is unconnected or the IDs are invalid.
+        """
+        return list(self.fanout_dictionary.get((device_id, output_id), []))
+
+    def get_fanin(self, device_id):
+        """Return the outputs connected to the inputs of the given device.
+
+        The outputs are returned as a list of (device ID, output ID) tuples,
+        without duplicates. Unconnected inputs are skipped.
+        """
+        fanin = []
+        device = self.devices.get_device(device_id)
+        if device is not None:
+            for connected_output in device.inputs.values():
+                if (connected_output is not None and
+                        connected_output not in fanin):
+                    fanin.append(connected_output)
+        return fanin
+
+    def get_fanin_cone(self, signal_list):
+        """Return the devices that the given outputs transitively depend on.
+
+        signal_list is a list of (device ID, output ID) tuples. Return the set
+        of IDs of every device whose outputs can reach one of the given
+        outputs, including the devices of the given outputs themselves.
+        """
+        cone = set()
+        device_stack = [device_id for device_id, output_id in signal_list]
+        while device_stack:
+            device_id = device_stack.pop()
+            if device_id in cone:
+                continue
             device = self.devices.get_device(device_id)
-            for input_id in device.inputs:
-                if self.get_connected_output(device_id, input_id) is None:
-                    return False
+            if device is None:
+                continue
+            cone.add(device_id)
+            for connected_output in device.inputs.values():
+                if connected_output is not None:
+                    device_stack.append(connected_output[0])
+        return cone
+
+    def get_fanout_cone(self, signal_list):
+        """Return the devices that the given outputs transitively drive.
+
+        signal_list is a list of (device ID, output ID) tuples. Return the set
+        of IDs of every device that one of the given outputs can reach. The
+        devices of the given outputs are only included if they are reached
+        through a feedback path.
+        """
+        cone = set()
+        signal_stack = list(signal_list)
+        while signal_stack:
+            signal = signal_stack.pop()
+            for device_id, input_id in self.fanout_dictionary.get(signal, []):
+                if device_id in cone:
+                    continue
+                cone.add(device_id)
+                device = self.devices.get_device(device_id)
+                for output_id in device.outputs:
+                    signal_stack.append((device_id, output_id))
+        return cone
+
+    def reconnect_input(self, device_id, input_id, output):
+        """Connect a connected input to a different output.
+
+        output is a (device ID, output ID) tuple. Return True if successful.
+        """
+        device = self.devices.get_device(device_id)
+        if device is None or device.inputs.get(input_id) is None:
+            return False
+        old_output = device.inputs[input_id]
+        self.fanout_dictionary[old_output].remove((device_id, input_id))
+        device.inputs[input_id] = output
+        self.fanout_dictionary.setdefault(output, []).append(
+            (device_id, input_id))
+        self.compiled_cycle = None
         return True
 
+    def get_simulation_cone(self, signal_list):
+        """Return the devices that must be executed to simulate the outputs.
+
+        signal_list is a list of (device ID, output ID) tuples. The result is
+        the fan-in cone of the outputs, including the clocks and the inputs
+        of D-types, and the outputs that skipped devices in the cone copy.
+        """
+        cone = self.get_fanin_cone(signal_list)
+        while True:
+            source_list = [
+                (source_device_id, source_output_id)
+                for device_id, output_id, source_device_id, source_output_id
+                in self.derived_outputs
+                if device_id in cone and source_device_id not in cone]
+            if not source_list:
+                return cone
+            cone.update(self.get_fanin_cone(source_list))
+
+    def find_simulated_devices(self, device_kind):
+        """Return the IDs of the devices of a kind that are executed."""
+        device_id_list = self.devices.find_devices(device_kind)
+        if self.skipped_devices:
+            device_id_list = [device_id for device_id in device_id_list
+                              if device_id not in self.skipped_devices]
+        if self.active_devices is not None:
+            device_id_list = [device_id for device_id in device_id_list
+                              if device_id in self.active_devices]
+        return device_id_list
+
+    def set_active_devices(self, device_set):
+        """Set the devices that execute_network runs.
+
+        device_set is a set of device IDs, or None to run every device.
+        Clocks and RC devices always run. The compiled function is only
+        generated again if the devices change.
+        """
+        if device_set != self.active_devices:
+            self.active_devices = device_set
+            self.compiled_cycle = None
+
+    def set_compiled(self, compiled):
+        """Turn on or off simulating the network with a compiled function.
+
+        The function is generated by codegen.CodeGenerator() on the next
+        call to execute_network and gives the same signals, faster.
+        """
+        self.compiled = compiled
+        self.compiled_cycle = None
+
+    def update_derived_outputs(self):
+        """Copy the outputs of skipped devices from their equivalents."""
+        for device_id, output_id, source_device_id, source_output_id in \
+                self.derived_outputs:
+            source_outputs = self.devices.get_device(source_device_id).outputs
+            self.devices.get_device(device_id).outputs[output_id] = \
+                source_outputs[source_output_id]
+
     def update_signal(self, signal, target):
         """Update the signal in the direction of the target.
 
@@ -395,16 +613,24 @@ class Network:
 
         Return True if successful and the network does not oscillate.
         """
+        if self.compiled:
+            if self.compiled_cycle is None:
+                self.compiled_cycle = CodeGenerator(
+                    self.names, self.devices, self).compile()
+            self.steady_state = self.compiled_cycle()
+            return self.steady_state
+
         clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
+        switch_devices = self.find_simulated_devices(self.devices.SWITCH)
+        d_type_devices = self.find_simulated_devices(self.devices.D_TYPE)
+        and_devices = self.find_simulated_devices(self.devices.AND)
+        or_devices = self.find_simulated_devices(self.devices.OR)
+        nand_devices = self.find_simulated_devices(self.devices.NAND)
+        nor_devices = self.find_simulated_devices(self.devices.NOR)
+        xor_devices = self.find_simulated_devices(self.devices.XOR)
+        # Clocks and RC devices always run, so they keep time
         rc_devices = self.devices.find_devices(self.devices.RC)
-        not_devices = self.devices.find_devices(self.devices.NOT)
+        not_devices = self.find_simulated_devices(self.devices.NOT)
 
         # This sets clock signals to RISING or FALLING, where necessary
         self.update_clocks()
@@ -466,4 +692,6 @@ class Network:
 
             if self.steady_state:
                 break
+        if self.steady_state:
+            self.update_derived_outputs()
         return self.steady_state
@@ -0,0 +1,327 @@
+"""Simplify a logic network before it is simulated.
+
+Used in the Logic Simulator project to make large networks faster to
+simulate. Gates whose output is constant, equal to one of their inputs,
+equal to the output of another gate or the double inversion of a signal are
+no longer executed. Their outputs are kept up to date after every cycle, so
+monitors on them, and signals recorded to disk, show the same values as
+before.
+
+Classes
+-------
+Optimiser - simplifies the gates of a network without changing its signals.
+"""
+
+
+class Optimiser:
+
+    """Simplify the gates of a network without changing its signals.
+
+    The pass replaces:
+    - gates with a constant output, because a constant switch or another
+      constant gate fixes one of their inputs, by that constant;
+    - gates with one distinct input that is not fixed, such as 1-input AND
+      and OR gates, by a wire;
+    - NOT gates, and 1-input NAND and NOR gates, of an inverted signal by a
+      wire from the signal;
+    - gates with the same kind and inputs as another gate by that gate.
+
+    A replaced gate is skipped by network.execute_network(), and the inputs
+    connected to it are connected to the output that replaces it instead.
+    Gates on feedback loops, gates driving the set or clear input of a
+    D-type and gates driving a D-type whose clock does not come straight
+    from a clock are not changed, because their behaviour depends on the
+    order in which signals settle within a cycle.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    find_loop_devices(self): Returns the devices on feedback loops and the
+                             order of the devices.
+
+    find_protected_devices(self): Returns the devices that must be executed
+                                  as they are, and the order of the devices.
+
+    simplify_gate(self, device, input_list): Returns what a gate can be
+                                             replaced by.
+
+    optimise(self, constant_switches=None): Simplifies the network and
+                                            returns the number of gates
+                                            replaced.
+    """
+
+    def __init__(self, names, devices, network):
+        """Initialise the gate rules and the kinds of replacement."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+
+        [self.CONSTANT, self.NET, self.WIRE, self.INVERTER,
+         self.GATE] = range(5)
+
+        # [x, y]: if all the inputs are x, the output is y, else it is the
+        # inverse of y
+        self.gate_rules = {
+            self.devices.AND: [self.devices.HIGH, self.devices.HIGH],
+            self.devices.OR: [self.devices.LOW, self.devices.LOW],
+            self.devices.NAND: [self.devices.HIGH, self.devices.LOW],
+            self.devices.NOR: [self.devices.LOW, self.devices.HIGH]}
+        self.gate_kinds = list(self.gate_rules) + [self.devices.XOR,
+                                                   self.devices.NOT]
+
+    def find_loop_devices(self):
+        """Return [loop_devices, order] for the devices of the network.
+
+        loop_devices is the set of devices on feedback loops that do not
+        pass through the data or clock input of a D-type. Like D-types, they
+        can hold a level. order lists the device IDs so that a device on no
+        loop comes after the devices driving it.
+        """
+        data_inputs = [self.devices.DATA_ID, self.devices.CLK_ID]
+        successors = {device_id: [] for device_id
+                      in self.devices.find_devices()}
+        for [device_id, output_id], input_list in \
+                self.network.fanout_dictionary.items():
+            for consumer_id, input_id in input_list:
+                # A D-type only samples these inputs on a clock edge, with
+                # the values of the previous cycle
+                if input_id in data_inputs and \
+                        self.devices.get_device(consumer_id).device_kind == \
+                        self.devices.D_TYPE:
+                    continue
+                successors[device_id].append(consumer_id)
+
+        # Tarjan's algorithm, without recursion. Components are found with
+        # the devices they drive first.
+        index = {}
+        low_link = {}
+        stack = []
+        on_stack = set()
+        loop_devices = set()
+        order = []
+        for root in successors:
+            if root in index:
+                continue
+            index[root] = low_link[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(successors[root]))]
+            while work:
+                [device_id, children] = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low_link[child] = len(index)
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(successors[child])))
+                        break
+                    elif child in on_stack:
+                        low_link[device_id] = min(low_link[device_id],
+                                                  index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low_link[parent] = min(low_link[parent],
+                                               low_link[device_id])
+                    if low_link[device_id] == index[device_id]:
+                        component = []
+                        while not component or component[-1] != device_id:
+                            component.append(stack.pop())
+                            on_stack.discard(component[-1])
+                        if len(component) > 1 or \
+                                device_id in successors[device_id]:
+                            loop_devices.update(component)
+                        order.extend(component)
+        order.reverse()
+        return [loop_devices, order]
+
+    def find_protected_devices(self):
+        """Return [protected, order] for the devices of the network.
+
+        protected is the set of devices that must be executed as they are:
+        devices on feedback loops that do not pass through the data or clock
+        input of a D-type, and the gates driving these devices, the set and
+        clear inputs of D-types, or any input of a D-type whose clock input
+        is not connected straight to a clock. order is as in
+        find_loop_devices().
+        """
+        [protected, order] = self.find_loop_devices()
+
+        # Glitches within a cycle can latch a loop or the set and clear
+        # inputs of a D-type. A D-type whose clock is not a clock device can
+        # also sample its data input at any point of the cycle.
+        signal_list = []
+        for device_id in protected:
+            signal_list.extend(self.devices.get_device(device_id)
+                               .inputs.values())
+        for device_id in self.devices.find_devices(self.devices.D_TYPE):
+            inputs = self.devices.get_device(device_id).inputs
+            clock_output = inputs[self.devices.CLK_ID]
+            if clock_output is not None and self.devices.get_device(
+                    clock_output[0]).device_kind == self.devices.CLOCK:
+                signal_list.extend([inputs[self.devices.SET_ID],
+                                    inputs[self.devices.CLEAR_ID]])
+            else:
+                signal_list.extend(inputs.values())
+        protected.update(self._get_gate_cone(signal_list))
+        return [protected, order]
+
+    def _get_gate_cone(self, signal_list):
+        """Return the gates that the given outputs depend on within a cycle.
+
+        signal_list is a list of (device ID, output ID) tuples or None.
+        Unlike network.get_fanin_cone(), the search stops at devices that
+        are not gates, whose outputs change at most once per cycle.
+        """
+        cone = set()
+        device_stack = [output[0] for output in signal_list
+                        if output is not None]
+        while device_stack:
+            device_id = device_stack.pop()
+            device = self.devices.get_device(device_id)
+            if device_id in cone or device.device_kind not in \
+                    self.gate_kinds:
+                continue
+            cone.add(device_id)
+            device_stack.extend(output[0] for output
+                                in device.inputs.values()
+                                if output is not None)
+        return cone
+
+    def simplify_gate(self, device, input_list):
+        """Return [kind, value] of what a gate can be replaced by.
+
+        input_list holds [self.CONSTANT, level] for each input with a
+        constant level and [self.NET, (device ID, output ID)] for the
+        others. kind is self.CONSTANT with the output level, self.WIRE or
+        self.INVERTER with the output it equals or inverts, or self.GATE
+        with a key that is the same for gates with the same function.
+        """
+        device_kind = device.device_kind
+        if device_kind == self.devices.NOT:
+            [input_kind, value] = input_list[0]
+            if input_kind == self.CONSTANT:
+                return [self.CONSTANT, self.network.invert_signal(value)]
+            return [self.INVERTER, value]
+
+        constant_list = [value for input_kind, value in input_list
+                         if input_kind == self.CONSTANT]
+        net_set = set(value for input_kind, value in input_list
+                      if input_kind != self.CONSTANT)
+
+        if device_kind == self.devices.XOR:  # two inputs
+            if not net_set:
+                return [self.CONSTANT, self.devices.HIGH
+                        if constant_list[0] != constant_list[1]
+                        else self.devices.LOW]
+            [net] = list(net_set)[:1]
+            if constant_list:
+                return [self.WIRE if constant_list[0] == self.devices.LOW
+                        else self.INVERTER, net]
+            if len(net_set) == 1:  # both inputs are the same signal
+                return [self.CONSTANT, self.devices.LOW]
+            return [self.GATE, (device_kind, frozenset(net_set))]
+
+        [x, y] = self.gate_rules[device_kind]
+        if any(value != x for value in constant_list):
+            return [self.CONSTANT, self.network.invert_signal(y)]
+        if not net_set:
+            return [self.CONSTANT, y]
+        if len(net_set) == 1:
+            [net] = net_set
+            return [self.WIRE if x == y else self.INVERTER, net]
+        return [self.GATE, (device_kind, frozenset(net_set))]
+
+    def optimise(self, constant_switches=None):
+        """Simplify the network before it is simulated.
+
+        constant_switches lists the IDs of switches that will not be set
+        during the simulation, whose levels can be propagated through the
+        gates they drive. They are fixed, so Devices.set_switch() fails for
+        them afterwards. Return a dictionary with the number of devices
+        replaced for each reason.
+        """
+        [protected, order] = self.find_protected_devices()
+        count_dictionary = {"constants": 0, "wires": 0,
+                            "double_inversions": 0, "duplicates": 0}
+
+        constants = {}  # {(device_id, output_id): level}
+        # {(device_id, output_id): executed output with the same signal}
+        equivalents = {}
+        # {(device_id, output_id): executed output with the inverse signal}
+        inverses = {}
+        inverted_inputs = {}  # the reverse of inverses
+        gate_keys = {}  # {gate key: executed output}
+
+        for switch_id in constant_switches or []:
+            device = self.devices.get_device(switch_id)
+            if device is not None and \
+                    device.device_kind == self.devices.SWITCH:
+                constants[(switch_id, None)] = device.switch_state
+                device.outputs[None] = device.switch_state
+                self.network.skipped_devices.add(switch_id)
+                self.devices.fixed_switches.add(switch_id)
+
+        for device_id in order:
+            device = self.devices.get_device(device_id)
+            if device_id in protected or \
+                    device.device_kind not in self.gate_kinds or \
+                    None in device.inputs.values():
+                continue
+            output = (device_id, None)
+
+            input_list = []
+            for connected_output in device.inputs.values():
+                if connected_output in constants:
+                    input_list.append([self.CONSTANT,
+                                       constants[connected_output]])
+                else:
+                    input_list.append([self.NET, equivalents.get(
+                        connected_output, connected_output)])
+            [kind, value] = self.simplify_gate(device, input_list)
+
+            if kind == self.CONSTANT:
+                constants[output] = value
+                device.outputs[None] = value
+                self.network.skipped_devices.add(device_id)
+                count_dictionary["constants"] += 1
+                continue
+            elif kind == self.WIRE:
+                [equivalent, reason] = [value, "wires"]
+            elif kind == self.INVERTER and value in inverses:
+                [equivalent, reason] = [inverses[value], "duplicates"]
+            elif kind == self.INVERTER and value in inverted_inputs:
+                [equivalent, reason] = [inverted_inputs[value],
+                                        "double_inversions"]
+            elif kind == self.INVERTER:
+                inverses[value] = output
+                inverted_inputs[output] = value
+                continue
+            elif value in gate_keys:
+                [equivalent, reason] = [gate_keys[value], "duplicates"]
+            else:
+                gate_keys[value] = output
+                continue
+
+            equivalents[output] = equivalent
+            fanout = self.network.get_fanout(device_id, None)
+            if any(consumer_id in protected for consumer_id, input_id
+                   in fanout):
+                continue  # the gate still drives a protected device
+            for consumer_id, input_id in fanout:
+                self.network.reconnect_input(consumer_id, input_id,
+                                             equivalent)
+            self.network.derived_outputs.append(
+                (device_id, None) + equivalent)
+            device.outputs[None] = self.devices.get_device(
+                equivalent[0]).outputs[equivalent[1]]
+            self.network.skipped_devices.add(device_id)
+            count_dictionary[reason] += 1
+        self.network.compiled_cycle = None  # the netlist has changed
+        return count_dictionary
@@ -12,6 +12,7 @@ Written by Ieva
 """
 
 from errors import Errors
+from diagnostics import Diagnostic, Diagnostics
 
 
 class Parser:
@@ -30,6 +31,9 @@ class Parser:
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
     scanner: instance of the scanner.Scanner() class.
+    print_errors: print each error as soon as it is detected.
+    max_printed_errors: maximum number of errors to print, or None for no
+                        limit. All errors are still collected.
 
     Public methods
     --------------
@@ -37,7 +41,8 @@ class Parser:
 
     """
 
-    def __init__(self, names, devices, network, monitors, scanner):
+    def __init__(self, names, devices, network, monitors, scanner,
+                 print_errors=True, max_printed_errors=None):
         """Initialise constants."""
         self.scanner = scanner
         self.names = names
@@ -66,6 +71,8 @@ class Parser:
                                 self.scanner.MONITOR_ID]
 
         self.errors = Errors(devices, network, monitors, self)
+        # Structured record of every error detected while parsing
+        self.diagnostics = Diagnostics(print_errors, max_printed_errors)
 
         self.count_errors = True  # Set to False once EOF is reached
 
@@ -76,6 +83,9 @@ class Parser:
         """
         no_error = True
 
+        # Devices are initialised once the whole netlist has been built
+        self.devices.begin_build()
+
         [self.symbol_type, self.symbol_id] = self.scanner.get_symbol()
         no_error &= self._parse_section('device',
                                         self.scanner.DEVICES_ID,
@@ -110,8 +120,11 @@ class Parser:
                                             self.NO_MONITOR_KEYWORD)
         # Returns after a semicolon or EOF was detected
 
+        # Initialise D-types, clocks and RC devices in one pass
+        self.devices.finalize()
+
         # Print total number of errors
-        if not no_error:
+        if not no_error and self.diagnostics.echo:
             print("Total number of errors detected: {}"
                   .format(self.error_counter))
         return no_error
@@ -430,20 +443,32 @@ class Parser:
         return no_error, port_id
 
     def _error(self, error_code, error_previous_symbol=False, no_marker=False):
-        """Count errors and print error message."""
+        """Count errors and add the error to the diagnostics."""
         if self.count_errors:
             # If error is due to primature EOF, change count_errors flag
             # and thus stop reporting and counting errors after that
             if self.symbol_type == self.scanner.EOF:
                 error_code = self.PREMATURE_EOF
                 self.count_errors = False
-            # Print error message (switched places for unit tests)
-            print(self.errors.error_msg[error_code])
+            diagnostic = Diagnostic(error_code,
+                                    self.errors.error_msg[error_code])
             # Some errors don't have/need specific location
-            if (error_code != self.NOT_ALL_INPUTS_CONNECTED and
-               error_code != self.PREMATURE_EOF and
-               error_code != self.COMMA_NOT_SEMICOLON):
-                self.scanner.get_line(error_previous_symbol, no_marker)
+            if error_code == self.NOT_ALL_INPUTS_CONNECTED:
+                # List every unconnected input instead of a location
+                diagnostic.notes.append("Unconnected inputs: " + ", ".join(
+                    self.network.find_unconnected_inputs()))
+            elif (error_code != self.PREMATURE_EOF and
+                  error_code != self.COMMA_NOT_SEMICOLON):
+                location = self.scanner.get_location(error_previous_symbol,
+                                                     no_marker)
+                if location is not None:
+                    [line_index, caret_index, span] = location
+                    diagnostic.line = line_index + 1
+                    diagnostic.text = self.scanner.list_file[line_index]
+                    if caret_index is not None:
+                        diagnostic.column = caret_index - span + 2
+                        diagnostic.span = span
+            self.diagnostics.add(diagnostic)
             # Update counter
             self.error_counter += 1
 
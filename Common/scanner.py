@@ -133,10 +133,10 @@ class Scanner:
                 and ((self.list_file[line_index]).strip()).find('*\\') == -1:
             self.comment_lines.append(line_index)
 
-    def get_line(self, before, arrow):
-        """Called by the parser to print a line when an error occurs. If before is true, there is an issue with the
-        previous symbol, if false, the current symbol, if arrow is true, the caret line doesn't need to be
-        printed."""
+    def get_location(self, before, arrow):
+        """Return the location of an error as [line_index, caret_index, span]. If before is true, the location is the
+        previous symbol, if false, the current symbol. If arrow is true, there is no caret and caret_index and span
+        are None. Returns None if there is no location to report."""
 
         if before is True and arrow is False:
             symbol = self.current_symbol
@@ -164,10 +164,6 @@ class Scanner:
                 or ((line.strip()).find('*\\') != -1 and line.strip().find('*\\') + 2 == (line.strip()).find(symbol)
                     and (line.strip()).find('\\*') == 0)):
 
-                str_index = str(prev_line_index+1)
-                len_index = len(str_index)
-                print('Line ' + str_index + ': ' + prev_line)
-
                 if prev_line.find('\\*') != -1:
                     arrow_index = prev_line.find('\\*') - 1
 
@@ -178,62 +174,55 @@ class Scanner:
                     arrow_index = len(prev_line) - 1
 
                 cut_line = prev_line[:arrow_index]
-                arrow_line = ''
-                for char in cut_line:
-                    if not char.isspace():
-                        arrow_line = arrow_line + ' '
-                    else:
-                        arrow_line = arrow_line + char
-
-                print(' ' * (7+len_index) + arrow_line + '^')
+                return [prev_line_index, len(cut_line), 1]
 
             else:
-                cur_index = self.line_count
-                str_index = str(cur_index + 1)
-                len_index = len(str_index)
-                print('Line ' + str_index + ': ' + line)
-
                 cut_line = line[:character_no - len(symbol) - 1 - self.space_count]
-                arrow_line = ''
-                for char in cut_line:
-                    if not char.isspace():
-                        arrow_line = arrow_line + ' '
-                    else:
-                        arrow_line = arrow_line + char
-
-                print(' ' * (7 + len_index) + arrow_line + '^')
+                return [self.line_count, len(cut_line), 1]
 
         elif before is False and arrow is True:
-            # Just prints the line without a caret
+            # Just the line without a caret
+            return [self.line_count, None, None]
 
+        elif before is False and arrow is False:
+            # The current line with a caret beneath the current symbol
             line = self.list_file[self.line_count]
-            cur_index = self.line_count
-            str_index = str(cur_index + 1)
-
-            print('Line ' + str_index + ': ' + line)
+            cut_line = line[:self.character_count - 1]
+            # the caret marks the last character of the current symbol
+            span = min(max(len(self.current_symbol), 1), len(cut_line) + 1)
+            return [self.line_count, len(cut_line), span]
 
-        elif before is False and arrow is False:
-            # Prints the current line with a caret beneath the current symbol
+        return None
 
-            line = self.list_file[self.line_count]
-            cur_index = self.line_count
-            str_index = str(cur_index + 1)
-            len_index = len(str_index)
-            character_no = self.character_count
+    def get_line(self, before, arrow):
+        """Called by the parser to print a line when an error occurs. If before is true, there is an issue with the
+        previous symbol, if false, the current symbol, if arrow is true, the caret line doesn't need to be
+        printed."""
 
-            print('Line ' + str_index + ': ' + line)
+        location = self.get_location(before, arrow)
+        if location is not None:
+            [line_index, caret_index, span] = location
+            print(self.format_line(line_index, caret_index))
 
-            cut_line = line[:character_no - 1]
-            arrow_line = ''
+    def format_line(self, line_index, caret_index=None):
+        """Return the numbered line at line_index, followed by a caret line if caret_index is not None. Whitespace
+        before the caret is copied from the line so that tabs line up."""
 
-            for char in cut_line:
+        line = self.list_file[line_index]
+        str_index = str(line_index + 1)
+        text = 'Line ' + str_index + ': ' + line
 
+        if caret_index is not None:
+            arrow_line = ''
+            for char in line[:caret_index]:
                 if not char.isspace():
                     arrow_line = arrow_line + ' '
                 else:
                     arrow_line = arrow_line + char
 
-            print(' ' * (7 + len_index) + arrow_line + '^')
+            text = text + '\n' + ' ' * (7 + len(str_index)) + arrow_line + '^'
+
+        return text
 
     def get_number(self):
 
@@ -0,0 +1,315 @@
+"""Run the logic simulator from Python.
+
+Used in the Logic Simulator project to build a network from a definition file
+and simulate it without the command line or graphical user interfaces, for
+use in scripts, notebooks and services.
+
+Classes
+-------
+Simulator - builds a logic network and records its monitored signals.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from optimise import Optimiser
+from stimulus import Stimulus
+from watchpoints import Watchpoints
+
+
+class Simulator:
+    """Build a logic network and record its monitored signals.
+
+    The signals of the monitors set in the definition file are stored in an
+    int8 array, one row per cycle, that grows as the simulation runs. Signal
+    levels are the signal constants of the devices.Devices() class.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    from_file(cls, path, seed=0): Returns a Simulator for a definition
+                                  file.
+
+    from_string(cls, text, seed=0): Returns a Simulator for the text of a
+                                    definition file.
+
+    get_seed(self): Returns the seed of the start-up state.
+
+    get_monitor_names(self): Returns the names of the monitored signals.
+
+    set_switches(self, switch_levels): Sets switches to the given levels.
+
+    optimise(self, constant_switches=None): Simplifies the network so that
+                                            it is faster to simulate.
+
+    set_pruning(self, prune): Turns on or off simulating only the devices
+                              that the monitors and watchpoints depend on.
+
+    set_compiled(self, compiled): Turns on or off simulating the network
+                                  with a generated Python function.
+
+    load_stimulus(self, path): Reads a stimulus file that sets switches while
+                               the simulation runs.
+
+    add_watch(self, expression, kind=None): Adds a watch, break or assertion
+                                            checked after every cycle.
+
+    get_watch_hits(self): Returns the cycles where each watchpoint hit.
+
+    run(self, cycles, restart=False): Runs the network for a number of
+                                      cycles.
+
+    checkpoint(self): Returns the state of the simulation.
+
+    restore(self, checkpoint): Returns the simulation to a saved state.
+
+    traces(self): Returns the monitored signals as a (monitors x cycles)
+                  array.
+
+    get_trace_set(self): Returns the monitored signals as a dictionary.
+    """
+
+    def __init__(self, names, devices, network, monitors):
+        """Initialise the trace store for the monitored signals."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # [(device.outputs, output_id)] of the monitors, in row order
+        self.monitor_list = []
+        for device_id, output_id in self.monitors.monitors_dictionary:
+            device = self.devices.get_device(device_id)
+            self.monitor_list.append((device.outputs, output_id))
+
+        self.cycles = 0  # number of cycles recorded
+        # switch changes applied while the simulation runs, if any
+        self.stimulus = None
+        # conditions checked after every cycle
+        self.watchpoints = Watchpoints(names, devices)
+        # trace_buffer[cycle, monitor] holds the recorded signals, its
+        # length is doubled when it is full
+        self.trace_buffer = np.empty((1024, len(self.monitor_list)),
+                                     dtype=np.int8)
+
+    @classmethod
+    def from_file(cls, path, seed=0):
+        """Return a Simulator for the definition file at path.
+
+        The start-up state of the clocks and D-types is derived from seed,
+        so runs can be reproduced, or is random if seed is None. Raise
+        FileNotFoundError if there is no such file, and ValueError with the
+        text of the errors found if the file is not valid.
+        """
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        names = Names()
+        devices = Devices(names, seed)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+        scanner = Scanner(path, names)
+        parser = Parser(names, devices, network, monitors, scanner,
+                        print_errors=False)
+        if not parser.parse_network():
+            raise ValueError(parser.diagnostics.render())
+        return cls(names, devices, network, monitors)
+
+    @classmethod
+    def from_string(cls, text, seed=0):
+        """Return a Simulator for the text of a definition file.
+
+        seed is used as in from_file(). Raise ValueError with the text of the
+        errors found if the definition is not valid.
+        """
+        # The scanner reads from a file
+        definition_file = tempfile.NamedTemporaryFile(
+            "w", suffix=".txt", delete=False)
+        try:
+            with definition_file:
+                definition_file.write(text)
+            return cls.from_file(definition_file.name, seed)
+        finally:
+            os.remove(definition_file.name)
+
+    def get_seed(self):
+        """Return the seed of the start-up state, or None if it is random."""
+        return self.devices.seed
+
+    def get_monitor_names(self):
+        """Return the names of the monitored signals, in row order."""
+        return [self.devices.get_signal_name(device_id, output_id)
+                for device_id, output_id in self.monitors.monitors_dictionary]
+
+    def set_switches(self, switch_levels):
+        """Set switches to the given levels.
+
+        switch_levels is a dictionary {switch_name: level}, where level is 0
+        or 1. Return True if every switch was set.
+        """
+        all_set = True
+        for switch_name, level in switch_levels.items():
+            switch_id = self.names.query(switch_name)
+            if switch_id is None or \
+                    not self.devices.set_switch(switch_id, level):
+                all_set = False
+        return all_set
+
+    def optimise(self, constant_switches=None):
+        """Simplify the network so that it is faster to simulate.
+
+        constant_switches lists the names of switches whose current levels
+        will not change for the rest of the simulation; set_switches() fails
+        for them afterwards. The signals of the
+        network, including those of removed gates, stay the same. Return a
+        dictionary with the number of gates removed for each reason, or
+        raise ValueError if a name is not a switch.
+        """
+        switch_id_list = []
+        for switch_name in constant_switches or []:
+            switch_id = self.names.query(switch_name)
+            device = self.devices.get_device(switch_id)
+            if device is None or device.device_kind != self.devices.SWITCH:
+                raise ValueError("{} is not a switch.".format(switch_name))
+            switch_id_list.append(switch_id)
+        optimiser = Optimiser(self.names, self.devices, self.network)
+        return optimiser.optimise(switch_id_list)
+
+    def set_pruning(self, prune):
+        """Turn on or off simulating only what the monitors depend on.
+
+        While pruning is on, devices that cannot reach a monitored signal or
+        a signal read by a watchpoint are not simulated, and their outputs
+        keep their last levels.
+        """
+        self.monitors.set_observed_signals(self.watchpoints.get_signals())
+        self.monitors.set_pruning(prune)
+
+    def set_compiled(self, compiled):
+        """Turn on or off simulating the network with a generated function.
+
+        The function is generated for the whole network when it next runs,
+        and is generated again if the network or the monitors change while
+        pruning. It gives the same signals as the devices executed one by
+        one, faster.
+        """
+        self.network.set_compiled(compiled)
+
+    def load_stimulus(self, path):
+        """Read a stimulus file that sets switches while the simulation runs.
+
+        The changes are scheduled at cycles counted from the last restart,
+        and replace any stimulus loaded before. Return the list of errors
+        found, in which case the stimulus is not used.
+        """
+        stimulus = Stimulus(self.names, self.devices)
+        error_list = stimulus.load_file(path)
+        if not error_list:
+            self.stimulus = stimulus
+        return error_list
+
+    def add_watch(self, expression, kind=None):
+        """Add a condition on the signals that is checked after every cycle.
+
+        kind is self.watchpoints.WATCH (the default) to record the cycles
+        where the condition holds, self.watchpoints.BREAK to also stop the
+        run at the first one, or self.watchpoints.ASSERT to stop the run at
+        the first cycle where it does not hold. Raise ValueError with the
+        error message if the expression is not valid.
+        """
+        error = self.watchpoints.add_watch(expression, kind)
+        if error is not None:
+            raise ValueError(error)
+        self.monitors.set_observed_signals(self.watchpoints.get_signals())
+
+    def get_watch_hits(self):
+        """Return a dictionary {expression: hit cycles} of the watchpoints.
+
+        At most self.watchpoints.hit_limit cycles are kept for each one.
+        """
+        return {watchpoint.expression: list(watchpoint.hit_cycles)
+                for watchpoint in self.watchpoints.watchpoint_list}
+
+    def run(self, cycles, restart=False):
+        """Run the network for a number of cycles and record the monitors.
+
+        If restart is True, the recorded signals are deleted and the clocks
+        and D-types are started again first. Return True if successful, or
+        False as soon as the network oscillates. If a break hits or an
+        assertion fails, the run stops after that cycle and
+        self.watchpoints.stop is set to [watchpoint, cycle].
+        """
+        self.watchpoints.stop = None
+        if restart:
+            self.devices.cold_startup()
+            self.watchpoints.reset_hits()
+            self.cycles = 0
+        if self.cycles + cycles > len(self.trace_buffer):
+            self.trace_buffer = np.resize(self.trace_buffer, (
+                max(2 * len(self.trace_buffer), self.cycles + cycles),
+                len(self.monitor_list)))
+        for _ in range(cycles):
+            if self.stimulus is not None:
+                self.stimulus.apply(self.cycles)
+            if not self.network.execute_network():
+                return False
+            self.trace_buffer[self.cycles] = [
+                outputs[output_id] for outputs, output_id in self.monitor_list]
+            self.cycles += 1
+            if self.watchpoints.check(self.cycles - 1):
+                break
+        return True
+
+    def checkpoint(self):
+        """Return the state of the simulation.
+
+        The state can be passed to restore() to continue the simulation from
+        this point, for example to try several switch settings.
+        """
+        device_states = {}
+        for device in self.devices.devices_list:
+            device_states[device.device_id] = [
+                dict(device.outputs), device.switch_state,
+                device.dtype_memory, device.clock_counter, device.rc_counter]
+        return {"cycles": self.cycles, "devices": device_states}
+
+    def restore(self, checkpoint):
+        """Return the simulation to a state saved by checkpoint().
+
+        Signals recorded after the checkpoint are deleted.
+        """
+        for device in self.devices.devices_list:
+            [outputs, device.switch_state, device.dtype_memory,
+             device.clock_counter,
+             device.rc_counter] = checkpoint["devices"][device.device_id]
+            # keep the same dictionary, the trace store refers to it
+            device.outputs.update(outputs)
+        self.cycles = checkpoint["cycles"]
+
+    def traces(self):
+        """Return the monitored signals as a (monitors x cycles) int8 array.
+
+        The array is a view of the trace store, not a copy. It stays valid
+        until the next call to run() or restore().
+        """
+        return self.trace_buffer[:self.cycles].T
+
+    def get_trace_set(self):
+        """Return the monitored signals as a dictionary {name: signals}.
+
+        Each value is a row of traces(), so it is also a view. The result
+        can be compared with golden traces by the tracediff module.
+        """
+        return dict(zip(self.get_monitor_names(), self.traces()))
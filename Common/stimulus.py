@@ -0,0 +1,172 @@
+"""Read and apply switch changes scheduled at simulation cycles.
+
+Used in the Logic Simulator project to drive the switches of a network from a
+stimulus file while the simulation runs, instead of setting them by hand
+between runs.
+
+Each line of a stimulus file schedules switch levels from a cycle onwards:
+
+    0: sw1 = 0, sw2 = 1         # before cycle 0
+    100: sw3 = 0110             # sw3 is 0, 1, 1, 0 in cycles 100 to 103
+    200 every 50: sw1 = 01      # sw1 is 0 at 200, 1 at 250, 0 at 300...
+    1000 every 10 times 5: sw2 = 1
+
+A level is applied just before its cycle is simulated. A pattern of several
+levels is applied over consecutive cycles, or over repeats if 'every' is
+given. Without 'times', a repeated change lasts until the end of the run.
+Text after '#' is ignored.
+
+Classes
+-------
+Stimulus - stores and applies scheduled switch changes.
+"""
+import re
+
+
+class Stimulus:
+    """Store and apply switch changes scheduled at simulation cycles.
+
+    Changes that happen once, and changes repeated a limited number of
+    times, are stored by cycle, so applying them costs the same however long
+    the stimulus is. Other repeated changes are stored as rules that are
+    checked every cycle.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    load_file(self, path): Reads a stimulus file and returns its errors.
+
+    load_lines(self, lines): Reads stimulus lines and returns their errors.
+
+    add_change(self, cycle, switch_id, pattern, period=None, times=None):
+               Schedules levels for a switch from a cycle onwards.
+
+    apply(self, cycle): Sets the switches scheduled at a cycle.
+
+    clear(self): Deletes all scheduled changes.
+    """
+
+    def __init__(self, names, devices):
+        """Initialise the schedule."""
+        self.names = names
+        self.devices = devices
+
+        # changes stores {cycle: [(switch_id, level)]}
+        self.changes = {}
+        # rules stores [[start, period, times, switch_id, levels]]
+        self.rules = []
+        # repeated changes with at most this many repeats are stored by cycle
+        self.expand_limit = 10000
+
+        self.line_pattern = re.compile(
+            r"^(\d+)(?:\s+every\s+(\d+)(?:\s+times\s+(\d+))?)?\s*:(.*)$")
+        self.assignment_pattern = re.compile(r"^(\w+)\s*=\s*([01]+)$")
+
+    def load_file(self, path):
+        """Read a stimulus file and schedule its changes.
+
+        Return the list of error messages, empty if the file is valid.
+        """
+        try:
+            with open(path) as stimulus_file:
+                return self.load_lines(stimulus_file)
+        except OSError:
+            return ["Cannot open stimulus file."]
+
+    def load_lines(self, lines):
+        """Read the lines of a stimulus and schedule their changes.
+
+        Lines with errors are skipped. Return the list of error messages,
+        empty if all lines are valid.
+        """
+        error_list = []
+        for line_number, line in enumerate(lines, 1):
+            text = line.split("#", 1)[0].strip()
+            if not text:
+                continue
+            line_match = self.line_pattern.match(text)
+            if line_match is None:
+                error_list.append("Line {}: Expected 'cycle [every N [times "
+                                  "N]]: switch = levels'.".format(line_number))
+                continue
+            [cycle, period, times, assignments] = line_match.groups()
+            if period is not None and int(period) == 0:
+                error_list.append("Line {}: Period must be greater than 0."
+                                  .format(line_number))
+                continue
+
+            change_list = []
+            for assignment in assignments.split(","):
+                assignment_match = self.assignment_pattern.match(
+                    assignment.strip())
+                if assignment_match is None:
+                    error_list.append("Line {}: Expected 'switch = levels'."
+                                      .format(line_number))
+                    break
+                [switch_name, pattern] = assignment_match.groups()
+                switch_id = self.names.query(switch_name)
+                device = self.devices.get_device(switch_id)
+                if device is None or \
+                        device.device_kind != self.devices.SWITCH:
+                    error_list.append("Line {}: {} is not a switch."
+                                      .format(line_number, switch_name))
+                    break
+                change_list.append([switch_id, pattern])
+            else:
+                for switch_id, pattern in change_list:
+                    self.add_change(
+                        int(cycle), switch_id, pattern,
+                        None if period is None else int(period),
+                        None if times is None else int(times))
+        return error_list
+
+    def add_change(self, cycle, switch_id, pattern, period=None, times=None):
+        """Schedule levels for a switch from a cycle onwards.
+
+        pattern is a string of levels ('0' or '1'). Without a period, they
+        are applied in consecutive cycles. With a period, one level is
+        applied every period cycles, cycling through the pattern, times
+        times or until the end of the run if times is None.
+        """
+        levels = [int(level) for level in pattern]
+        if period is None:
+            for offset, level in enumerate(levels):
+                self.changes.setdefault(cycle + offset, []).append(
+                    (switch_id, level))
+        elif times is not None and times <= self.expand_limit:
+            for repeat in range(times):
+                self.changes.setdefault(cycle + repeat * period, []).append(
+                    (switch_id, levels[repeat % len(levels)]))
+        else:
+            self.rules.append([cycle, period, times, switch_id, levels])
+
+    def apply(self, cycle):
+        """Set the switches scheduled at the given cycle.
+
+        Changes stored by cycle are applied before repeated rules, so a rule
+        wins if both set the same switch. Return True if every switch was
+        set.
+        """
+        all_set = True
+        for switch_id, level in self.changes.get(cycle, []):
+            if not self.devices.set_switch(switch_id, level):
+                all_set = False
+        for start, period, times, switch_id, levels in self.rules:
+            if cycle < start or (cycle - start) % period:
+                continue
+            repeat = (cycle - start) // period
+            if times is not None and repeat >= times:
+                continue
+            if not self.devices.set_switch(switch_id,
+                                           levels[repeat % len(levels)]):
+                all_set = False
+        return all_set
+
+    def clear(self):
+        """Delete all scheduled changes."""
+        self.changes = {}
+        self.rules = []
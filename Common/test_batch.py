@@ -0,0 +1,53 @@
+"""Test the batch module."""
+import os
+
+from batch import run_job, find_files, run_batch
+
+VALID_FILE = os.path.join("def_files", "def.txt")
+
+
+def test_run_job():
+    """Test if run_job returns the results of a valid file."""
+    result = run_job(VALID_FILE, 20)
+    assert result["valid"]
+    assert result["errors"] == []
+    assert result["cycles"] == 20
+    assert result["monitors"] == ["n1", "sw2", "sw3", "sw1", "clk", "d1.Q"]
+    assert len(result["trace_digest"]) == 64
+    assert set(result["timings"]) == {"parse", "simulate"}
+
+
+def test_run_job_errors(tmp_path):
+    """Test if run_job reports invalid and missing files."""
+    definition_file = tmp_path / "bad.txt"
+    definition_file.write_text("DEVICES:\nSWITCH sw1 0\n")
+    result = run_job(str(definition_file), 20)
+    assert not result["valid"]
+    assert result["errors"]
+    assert result["trace_digest"] is None
+
+    result = run_job(str(tmp_path / "missing.txt"), 20)
+    assert not result["valid"]
+    assert result["errors"][0]["message"] == "File not found."
+
+
+def test_run_batch(tmp_path):
+    """Test if run_batch collects the results of every file in order."""
+    path_list = find_files([os.path.join("def_files", "*.txt")])
+    assert VALID_FILE in path_list
+
+    report = run_batch(path_list, 10, jobs=2)
+    assert report["files"] == len(path_list)
+    assert [result["path"] for result in report["results"]] == path_list
+    assert report["valid"] == sum(result["valid"]
+                                  for result in report["results"])
+
+
+def test_reproducible_digests():
+    """Test if two runs with the default seed give the same digests."""
+    report = run_batch([VALID_FILE], 20, jobs=1)
+    other_report = run_batch([VALID_FILE], 20, jobs=1)
+    assert report["seed"] == other_report["seed"] == 0
+    assert report["results"][0]["seed"] == 0
+    assert report["results"][0]["trace_digest"] == \
+        other_report["results"][0]["trace_digest"]
@@ -0,0 +1,146 @@
+"""Test the codegen module."""
+import collections
+
+import pytest
+
+from codegen import CodeGenerator
+from simulator import Simulator
+
+DEFINITION = """DEVICES:
+SWITCH sw1 0,
+SWITCH sw2 1,
+CLOCK clk 1,
+CLOCK slow 3,
+RC rc1 4,
+AND a1 2,
+NOT i1,
+XOR x1,
+NAND n1 2,
+NAND n2 2,
+OR o1 2,
+DTYPE d1,
+DTYPE d2;
+
+CONNECTIONS:
+sw1 -> a1.I1,
+d1.Q -> a1.I2,
+a1 -> i1.I1,
+i1 -> x1.I1,
+slow -> x1.I2,
+sw1 -> n1.I1,
+n2 -> n1.I2,
+sw2 -> n2.I1,
+n1 -> n2.I2,
+clk -> d1.CLK,
+x1 -> d1.DATA,
+rc1 -> d1.SET,
+a1 -> d1.CLEAR,
+x1 -> o1.I1,
+sw1 -> o1.I2,
+o1 -> d2.CLK,
+d2.QBAR -> d2.DATA,
+rc1 -> d2.SET,
+n2 -> d2.CLEAR;
+
+MONITOR:
+a1,
+x1,
+n1,
+o1,
+d1.Q,
+d2.Q;
+"""
+
+
+def run_simulator(compiled, optimise=False):
+    """Return the traces of the network run with switch changes."""
+    simulator = Simulator.from_string(DEFINITION, seed=2)
+    if optimise:
+        simulator.optimise()
+    simulator.set_compiled(compiled)
+    for switch_levels in [{}, {"sw1": 1}, {"sw2": 0}, {"sw1": 0},
+                          {"sw2": 1}, {"sw1": 1}]:
+        assert simulator.set_switches(switch_levels)
+        assert simulator.run(5)
+    return simulator
+
+
+@pytest.mark.parametrize("optimise", [False, True])
+def test_compiled_signals(optimise):
+    """Test if the compiled function gives the same signals and states."""
+    expected_simulator = run_simulator(False, optimise)
+    simulator = run_simulator(True, optimise)
+    assert simulator.traces().tolist() == \
+        expected_simulator.traces().tolist()
+    for device, expected_device in zip(
+            simulator.devices.devices_list,
+            expected_simulator.devices.devices_list):
+        assert device.outputs == expected_device.outputs
+        assert device.dtype_memory == expected_device.dtype_memory
+
+
+def test_code_cache():
+    """Test if networks with the same structure share the compiled code."""
+    simulator = Simulator.from_string(DEFINITION)
+    other_simulator = Simulator.from_string(DEFINITION)
+    generator = CodeGenerator(simulator.names, simulator.devices,
+                              simulator.network)
+    other_generator = CodeGenerator(other_simulator.names,
+                                    other_simulator.devices,
+                                    other_simulator.network)
+    key = generator.get_netlist_key()
+    assert other_generator.get_netlist_key() == key
+    generator.compile()
+    code = CodeGenerator.code_cache[key]
+    other_generator.compile()
+    assert CodeGenerator.code_cache[key] is code
+
+    # Pruning changes the key, and the function is generated again
+    simulator.set_compiled(True)
+    assert simulator.run(1)
+    compiled_cycle = simulator.network.compiled_cycle
+    simulator.set_pruning(True)
+    assert simulator.network.compiled_cycle is None
+    assert generator.get_netlist_key() != key
+    assert simulator.run(1)
+    assert simulator.network.compiled_cycle is not compiled_cycle
+
+    # The function is kept while the pruned devices stay the same
+    compiled_cycle = simulator.network.compiled_cycle
+    simulator.network.set_active_devices(
+        set(simulator.network.active_devices))
+    assert simulator.network.compiled_cycle is compiled_cycle
+
+
+def test_code_cache_size(monkeypatch):
+    """Test if the least recently used code is removed from the cache."""
+    monkeypatch.setattr(CodeGenerator, "code_cache",
+                        collections.OrderedDict())
+    monkeypatch.setattr(CodeGenerator, "code_cache_size", 2)
+    generator_list = []
+    for prune in [False, True, False]:
+        simulator = Simulator.from_string(DEFINITION)
+        simulator.set_pruning(prune)
+        generator_list.append(CodeGenerator(
+            simulator.names, simulator.devices, simulator.network))
+    [SW1_ID] = simulator.names.lookup(["sw1"])
+    simulator.network.set_active_devices({SW1_ID})
+    generator_list[0].compile()
+    generator_list[1].compile()
+    generator_list[0].compile()  # used again, so the pruned code goes
+    generator_list[2].compile()
+    assert list(CodeGenerator.code_cache) == [
+        generator_list[0].get_netlist_key(),
+        generator_list[2].get_netlist_key()]
+
+
+def test_unconnected_input():
+    """Test if a network with an unconnected input fails to run."""
+    simulator = Simulator.from_string(DEFINITION)
+    [NOT_ID] = simulator.names.lookup(["i9"])
+    simulator.devices.make_device(NOT_ID, simulator.devices.NOT)
+    source = CodeGenerator(simulator.names, simulator.devices,
+                           simulator.network).generate_source()
+    assert source == "def execute_cycle():\n    return False\n"
+    simulator.set_compiled(True)
+    assert not simulator.run(1)
@@ -148,3 +148,64 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_make_device_keeps_earlier_devices(new_devices):
+    """Test if making a device leaves earlier devices' states unchanged."""
+    names = new_devices.names
+    [CL1_ID, CL2_ID, D1_ID] = names.lookup(["Clock1", "Clock2", "D1"])
+
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 1000)
+    clock_device = new_devices.get_device(CL1_ID)
+    clock_counter = clock_device.clock_counter
+    clock_output = clock_device.outputs[None]
+
+    new_devices.make_device(CL2_ID, new_devices.CLOCK, 1000)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+
+    assert clock_device.clock_counter == clock_counter
+    assert clock_device.outputs[None] == clock_output
+
+
+def test_finalize(new_devices):
+    """Test if finalize initialises the devices made while building."""
+    names = new_devices.names
+    [CL1_ID, D1_ID, SW1_ID] = names.lookup(["Clock1", "D1", "Sw1"])
+
+    new_devices.begin_build()
+    new_devices.make_device(CL1_ID, new_devices.CLOCK, 5)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+
+    clock_device = new_devices.get_device(CL1_ID)
+    dtype_device = new_devices.get_device(D1_ID)
+
+    # Initialisation is deferred while building
+    assert clock_device.clock_counter is None
+    assert dtype_device.dtype_memory is None
+
+    new_devices.finalize()
+
+    assert not new_devices.building
+    assert clock_device.clock_counter in range(5)
+    assert clock_device.outputs[None] in [new_devices.LOW, new_devices.HIGH]
+    assert dtype_device.dtype_memory in [new_devices.LOW, new_devices.HIGH]
+
+
+def test_seeded_cold_startup():
+    """Test if a seed gives each device a reproducible start-up state."""
+    def start_up(seed, device_names):
+        names = Names()
+        devices = Devices(names, seed)
+        device_ids = names.lookup(device_names)
+        for device_id in device_ids:
+            devices.make_device(device_id, devices.CLOCK, 50)
+        devices.cold_startup()
+        return {name: devices.get_device(device_id).clock_counter
+                for name, device_id in zip(device_names, device_ids)}
+
+    states = start_up(7, ["Clk1", "Clk2", "Clk3"])
+    # The same seed gives the same state, whatever the other devices
+    assert start_up(7, ["Clk3", "Clk1", "Clk2"]) == states
+    assert start_up(7, ["Clk2", "Extra"])["Clk2"] == states["Clk2"]
+    assert start_up(8, ["Clk1", "Clk2", "Clk3"]) != states
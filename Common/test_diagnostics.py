@@ -0,0 +1,49 @@
+"""Test the diagnostics module."""
+import pytest
+
+from diagnostics import Diagnostic, Diagnostics
+
+
+@pytest.fixture
+def diagnostic_with_marker():
+    """Return an error marking 'N!' on a tab-indented line."""
+    return Diagnostic(3, "Error 3: Invalid device.", line=2, column=7, span=2,
+                      text="\tNAND N! 2,")
+
+
+def test_render(diagnostic_with_marker):
+    """Test if an error is rendered in the console format."""
+    assert diagnostic_with_marker.render() == ("Error 3: Invalid device.\n"
+                                               "Line 2: \tNAND N! 2,\n"
+                                               "        \t      ^")
+
+    no_marker = Diagnostic(5, "Error 5: No marker.", line=10, text="A;")
+    assert no_marker.render() == "Error 5: No marker.\nLine 10: A;"
+
+    no_location = Diagnostic(6, "Error 6: No location.",
+                             notes=["Unconnected inputs: d1.CLK"])
+    assert no_location.render() == ("Error 6: No location.\n"
+                                    "Unconnected inputs: d1.CLK")
+
+
+def test_to_list(diagnostic_with_marker):
+    """Test if errors are serialised as dictionaries."""
+    diagnostics = Diagnostics(echo=False)
+    diagnostics.add(diagnostic_with_marker)
+
+    assert diagnostics.to_list() == [{"code": 3,
+                                      "message": "Error 3: Invalid device.",
+                                      "line": 2, "column": 7, "span": 2,
+                                      "text": "\tNAND N! 2,", "notes": []}]
+
+
+def test_max_printed(capsys):
+    """Test if only the first max_printed errors are printed."""
+    diagnostics = Diagnostics(max_printed=2)
+    for code in range(5):
+        diagnostics.add(Diagnostic(code, "Error {}".format(code)))
+
+    out, err = capsys.readouterr()
+    assert out == "Error 0\nError 1\nFurther errors are not printed.\n"
+    assert len(diagnostics) == 5
+    assert diagnostics.render(limit=1) == "Error 0\n... and 4 more errors."
@@ -5,6 +5,7 @@ from names import Names
 from network import Network
 from devices import Devices
 from monitors import Monitors
+from traces import FileEdgeTrace
 
 
 @pytest.fixture
@@ -197,3 +198,266 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_shadow_recording(new_monitors):
+    """Test if a monitor made after a run starts with the recorded history."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    new_monitors.start_shadow_recording()
+    new_monitors.remove_monitor(OR1_ID, None)
+    network.execute_network()
+    new_monitors.record_signals()
+    devices.set_switch(SW1_ID, HIGH)
+    network.execute_network()
+    new_monitors.record_signals()
+
+    # Or1 was not monitored, but its history is shown
+    new_monitors.make_monitor(OR1_ID, None, 2)
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == [LOW, HIGH]
+
+    new_monitors.reset_monitors()
+    new_monitors.remove_monitor(OR1_ID, None)
+    new_monitors.make_monitor(OR1_ID, None, 0)
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == []
+
+    # Without shadow recording, earlier cycles are blank
+    new_monitors.stop_shadow_recording()
+    new_monitors.remove_monitor(SW2_ID, None)
+    new_monitors.make_monitor(SW2_ID, None, 2)
+    assert new_monitors.monitors_dictionary[(SW2_ID, None)] == [
+        devices.BLANK, devices.BLANK]
+
+
+def test_disk_recording(new_monitors):
+    """Test if monitors are read back from the file while disk recording."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    new_monitors.start_disk_recording()
+    new_monitors.remove_monitor(OR1_ID, None)
+    for cycle in range(4):
+        devices.set_switch(SW1_ID, cycle % 2)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    # Signals are not kept in memory
+    assert new_monitors.monitors_dictionary == {(SW1_ID, None): [],
+                                                (SW2_ID, None): []}
+    assert new_monitors.get_cycles_recorded() == 4
+    assert new_monitors.get_signal_window(SW1_ID, None, 1, 3) == [HIGH, LOW]
+
+    # A monitor made later is read back with its history
+    new_monitors.make_monitor(OR1_ID, None, 4)
+    assert new_monitors.get_signal_window(OR1_ID, None, 0, 4) == [
+        LOW, HIGH, LOW, HIGH]
+    assert new_monitors.get_signal_window(SW2_ID, None, 0, 10) == [LOW] * 4
+
+    new_monitors.reset_monitors()
+    assert new_monitors.get_cycles_recorded() == 0
+    new_monitors.stop_disk_recording()
+
+
+def test_display_signals_window(capsys, new_monitors):
+    """Test if a window of cycles is displayed wrapped and compressed."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID] = names.lookup(["Sw1"])
+
+    for cycle in range(30):
+        if cycle == 10:
+            devices.set_switch(SW1_ID, devices.HIGH)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    new_monitors.display_signals(5, 15)
+    out, _ = capsys.readouterr()
+    assert out == ("Sw1: _____-----\n"
+                   "Sw2: __________\n"
+                   "Or1: _____-----\n")
+
+    # Lines are wrapped in blocks of cycles that stay lined up
+    new_monitors.display_signals(5, 15, width=11)
+    out, _ = capsys.readouterr()
+    assert out == ("Sw1: _____-\n"
+                   "Sw2: ______\n"
+                   "Or1: _____-\n"
+                   "\n"
+                   "Sw1: ----\n"
+                   "Sw2: ____\n"
+                   "Or1: ----\n")
+
+    # Runs of more than 5 equal levels are compressed
+    new_monitors.display_signals(compress=5)
+    out, _ = capsys.readouterr()
+    assert out == ("Sw1: _x10-x20\n"
+                   "Sw2: _x30\n"
+                   "Or1: _x10-x20\n")
+
+    new_monitors.display_signals(5, 17, width=10, compress=4)
+    out, _ = capsys.readouterr()
+    assert out == ("Sw1: _x5\n"
+                   "     -x7\n"
+                   "Sw2: _x12\n"
+                   "Or1: _x5\n"
+                   "     -x7\n")
+
+
+def test_edge_traces(new_monitors):
+    """Test if the edges of monitors are indexed while recording."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    new_monitors.start_disk_recording()
+    new_monitors.remove_monitor(OR1_ID, None)
+    assert new_monitors.get_edge_trace(OR1_ID, None) is None
+    for cycle in range(6):
+        devices.set_switch(SW1_ID, int(cycle in [1, 2, 4]))
+        network.execute_network()
+        new_monitors.record_signals()
+
+    edge_trace = new_monitors.get_edge_trace(SW1_ID, None)
+    assert edge_trace.get_edges(devices.RISING) == [1, 4]
+    assert edge_trace.get_pulse_widths() == [[1, 2], [4, 1]]
+
+    # The edges are found in the file, not recorded in memory
+    assert new_monitors.edge_list == []
+    assert isinstance(edge_trace, FileEdgeTrace)
+
+    # A monitor made later is indexed with its history from the file
+    new_monitors.make_monitor(OR1_ID, None, 6)
+    assert new_monitors.get_edge_trace(OR1_ID, None).get_edges() == [
+        1, 3, 4, 5]
+
+    new_monitors.reset_monitors()
+    assert len(edge_trace) == 0
+    new_monitors.stop_disk_recording()
+    assert new_monitors.get_edge_trace(SW1_ID, None).get_edges() == []
+    assert len(new_monitors.edge_list) == 3
+
+
+def test_pruning(new_monitors):
+    """Test if only the cone of the monitors is simulated while pruning."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    new_monitors.remove_monitor(OR1_ID, None)
+    new_monitors.remove_monitor(SW2_ID, None)
+    new_monitors.set_pruning(True)
+    assert network.active_devices == {SW1_ID}
+    devices.set_switch(SW1_ID, devices.HIGH)
+    devices.set_switch(SW2_ID, devices.HIGH)
+    network.execute_network()
+    assert network.get_output_signal(SW1_ID, None) == devices.HIGH
+    assert network.get_output_signal(SW2_ID, None) == devices.LOW
+
+    # The cone is found again when the monitors change
+    new_monitors.make_monitor(OR1_ID, None)
+    assert network.active_devices == {SW1_ID, SW2_ID, OR1_ID}
+    new_monitors.remove_monitor(OR1_ID, None)
+    new_monitors.set_observed_signals([(SW2_ID, None)])
+    assert network.active_devices == {SW1_ID, SW2_ID}
+
+    # Every output is recorded, so every device is simulated
+    new_monitors.start_shadow_recording()
+    assert network.active_devices is None
+    new_monitors.stop_shadow_recording()
+    assert network.active_devices == {SW1_ID, SW2_ID}
+    new_monitors.set_pruning(False)
+    assert network.active_devices is None
+
+
+def make_d_type_monitors(prune):
+    """Return Monitors for two D-types, monitoring only their clock.
+
+    D1 toggles, D2 copies a switch.
+    """
+    new_names = Names()
+    new_devices = Devices(new_names, seed=3)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+    [CLK_ID, D1_ID, D2_ID, SW1_ID, SW2_ID, NOT1_ID, I1] = new_names.lookup(
+        ["Clk", "D1", "D2", "Sw1", "Sw2", "Not1", "I1"])
+    new_devices.make_device(CLK_ID, new_devices.CLOCK, 1)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_devices.make_device(D2_ID, new_devices.D_TYPE)
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 1)
+    new_devices.make_device(NOT1_ID, new_devices.NOT)
+    for device_id in [D1_ID, D2_ID]:
+        new_network.make_connection(CLK_ID, None, device_id,
+                                    new_devices.CLK_ID)
+        new_network.make_connection(SW1_ID, None, device_id,
+                                    new_devices.SET_ID)
+        new_network.make_connection(SW1_ID, None, device_id,
+                                    new_devices.CLEAR_ID)
+    new_network.make_connection(D1_ID, new_devices.QBAR_ID, D1_ID,
+                                new_devices.DATA_ID)
+    new_network.make_connection(SW2_ID, None, D2_ID, new_devices.DATA_ID)
+    new_network.make_connection(SW1_ID, None, NOT1_ID, I1)
+    new_monitors.make_monitor(CLK_ID, None)
+    new_monitors.set_pruning(prune)
+    return new_monitors
+
+
+def test_pruning_d_types():
+    """Test if D-types monitored after a pruned run are BLANK until set."""
+    signal_lists = []
+    for prune in [False, True]:
+        monitors = make_d_type_monitors(prune)
+        devices = monitors.devices
+        [D1_ID, D2_ID, SW1_ID, NOT1_ID] = monitors.names.lookup(
+            ["D1", "D2", "Sw1", "Not1"])
+        if prune:
+            assert monitors.network.active_devices.isdisjoint(
+                [D1_ID, D2_ID, NOT1_ID])
+        for cycle in range(6):
+            assert monitors.network.execute_network()
+            monitors.record_signals()
+        monitors.make_monitor(D1_ID, devices.Q_ID, 6)
+        monitors.make_monitor(D2_ID, devices.Q_ID, 6)
+        for cycle in range(6):
+            assert monitors.network.execute_network()
+            monitors.record_signals()
+        # clearing D1 makes it correct again
+        devices.set_switch(SW1_ID, devices.HIGH)
+        assert monitors.network.execute_network()
+        monitors.record_signals()
+        signal_lists.append([
+            monitors.monitors_dictionary[(device_id, devices.Q_ID)]
+            for device_id in [D1_ID, D2_ID]])
+
+    [[d1_signals, d2_signals], [pruned_d1_signals, pruned_d2_signals]] = \
+        signal_lists
+    BLANK = monitors.devices.BLANK
+    assert d1_signals[6:12] != [d1_signals[6]] * 6
+    # the toggling D-type depends on its own lost level
+    assert pruned_d1_signals == [BLANK] * 12 + [devices.LOW]
+    # the other D-type is correct from the first clock edge after a cycle
+    assert pruned_d2_signals[:7] == [BLANK] * 7
+    assert BLANK not in pruned_d2_signals[9:]
+    assert pruned_d2_signals[9:] == d2_signals[9:]
+
+    # a new run starts from cold start-up, and no D-type is stale
+    monitors.reset_monitors()
+    assert monitors.stale_devices == set()
+    assert monitors.network.execute_network()
+    monitors.record_signals()
+    assert monitors.monitors_dictionary[(D1_ID, devices.Q_ID)] == [
+        devices.LOW]
@@ -115,6 +115,24 @@ def test_check_network(network_with_devices):
     assert network.check_network()
 
 
+def test_find_unconnected_inputs(network_with_devices):
+    """Test if all unconnected inputs are reported by name."""
+    network = network_with_devices
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, OR1_ID, I1] = names.lookup(["Sw1", "Or1", "I1"])
+
+    assert network.find_unconnected_inputs() == ["Or1.I1", "Or1.I2"]
+
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    assert network.find_unconnected_inputs() == ["Or1.I2"]
+
+    # A failed connection should not change the count
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    assert not network.check_network()
+
+
 def test_make_connection(network_with_devices):
     """Test if the make_connection function correctly connects devices."""
     network = network_with_devices
@@ -386,3 +404,61 @@ def test_rc_device(new_network):
         network.execute_network()
     assert [eval(rc1_output), eval(sw1_output), eval(or1_output)] == [
             LOW, LOW, LOW]
+
+
+def test_fanout_and_cones(network_with_devices):
+    """Test if fanout, fan-in and cone queries follow the connections."""
+    network = network_with_devices
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2, N1_ID,
+     SW3_ID] = names.lookup(["Sw1", "Sw2", "Or1", "I1", "I2", "Not1", "Sw3"])
+    devices.make_device(N1_ID, devices.NOT)
+    devices.make_device(SW3_ID, devices.SWITCH, 0)
+
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    network.make_connection(OR1_ID, I2, SW2_ID, None)
+    network.make_connection(OR1_ID, None, N1_ID, I1)
+
+    assert network.get_fanout(SW1_ID, None) == [(OR1_ID, I1)]
+    assert network.get_fanout(SW2_ID, None) == [(OR1_ID, I2)]
+    assert network.get_fanout(N1_ID, None) == []
+    assert network.get_fanin(OR1_ID) == [(SW1_ID, None), (SW2_ID, None)]
+    assert network.get_fanin(SW1_ID) == []
+
+    assert network.get_fanin_cone([(N1_ID, None)]) == {N1_ID, OR1_ID,
+                                                       SW1_ID, SW2_ID}
+    assert network.get_fanin_cone([(SW3_ID, None)]) == {SW3_ID}
+    assert network.get_fanout_cone([(SW1_ID, None)]) == {OR1_ID, N1_ID}
+    assert network.get_fanout_cone([(SW3_ID, None)]) == set()
+
+
+def test_reconnect_input_and_skipped_devices(network_with_devices):
+    """Test if inputs can be moved and skipped devices copy their outputs."""
+    network = network_with_devices
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2, N1_ID] = names.lookup(
+        ["Sw1", "Sw2", "Or1", "I1", "I2", "Not1"])
+    devices.make_device(N1_ID, devices.NOT)
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    network.make_connection(SW2_ID, None, OR1_ID, I2)
+    network.make_connection(SW1_ID, None, N1_ID, I1)
+
+    assert network.reconnect_input(OR1_ID, I2, (SW1_ID, None))
+    assert network.get_fanout(SW2_ID, None) == []
+    assert network.get_fanout(SW1_ID, None) == [(OR1_ID, I1), (N1_ID, I1),
+                                                (OR1_ID, I2)]
+    assert not network.reconnect_input(SW1_ID, I1, (SW2_ID, None))
+
+    # Or1 is replaced by a copy of Sw1
+    or1_outputs = devices.get_device(OR1_ID).outputs
+    network.skipped_devices.add(OR1_ID)
+    network.derived_outputs.append((OR1_ID, None, SW1_ID, None))
+    assert network.find_simulated_devices(devices.OR) == []
+    devices.set_switch(SW1_ID, devices.HIGH)
+    assert network.execute_network()
+    assert or1_outputs[None] == devices.HIGH
+    assert network.get_output_signal(N1_ID, None) == devices.LOW
@@ -0,0 +1,122 @@
+"""Test the optimise module."""
+import pytest
+
+from optimise import Optimiser
+from simulator import Simulator
+
+DEFINITION = """DEVICES:
+SWITCH sw1 0,
+SWITCH sw2 1,
+SWITCH sw3 1,
+SWITCH sw4 0,
+CLOCK clk 1,
+AND a1 1,
+NOT i1,
+NOT i2,
+NAND n1 2,
+NAND n2 2,
+OR o1 2,
+XOR x1,
+NOR r1 2,
+NOR r2 2,
+DTYPE d1;
+
+CONNECTIONS:
+sw1 -> a1.I1,
+sw2 -> i1.I1,
+i1 -> i2.I1,
+sw1 -> n1.I1,
+sw2 -> n1.I2,
+sw2 -> n2.I1,
+sw1 -> n2.I2,
+sw3 -> o1.I1,
+sw1 -> o1.I2,
+a1 -> x1.I1,
+i2 -> x1.I2,
+sw1 -> r1.I1,
+r2 -> r1.I2,
+sw2 -> r2.I1,
+r1 -> r2.I2,
+clk -> d1.CLK,
+x1 -> d1.DATA,
+sw4 -> d1.SET,
+sw4 -> d1.CLEAR;
+
+MONITOR:
+a1,
+i2,
+n1,
+n2,
+o1,
+x1,
+r1,
+d1.Q;
+"""
+
+
+@pytest.fixture
+def new_simulator():
+    """Return a Simulator for a network with gates that can be removed."""
+    return Simulator.from_string(DEFINITION, seed=1)
+
+
+def test_find_protected_devices(new_simulator):
+    """Test if only the latch is protected and drivers come first."""
+    names = new_simulator.names
+    optimiser = Optimiser(names, new_simulator.devices,
+                          new_simulator.network)
+    [protected, order] = optimiser.find_protected_devices()
+    assert protected == set(names.lookup(["r1", "r2"]))
+    [SW2_ID, I1_ID, I2_ID, X1_ID] = names.lookup(["sw2", "i1", "i2", "x1"])
+    assert order.index(SW2_ID) < order.index(I1_ID) < order.index(I2_ID) \
+        < order.index(X1_ID)
+
+
+def test_optimise(new_simulator):
+    """Test if gates are removed and the monitors show the same signals."""
+    expected_simulator = Simulator.from_string(DEFINITION, seed=1)
+    assert new_simulator.optimise(["sw3"]) == {
+        "constants": 1, "wires": 1, "double_inversions": 1, "duplicates": 1}
+    names = new_simulator.names
+    skipped_devices = new_simulator.network.skipped_devices
+    # one of the NAND gates is a duplicate of the other
+    assert len(skipped_devices) == 5
+    assert skipped_devices.issuperset(names.lookup(["sw3", "o1", "a1",
+                                                    "i2"]))
+    # the removed NAND gate copies the other one, which must be simulated
+    [N1_ID, N2_ID] = names.lookup(["n1", "n2"])
+    for removed_id, kept_id in [[N1_ID, N2_ID], [N2_ID, N1_ID]]:
+        if removed_id in skipped_devices:
+            assert kept_id in new_simulator.network.get_simulation_cone(
+                [(removed_id, None)])
+            assert kept_id not in new_simulator.network.get_fanin_cone(
+                [(removed_id, None)])
+    # x1 reads the signals that replace its inputs
+    [SW1_ID, SW2_ID, X1_ID] = names.lookup(["sw1", "sw2", "x1"])
+    assert list(new_simulator.devices.get_device(X1_ID).inputs.values()) \
+        == [(SW1_ID, None), (SW2_ID, None)]
+
+    for simulator in [new_simulator, expected_simulator]:
+        for switch_levels in [{}, {"sw1": 1}, {"sw2": 0}, {"sw1": 0}]:
+            assert simulator.set_switches(switch_levels)
+            assert simulator.run(3)
+    assert new_simulator.traces().tolist() == \
+        expected_simulator.traces().tolist()
+
+
+def test_optimise_errors(new_simulator):
+    """Test if constant switches must be switches."""
+    with pytest.raises(ValueError, match="n1 is not a switch."):
+        new_simulator.optimise(["n1"])
+    assert new_simulator.network.skipped_devices == set()
+
+
+def test_fixed_switches(new_simulator):
+    """Test if switches given as constant can no longer be set."""
+    new_simulator.optimise(["sw3"])
+    [SW1_ID, SW3_ID] = new_simulator.names.lookup(["sw1", "sw3"])
+    assert new_simulator.devices.fixed_switches == {SW3_ID}
+    assert not new_simulator.set_switches({"sw3": 0})
+    assert not new_simulator.devices.set_switch(SW3_ID, 0)
+    assert new_simulator.devices.get_device(SW3_ID).switch_state == 1
+    assert new_simulator.devices.set_switch(SW1_ID, 1)
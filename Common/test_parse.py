@@ -222,3 +222,42 @@ def test_network_parsing_pass(capsys, data):
     parser = init_parser(data)
 
     assert parser.parse_network()
+
+
+def test_all_unconnected_inputs_reported(capsys):
+    """Test if every unconnected input is listed in one error."""
+    parser = init_parser("DEVICES: SWITCH s1 0, DTYPE d1, NAND n1 2; "
+                         "CONNECTIONS: s1->d1.DATA, s1->n1.I1;")
+
+    assert not parser.parse_network()
+    out, err = capsys.readouterr()
+    assert ("Unconnected inputs: d1.CLK, d1.SET, d1.CLEAR, n1.I2"
+            in out.split("\n"))
+
+
+def test_diagnostics_collected(capsys):
+    """Test if errors are collected without printing when requested."""
+    with open('test_file.txt', 'w') as f:
+        f.write("DEVICES: SWITCH s1 0,\nNAND N! 2;\nCONNECTIONS: s1->x1;")
+
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner("test_file.txt", names)
+    parser = Parser(names, devices, network, monitors, scanner,
+                    print_errors=False)
+
+    assert not parser.parse_network()
+    out, err = capsys.readouterr()
+    assert out == ""
+
+    [first_error, second_error, third_error] = list(parser.diagnostics)
+    assert first_error.code == parser.devices.INVALID_QUALIFIER
+    assert (first_error.line, first_error.column) == (2, 7)
+    assert first_error.text == "NAND N! 2;"
+    assert second_error.code == parser.MISSING_DELIMITER
+    assert third_error.code == parser.network.DEVICE_ABSENT
+    assert (third_error.line, third_error.column,
+            third_error.span) == (3, 18, 2)
+    assert parser.error_counter == 3
@@ -0,0 +1,151 @@
+"""Test the simulator module."""
+import pytest
+
+from simulator import Simulator
+
+DEFINITION = """DEVICES:
+SWITCH sw1 0,
+SWITCH sw2 1,
+NAND n1 2,
+CLOCK clk 2;
+
+CONNECTIONS:
+sw1 -> n1.I1,
+sw2 -> n1.I2;
+
+MONITOR:
+sw1,
+n1,
+clk;
+"""
+
+
+@pytest.fixture
+def new_simulator():
+    """Return a Simulator for a NAND gate, two switches and a clock."""
+    return Simulator.from_string(DEFINITION)
+
+
+def test_run_and_traces(new_simulator):
+    """Test if traces returns the recorded signals without copying."""
+    devices = new_simulator.devices
+    assert new_simulator.get_monitor_names() == ["sw1", "n1", "clk"]
+
+    assert new_simulator.run(2)
+    assert new_simulator.set_switches({"sw1": 1})
+    assert new_simulator.run(2)
+
+    traces = new_simulator.traces()
+    assert traces.shape == (3, 4)
+    assert new_simulator.get_trace_set()["n1"].tolist() == traces[1].tolist()
+    assert str(traces.dtype) == "int8"
+    assert traces.base is not None  # a view of the trace store
+    assert traces[0].tolist() == [devices.LOW, devices.LOW,
+                                  devices.HIGH, devices.HIGH]
+    assert traces[1].tolist() == [devices.HIGH, devices.HIGH,
+                                  devices.LOW, devices.LOW]
+
+    # The store grows for long runs
+    assert new_simulator.run(3000)
+    assert new_simulator.traces().shape == (3, 3004)
+
+    assert new_simulator.run(5, restart=True)
+    assert new_simulator.traces().shape == (3, 5)
+
+
+def test_checkpoint_restore(new_simulator):
+    """Test if restore continues the simulation from a checkpoint."""
+    new_simulator.run(3)
+    checkpoint = new_simulator.checkpoint()
+    new_simulator.run(6)
+    expected = new_simulator.traces().tolist()
+
+    new_simulator.set_switches({"sw1": 1})
+    new_simulator.run(10)
+    new_simulator.restore(checkpoint)
+    assert new_simulator.traces().shape == (3, 3)
+    new_simulator.run(6)
+    assert new_simulator.traces().tolist() == expected
+
+
+def test_set_switches_errors(new_simulator):
+    """Test if set_switches reports unknown switches."""
+    assert not new_simulator.set_switches({"n1": 1})
+    assert not new_simulator.set_switches({"sw9": 1})
+
+
+def test_invalid_definition():
+    """Test if an invalid definition raises an error with its messages."""
+    with pytest.raises(ValueError):
+        Simulator.from_string("DEVICES:\nSWITCH sw1 0\n")
+    with pytest.raises(FileNotFoundError):
+        Simulator.from_file("no_such_file.txt")
+
+
+def test_load_stimulus(new_simulator, tmp_path):
+    """Test if a stimulus sets switches at cycles counted from a restart."""
+    path = tmp_path / "stimulus.txt"
+    path.write_text("2: sw1 = 1\n3 every 2: sw2 = 0\n")
+    assert new_simulator.load_stimulus(str(path)) == []
+    assert new_simulator.run(6)
+    assert new_simulator.traces()[1].tolist() == [1, 1, 0, 1, 1, 1]
+
+    path.write_text("0: clk = 1\n")
+    assert new_simulator.load_stimulus(str(path)) == [
+        "Line 1: clk is not a switch."]
+    assert new_simulator.stimulus is not None
+
+
+def test_watchpoints(new_simulator):
+    """Test if a break stops a run and watches record their hits."""
+    new_simulator.add_watch("clk == RISING")
+    new_simulator.add_watch("sw1 and n1 == LOW",
+                            new_simulator.watchpoints.BREAK)
+    with pytest.raises(ValueError, match="sw3 is not an output."):
+        new_simulator.add_watch("sw3")
+
+    assert new_simulator.run(4)
+    assert new_simulator.watchpoints.stop is None
+    new_simulator.set_switches({"sw1": 1})
+    assert new_simulator.run(10)
+    assert new_simulator.cycles == 5
+    assert new_simulator.watchpoints.stop[1] == 4
+    assert new_simulator.get_watch_hits()["sw1 and n1 == LOW"] == [4]
+
+    # sw1 is still high, and the hits of the previous run are deleted
+    assert new_simulator.run(2, restart=True)
+    assert new_simulator.cycles == 1
+    assert new_simulator.get_watch_hits()["sw1 and n1 == LOW"] == [0]
+
+
+def test_pruning(new_simulator):
+    """Test if pruning keeps the monitors and watchpoints correct."""
+    new_simulator.add_watch("sw2 == HIGH")
+    names = new_simulator.names
+    [SW2_ID, N1_ID] = names.lookup(["sw2", "n1"])
+    new_simulator.monitors.remove_monitor(N1_ID, None)
+    new_simulator.set_pruning(True)
+    assert SW2_ID in new_simulator.network.active_devices
+    assert N1_ID not in new_simulator.network.active_devices
+
+    expected_simulator = Simulator.from_string(DEFINITION)
+    for simulator in [new_simulator, expected_simulator]:
+        simulator.devices.set_seed(1)
+        assert simulator.run(4, restart=True)
+        assert simulator.set_switches({"sw1": 1, "sw2": 0})
+        assert simulator.run(4)
+    # rows 0 and 2 are sw1 and clk
+    assert new_simulator.traces()[[0, 2]].tolist() == \
+        expected_simulator.traces()[[0, 2]].tolist()
+    assert new_simulator.get_watch_hits() == {"sw2 == HIGH": [0, 1, 2, 3]}
+
+
+def test_default_seed():
+    """Test if simulators start up the same way unless a seed is given."""
+    simulator = Simulator.from_string(DEFINITION)
+    other_simulator = Simulator.from_string(DEFINITION)
+    assert simulator.get_seed() == 0
+    assert simulator.run(8)
+    assert other_simulator.run(8)
+    assert simulator.traces().tolist() == other_simulator.traces().tolist()
+    assert Simulator.from_string(DEFINITION, seed=None).get_seed() is None
@@ -0,0 +1,90 @@
+"""Test the stimulus module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from stimulus import Stimulus
+
+
+@pytest.fixture
+def new_stimulus():
+    """Return a Stimulus instance for two switches and a NAND gate."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    [SW1_ID, SW2_ID, NAND1_ID] = new_names.lookup(["Sw1", "Sw2", "Nand1"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(NAND1_ID, new_devices.NAND, 2)
+    return Stimulus(new_names, new_devices)
+
+
+def switch_levels(stimulus, cycles):
+    """Apply the stimulus over some cycles and return [Sw1, Sw2] levels."""
+    [SW1_ID, SW2_ID] = stimulus.names.lookup(["Sw1", "Sw2"])
+    level_list = []
+    for cycle in range(cycles):
+        assert stimulus.apply(cycle)
+        level_list.append([stimulus.devices.get_device(SW1_ID).switch_state,
+                           stimulus.devices.get_device(SW2_ID).switch_state])
+    return level_list
+
+
+def test_load_lines(new_stimulus):
+    """Test if single changes and patterns are applied at their cycles."""
+    assert new_stimulus.load_lines(["# start with both switches high",
+                                    "0: Sw1 = 1, Sw2 = 1",
+                                    "",
+                                    "2: Sw2 = 010  # three cycles"]) == []
+    assert switch_levels(new_stimulus, 6) == [[1, 1], [1, 1], [1, 0],
+                                              [1, 1], [1, 0], [1, 0]]
+
+
+def test_repeated_changes(new_stimulus):
+    """Test if 'every' and 'times' repeat a pattern."""
+    assert new_stimulus.load_lines(["1 every 2: Sw1 = 10",
+                                    "0 every 3 times 2: Sw2 = 1",
+                                    "4: Sw2 = 0"]) == []
+    assert new_stimulus.rules[0][:3] == [1, 2, None]
+    assert switch_levels(new_stimulus, 10) == [
+        [0, 1], [1, 1], [1, 1], [0, 1], [0, 0],
+        [1, 0], [1, 0], [0, 0], [0, 0], [1, 0]]
+
+
+def test_expand_limit(new_stimulus):
+    """Test if long repeated changes are kept as rules."""
+    new_stimulus.expand_limit = 2
+    assert new_stimulus.load_lines(["0 every 2 times 3: Sw1 = 1",
+                                    "1 every 2 times 3: Sw1 = 0"]) == []
+    assert new_stimulus.changes == {}
+    # the rules stop after three repeats
+    assert [level for level, _ in switch_levels(new_stimulus, 8)] == [
+        1, 0, 1, 0, 1, 0, 0, 0]
+
+
+@pytest.mark.parametrize("line, expected_error", [
+    ("Sw1 = 1", "Line 1: Expected 'cycle [every N [times N]]: "
+                "switch = levels'."),
+    ("5 every 0: Sw1 = 1", "Line 1: Period must be greater than 0."),
+    ("5: Sw1 = 2", "Line 1: Expected 'switch = levels'."),
+    ("5: Sw1 = 1, Nand1 = 1", "Line 1: Nand1 is not a switch."),
+    ("5: Sw3 = 1", "Line 1: Sw3 is not a switch."),
+])
+def test_load_lines_errors(new_stimulus, line, expected_error):
+    """Test if invalid lines are reported and skipped."""
+    assert new_stimulus.load_lines([line]) == [expected_error]
+    assert new_stimulus.changes == {}
+    assert new_stimulus.rules == []
+
+
+def test_load_file(new_stimulus, tmp_path):
+    """Test if a stimulus is read from a file, and missing files reported."""
+    path = tmp_path / "stimulus.txt"
+    path.write_text("0: Sw1 = 1\n1 every 1 times 2: Sw2 = 1\n")
+    assert new_stimulus.load_file(str(path)) == []
+    assert switch_levels(new_stimulus, 3) == [[1, 0], [1, 1], [1, 1]]
+
+    assert new_stimulus.load_file(str(tmp_path / "missing.txt")) == [
+        "Cannot open stimulus file."]
+
+    new_stimulus.clear()
+    assert new_stimulus.changes == {}
@@ -0,0 +1,59 @@
+"""Test the tracediff module."""
+from traces import ChangeTrace, TraceFile
+from tracediff import (to_array, read_trace_file, save_trace_set,
+                       load_trace_set, diff_signal, diff_trace_sets)
+
+
+def test_to_array():
+    """Test if change-only traces are expanded into signal levels."""
+    trace = ChangeTrace()
+    for signal in [0, 0, 1, 1, 1, 3, 0]:
+        trace.append(signal)
+    assert to_array(trace).tolist() == [0, 0, 1, 1, 1, 3, 0]
+    assert to_array([1, 0]).tolist() == [1, 0]
+    assert to_array(ChangeTrace()).tolist() == []
+
+
+def test_read_trace_file():
+    """Test if the signals of a TraceFile are read as a trace set."""
+    trace_file = TraceFile(2)
+    for cycle in range(5):
+        trace_file.append([cycle % 2, 1])
+    trace_set = read_trace_file(trace_file, ["a", "b"])
+    assert trace_set["a"].tolist() == [0, 1, 0, 1, 0]
+    assert trace_set["b"].tolist() == [1] * 5
+    trace_file.close()
+
+
+def test_diff_signal():
+    """Test if diff_signal finds the differing cycles and windows."""
+    golden = [0, 0, 1, 1, 0, 0, 1, 1]
+    assert diff_signal(golden, golden) == {
+        "first_divergence": None, "differing_cycles": 0,
+        "golden_cycles": 8, "current_cycles": 8, "windows": []}
+
+    result = diff_signal(golden, [0, 1, 1, 0, 0, 0, 1, 1, 1, 1])
+    assert result["first_divergence"] == 1
+    assert result["differing_cycles"] == 4
+    assert result["windows"] == [[1, 2], [3, 4], [8, 10]]
+    assert diff_signal(golden, [1] * 8, max_windows=1)["windows"] == [[0, 2]]
+
+
+def test_diff_trace_sets(tmp_path):
+    """Test if stored trace sets are compared with a new run."""
+    change_trace = ChangeTrace()
+    for signal in [0, 1, 1, 1]:
+        change_trace.append(signal)
+    path = str(tmp_path / "golden.npz")
+    save_trace_set(path, {"clk": change_trace, "d1.Q": [1, 1, 1, 1]})
+    golden_set = load_trace_set(path)
+    assert list(golden_set) == ["clk", "d1.Q"]
+
+    result = diff_trace_sets(golden_set, {"clk": [0, 1, 1, 1],
+                                          "d1.Q": [1, 1, 0, 1],
+                                          "sw1": [0, 0, 0, 0]})
+    assert result["clk"]["differing_cycles"] == 0
+    assert result["d1.Q"]["first_divergence"] == 2
+    assert not result["d1.Q"]["missing"]
+    assert result["sw1"]["missing"]
+    assert result["sw1"]["differing_cycles"] == 4
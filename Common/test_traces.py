@@ -0,0 +1,206 @@
+"""Test the traces module."""
+import random
+
+import pytest
+
+from names import Names
+from devices import Devices
+from traces import ChangeTrace, EdgeTrace, FileEdgeTrace, TraceFile
+
+
+@pytest.fixture
+def new_trace():
+    """Return a ChangeTrace instance with ten recorded cycles."""
+    new_trace = ChangeTrace()
+    for signal in [0, 0, 0, 1, 1, 2, 1, 1, 1, 0]:
+        new_trace.append(signal)
+    return new_trace
+
+
+def test_append(new_trace):
+    """Test if append only stores the cycles where the signal changes."""
+    assert len(new_trace) == 10
+    assert new_trace.get_changes() == [[0, 0], [3, 1], [5, 2], [6, 1],
+                                       [9, 0]]
+
+
+@pytest.mark.parametrize("cycle, expected_signal", [
+    (0, 0),
+    (2, 0),
+    (3, 1),
+    (5, 2),
+    (8, 1),
+    (9, 0),
+    (10, None),
+    (-1, None),
+])
+def test_get_signal(new_trace, cycle, expected_signal):
+    """Test if get_signal returns the signal level at a cycle."""
+    assert new_trace.get_signal(cycle) == expected_signal
+
+
+def test_to_list(new_trace):
+    """Test if to_list expands the changes into signal levels."""
+    assert new_trace.to_list() == [0, 0, 0, 1, 1, 2, 1, 1, 1, 0]
+    assert new_trace.to_list(4, 7) == [1, 2, 1]
+    assert new_trace.to_list(8, 20) == [1, 0]
+    assert new_trace.to_list(7, 7) == []
+
+
+def test_clear(new_trace):
+    """Test if clear deletes all recorded cycles."""
+    new_trace.clear()
+    assert len(new_trace) == 0
+    assert new_trace.to_list() == []
+    new_trace.append(1)
+    assert new_trace.get_changes() == [[0, 1]]
+
+
+@pytest.fixture
+def new_edge_trace():
+    """Return an EdgeTrace instance with thirteen recorded cycles."""
+    new_edge_trace = EdgeTrace(Devices(Names()))
+    # LOW, HIGH and one BLANK cycle
+    new_edge_trace.extend([0, 0, 1, 1, 1, 0, 4, 1, 0, 0, 1, 1, 0])
+    return new_edge_trace
+
+
+def test_edge_trace(new_edge_trace):
+    """Test if the edges are indexed, with no edge next to BLANK cycles."""
+    devices = new_edge_trace.devices
+    assert len(new_edge_trace) == 13
+    assert new_edge_trace.get_signal(6) == devices.BLANK
+    assert new_edge_trace.get_edges(devices.RISING) == [2, 10]
+    assert new_edge_trace.get_edges(devices.FALLING) == [5, 8, 12]
+    assert new_edge_trace.get_edges() == [2, 5, 8, 10, 12]
+    assert new_edge_trace.get_edges(devices.FALLING, 6) == [8, 12]
+    assert new_edge_trace.count_edges(devices.RISING) == 2
+    assert new_edge_trace.count_edges(None, 3, 10) == 2
+    assert new_edge_trace.count_edges(None, 10, 3) == 0
+
+    # RISING and FALLING cycles count as HIGH and LOW
+    new_edge_trace.clear()
+    new_edge_trace.extend([devices.LOW, devices.RISING, devices.HIGH,
+                           devices.FALLING])
+    assert new_edge_trace.get_edges() == [1, 3]
+    assert new_edge_trace.get_changes() == [[0, 0], [1, 2], [2, 1], [3, 3]]
+
+
+@pytest.mark.parametrize("n, edge_name, expected_cycle", [
+    (1, None, 2),
+    (5, None, 12),
+    (6, None, None),
+    (0, None, None),
+    (2, "RISING", 10),
+    (3, "RISING", None),
+    (2, "FALLING", 8),
+])
+def test_get_nth_edge(new_edge_trace, n, edge_name, expected_cycle):
+    """Test if get_nth_edge returns the cycle of the nth edge."""
+    edge = None
+    if edge_name is not None:
+        edge = getattr(new_edge_trace.devices, edge_name)
+    assert new_edge_trace.get_nth_edge(n, edge) == expected_cycle
+
+
+def test_previous_and_next_edge(new_edge_trace):
+    """Test if the edges either side of a cycle are found."""
+    devices = new_edge_trace.devices
+    assert new_edge_trace.get_previous_edge(9) == 8
+    assert new_edge_trace.get_previous_edge(8) == 8
+    assert new_edge_trace.get_previous_edge(1) is None
+    assert new_edge_trace.get_previous_edge(9, devices.RISING) == 2
+    assert new_edge_trace.get_next_edge(10) == 12
+    assert new_edge_trace.get_next_edge(12) is None
+    assert new_edge_trace.get_next_edge(0, devices.FALLING) == 5
+
+
+def test_get_pulse_widths(new_edge_trace):
+    """Test if complete pulses are found, skipping those broken by BLANK."""
+    devices = new_edge_trace.devices
+    assert new_edge_trace.get_pulse_widths() == [[2, 3], [10, 2]]
+    assert new_edge_trace.get_pulse_widths(devices.HIGH, 3) == [[10, 2]]
+    assert new_edge_trace.get_pulse_widths(devices.HIGH, 0, 12) == [[2, 3]]
+    assert new_edge_trace.get_pulse_widths(devices.LOW) == [[8, 2]]
+
+
+def test_trace_file():
+    """Test if TraceFile returns the signals written to the file."""
+    trace_file = TraceFile(3)
+    trace_file.pending_limit = 8  # write to the file every few cycles
+    for cycle in range(10):
+        trace_file.append([cycle % 2, 1, cycle % 5])
+    assert len(trace_file) == 10
+
+    assert trace_file.get_window(2, 4) == bytes([0, 1, 2, 1, 1, 3])
+    assert trace_file.get_signal(0, 0, 4) == [0, 1, 0, 1]
+    assert trace_file.get_signal(2, 7, 20) == [2, 3, 4]
+    assert trace_file.get_signal(1, 10, 20) == []
+
+    # Cycles recorded after a window was read are also returned
+    trace_file.append([4, 4, 4])
+    assert trace_file.get_signal(1, 8, 11) == [1, 1, 4]
+
+    trace_file.clear()
+    assert len(trace_file) == 0
+    assert trace_file.get_signal(0, 0, 10) == []
+    trace_file.append([1, 0, 1])
+    assert trace_file.get_window(0, 1) == bytes([1, 0, 1])
+    assert trace_file.read_signal(2, 0, 5) == bytes([1])
+
+    # One thread reads every prefetched window
+    trace_file.prefetch(0, 1)
+    prefetch_thread = trace_file.prefetch_thread
+    trace_file.prefetch(0, 1)
+    assert trace_file.prefetch_thread is prefetch_thread
+    trace_file.close()
+    prefetch_thread.join(1)
+    assert not prefetch_thread.is_alive()
+
+
+def test_file_edge_trace():
+    """Test if FileEdgeTrace gives the same answers as EdgeTrace."""
+    devices = Devices(Names())
+    rng = random.Random(1)
+    trace_file = TraceFile(2)
+    edge_trace = EdgeTrace(devices)
+    file_edge_trace = FileEdgeTrace(devices, trace_file, 1, chunk_size=7)
+    for cycle in range(100):
+        signal = rng.choice([0, 0, 1, 1, 2, 3, 4])
+        trace_file.append([0, signal])
+        edge_trace.append(signal)
+        assert len(file_edge_trace) == cycle + 1
+        if cycle % 31 == 0:  # queries made while the file grows
+            assert file_edge_trace.get_edges() == edge_trace.get_edges()
+
+    assert file_edge_trace.get_signal(50) == edge_trace.get_signal(50)
+    assert file_edge_trace.get_signal(100) is None
+    for edge in [None, devices.RISING, devices.FALLING]:
+        assert file_edge_trace.get_edges(edge) == edge_trace.get_edges(edge)
+        for [start, end] in [[0, None], [3, 50], [14, 21], [60, 200]]:
+            assert file_edge_trace.count_edges(edge, start, end) == \
+                edge_trace.count_edges(edge, start, end)
+            assert file_edge_trace.get_edges(edge, start, end) == \
+                edge_trace.get_edges(edge, start, end)
+        for n in [0, 1, 5, 20, 1000]:
+            assert file_edge_trace.get_nth_edge(n, edge) == \
+                edge_trace.get_nth_edge(n, edge)
+        for cycle in [-1, 0, 13, 14, 55, 99, 150]:
+            assert file_edge_trace.get_previous_edge(cycle, edge) == \
+                edge_trace.get_previous_edge(cycle, edge)
+            assert file_edge_trace.get_next_edge(cycle, edge) == \
+                edge_trace.get_next_edge(cycle, edge)
+    for level in [devices.HIGH, devices.LOW]:
+        assert file_edge_trace.get_pulse_widths(level, 5, 90) == \
+            edge_trace.get_pulse_widths(level, 5, 90)
+    # only the counts of complete chunks are kept, not the edges
+    assert len(file_edge_trace.rising_counts) == 100 // 7
+    assert len(file_edge_trace.chunk_cache) <= \
+        file_edge_trace.chunk_cache_size
+
+    trace_file.clear()
+    file_edge_trace.clear()
+    trace_file.append([0, 1])
+    trace_file.append([0, 0])
+    assert file_edge_trace.get_edges() == [1]
+    trace_file.close()
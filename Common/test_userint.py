@@ -0,0 +1,117 @@
+"""Test the userint module."""
+import io
+import json
+
+import pytest
+
+from names import Names
+from network import Network
+from devices import Devices
+from monitors import Monitors
+from userint import UserInterface
+
+
+@pytest.fixture
+def new_userint():
+    """Return a UserInterface instance for a switch driving a NOT gate."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+    new_monitors = Monitors(new_names, new_devices, new_network)
+
+    [SW1_ID, NOT1_ID, I1] = new_names.lookup(["Sw1", "Not1", "I1"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(NOT1_ID, new_devices.NOT)
+    new_network.make_connection(SW1_ID, None, NOT1_ID, I1)
+    new_monitors.make_monitor(NOT1_ID, None)
+
+    return UserInterface(new_names, new_devices, new_network, new_monitors)
+
+
+def run_script(userint, script):
+    """Run a script and return whether it succeeded and its results."""
+    stream = io.StringIO()
+    ok = userint.command_script(script.splitlines(), stream)
+    return [ok, [json.loads(line) for line in stream.getvalue().splitlines()]]
+
+
+def test_command_script(new_userint):
+    """Test if a script runs its commands and loops without prompting."""
+    [ok, results] = run_script(new_userint, "r 2  # start\n"
+                                            "repeat 2\n"
+                                            "  s Sw1 1\n"
+                                            "  c 1 *2\n"
+                                            "  s Sw1 0\n"
+                                            "end\n"
+                                            "d 0 8\n"
+                                            "q\n"
+                                            "r 5\n")
+    assert ok
+    assert [result["command"] for result in results] == [
+        "r 2", "s Sw1 1", "c 1", "c 1", "s Sw1 0",
+        "s Sw1 1", "c 1", "c 1", "s Sw1 0", "d 0 8"]
+    assert [result["line"] for result in results][:3] == [1, 3, 4]
+    assert results[-2]["cycles_completed"] == 6
+    assert results[-1]["output"] == ["Not1: --____"]
+
+
+def test_command_script_errors(new_userint):
+    """Test if failed commands and invalid scripts are reported."""
+    [ok, results] = run_script(new_userint, "c 3\nr 1\n")
+    assert not ok
+    assert results[0]["ok"] is False
+    assert results[0]["output"] == ["Error: Nothing to continue. Run first."]
+    assert results[1]["ok"] is True
+
+    # each command handler reports whether it succeeded
+    [ok, results] = run_script(new_userint, "m Sw1\nz Sw9\nd 0\n")
+    assert [result["ok"] for result in results] == [True, False, False]
+
+    # trailing text is an error, and '*N' may follow the last argument
+    [ok, results] = run_script(new_userint, "r 1 2\nr 1\nc 5*2\nm Sw1 x\n")
+    assert [result["ok"] for result in results] == [
+        False, True, True, True, False]
+    assert results[0]["output"] == [
+        "Error: Unexpected text after the command."]
+    assert results[3]["cycles_completed"] == 11
+
+    [ok, results] = run_script(new_userint, "repeat 2\nr 1\n")
+    assert not ok
+    assert results == [{"line": None, "command": None, "ok": False,
+                        "output": ["Missing 'end' for 'repeat'."]}]
+
+
+def test_stimulus_command(new_userint, tmp_path):
+    """Test if a loaded stimulus sets switches during runs and continues."""
+    path = tmp_path / "stimulus.txt"
+    path.write_text("1: Sw1 = 1\n3 every 2: Sw1 = 01\n")
+    [ok, results] = run_script(new_userint, "t {}\nr 3\nc 3\nd\n"
+                                            "t {}\n".format(
+                                                path, tmp_path / "missing"))
+    assert not ok
+    assert results[0]["output"] == ["Successfully loaded stimulus."]
+    assert results[3]["output"] == ["Not1: -__--_"]
+    assert results[4]["output"] == ["Error: Cannot open stimulus file."]
+
+
+def test_watch_commands(new_userint):
+    """Test if breaks stop runs, watches record hits and assertions fail."""
+    [ok, results] = run_script(new_userint, "w Not1 == LOW\n"
+                                            "b Sw1 and Not1 == LOW\n"
+                                            "b Sw2\n"
+                                            "r 2\ns Sw1 1\nc 5\nw\n"
+                                            "x\na Not1\nc 3\n")
+    assert not ok
+    assert results[0]["output"] == ["Successfully added watch."]
+    assert results[1]["output"] == ["Successfully added break."]
+    assert results[2]["output"] == ["Error: Sw2 is not an output."]
+    assert results[5]["output"][0] == "Stopped at cycle 2: Sw1 and Not1 == LOW"
+    assert [result["ok"] for result in results] == [
+        True, True, False, True, True, True, True, True, True, False]
+    assert results[5]["cycles_completed"] == 3
+    assert results[6]["output"] == [
+        "watch Not1 == LOW: 1 hits at cycles 2",
+        "break Sw1 and Not1 == LOW: 1 hits at cycles 2"]
+    assert results[-1]["output"][0] == \
+        "Error: Assertion failed at cycle 3: Not1"
+    assert results[-1]["cycles_completed"] == 4
@@ -0,0 +1,119 @@
+"""Test the watchpoints module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from watchpoints import Watchpoints
+
+
+@pytest.fixture
+def new_watchpoints():
+    """Return a Watchpoints instance for a switch and a D-type."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    [SW1_ID, D1_ID] = new_names.lookup(["Sw1", "D1"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    return Watchpoints(new_names, new_devices)
+
+
+def set_outputs(watchpoints, switch_level, q_level):
+    """Set the outputs of Sw1 and D1 directly."""
+    names = watchpoints.names
+    devices = watchpoints.devices
+    [SW1_ID, D1_ID] = names.lookup(["Sw1", "D1"])
+    devices.get_device(SW1_ID).outputs[None] = switch_level
+    d1_outputs = devices.get_device(D1_ID).outputs
+    d1_outputs[devices.Q_ID] = q_level
+    d1_outputs[devices.QBAR_ID] = 1 - q_level
+
+
+@pytest.mark.parametrize("expression, switch_level, q_level, expected", [
+    ("Sw1", 1, 0, True),
+    ("Sw1", 0, 0, False),
+    ("not Sw1", 0, 0, True),
+    ("D1.Q == HIGH and Sw1 == LOW", 0, 1, True),
+    ("D1.Q == HIGH and Sw1 == LOW", 1, 1, False),
+    ("Sw1 or D1.QBAR != 1", 0, 0, False),
+    ("not (Sw1 or D1.Q) or D1.QBAR != 1", 1, 1, True),
+    ("Sw1 == D1.Q", 1, 1, True),
+    ("0 == D1.QBAR", 0, 1, True),
+])
+def test_compile_expression(new_watchpoints, expression, switch_level,
+                            q_level, expected):
+    """Test if compiled conditions read the current device outputs."""
+    [predicate, error] = new_watchpoints.compile_expression(expression)
+    assert error is None
+    set_outputs(new_watchpoints, switch_level, q_level)
+    assert predicate() is expected
+
+
+@pytest.mark.parametrize("expression, expected_error", [
+    ("", "Expected a condition."),
+    ("Sw2", "Sw2 is not an output."),
+    ("D1.DATA", "D1.DATA is not an output."),
+    ("Sw1 ==", "Unexpected end of condition."),
+    ("Sw1 & D1.Q", "Invalid character '&'."),
+    ("(Sw1", "Expected ')'."),
+    ("Sw1 D1.Q", "Unexpected 'D1.Q'."),
+    ("HIGH", "Expected a signal before or after a level."),
+    ("(Sw1 or D1.Q) == 1", "Cannot compare a condition."),
+])
+def test_compile_expression_errors(new_watchpoints, expression,
+                                   expected_error):
+    """Test if invalid conditions are reported and not added."""
+    assert new_watchpoints.compile_expression(expression) == [
+        None, expected_error]
+    assert new_watchpoints.add_watch(expression) == expected_error
+    assert new_watchpoints.watchpoint_list == []
+
+
+def test_check(new_watchpoints):
+    """Test if watches record hits and breaks and assertions stop runs."""
+    assert new_watchpoints.add_watch("Sw1") is None
+    assert new_watchpoints.add_watch("D1.Q",
+                                     new_watchpoints.BREAK) is None
+    assert new_watchpoints.add_watch("D1.QBAR or Sw1",
+                                     new_watchpoints.ASSERT) is None
+
+    stop_cycle = None
+    for cycle, [switch_level, q_level] in enumerate([[1, 0], [0, 0], [1, 0],
+                                                     [1, 1], [1, 0]]):
+        set_outputs(new_watchpoints, switch_level, q_level)
+        if new_watchpoints.check(cycle):
+            stop_cycle = cycle
+            break
+    assert stop_cycle == 3
+    [watch, break_point, assertion] = new_watchpoints.watchpoint_list
+    assert new_watchpoints.stop == [break_point, 3]
+    assert watch.hit_cycles == [0, 2, 3]
+
+    # An assertion hits where its condition fails
+    set_outputs(new_watchpoints, 0, 1)
+    assert new_watchpoints.check(4)
+    assert new_watchpoints.stop == [break_point, 4]
+    set_outputs(new_watchpoints, 0, 0)
+    assert not new_watchpoints.check(5)
+    set_outputs(new_watchpoints, 0, 1)
+    new_watchpoints.watchpoint_list.remove(break_point)
+    assert new_watchpoints.check(6)
+    assert new_watchpoints.stop == [assertion, 6]
+    assert new_watchpoints.get_report() == [
+        "watch Sw1: 3 hits at cycles 0, 2, 3",
+        "assert D1.QBAR or Sw1: 2 hits at cycles 4, 6"]
+
+    new_watchpoints.reset_hits()
+    assert watch.hit_count == 0
+    assert new_watchpoints.stop is None
+    new_watchpoints.clear()
+    assert new_watchpoints.get_report() == []
+
+
+def test_get_signals(new_watchpoints):
+    """Test if the outputs read by the watchpoints are listed once."""
+    [SW1_ID, D1_ID] = new_watchpoints.names.lookup(["Sw1", "D1"])
+    Q_ID = new_watchpoints.devices.Q_ID
+    assert new_watchpoints.add_watch("Sw1 == HIGH and not D1.Q") is None
+    assert new_watchpoints.add_watch("D1.Q != Sw1 or 1 == Sw1",
+                                     new_watchpoints.BREAK) is None
+    assert new_watchpoints.get_signals() == [(SW1_ID, None), (D1_ID, Q_ID)]
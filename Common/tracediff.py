@@ -0,0 +1,124 @@
+"""Compare signal traces with stored golden traces.
+
+Used in the Logic Simulator project to check that a new run of a circuit
+gives the same monitored signals as a stored, known-good run. The comparison
+is vectorised, so traces of millions of cycles are compared in milliseconds.
+
+A trace set is a dictionary {signal_name: trace}. A trace can be a list or
+array of signal levels, a traces.ChangeTrace() or, through read_trace_file(),
+the signals stored in a traces.TraceFile().
+
+Functions
+---------
+to_array - converts a trace to an int8 array of signal levels.
+read_trace_file - returns a trace set from a traces.TraceFile().
+save_trace_set - stores a trace set in a file.
+load_trace_set - loads a trace set stored by save_trace_set.
+diff_signal - compares two traces of one signal.
+diff_trace_sets - compares a trace set with a golden trace set.
+"""
+import numpy as np
+
+from traces import ChangeTrace
+
+
+def to_array(trace):
+    """Return a trace as an int8 array of signal levels, one per cycle.
+
+    A traces.ChangeTrace() is expanded from its changes without a Python
+    loop over the cycles.
+    """
+    if isinstance(trace, ChangeTrace):
+        change_cycles = np.frombuffer(trace.change_cycles, dtype=np.int64)
+        change_signals = np.frombuffer(trace.change_signals, dtype=np.int8)
+        run_lengths = np.diff(np.append(change_cycles, len(trace)))
+        return np.repeat(change_signals, run_lengths)
+    return np.asarray(trace, dtype=np.int8)
+
+
+def read_trace_file(trace_file, signal_names):
+    """Return the signals stored in a traces.TraceFile() as a trace set.
+
+    signal_names lists the name of each signal in the file, in order. The
+    arrays are views of one copy of the file's contents.
+    """
+    cycles = len(trace_file)
+    window = np.frombuffer(trace_file.get_window(0, cycles), dtype=np.int8)
+    window = window.reshape(cycles, trace_file.signal_count)
+    return {signal_name: window[:, index]
+            for index, signal_name in enumerate(signal_names)}
+
+
+def save_trace_set(path, trace_set):
+    """Store a trace set in a compressed NumPy file at path."""
+    signal_names = list(trace_set)
+    np.savez_compressed(
+        path, signal_names=np.array(signal_names, dtype=str),
+        **{"trace_{}".format(index): to_array(trace_set[signal_name])
+           for index, signal_name in enumerate(signal_names)})
+
+
+def load_trace_set(path):
+    """Return the trace set stored by save_trace_set at path."""
+    with np.load(path) as stored:
+        return {str(signal_name): stored["trace_{}".format(index)]
+                for index, signal_name in enumerate(stored["signal_names"])}
+
+
+def diff_signal(golden, current, max_windows=None):
+    """Compare two traces of one signal.
+
+    Return a dictionary with the first cycle where they differ (None if they
+    are the same), the number of differing cycles and the windows
+    [start, end] (end excluded) of consecutive differing cycles. If one trace
+    is longer, its extra cycles count as differing. At most max_windows
+    windows are listed, all of them if max_windows is None.
+    """
+    golden = to_array(golden)
+    current = to_array(current)
+    common = min(len(golden), len(current))
+    longest = max(len(golden), len(current))
+
+    differ = np.ones(longest, dtype=bool)
+    differ[:common] = golden[:common] != current[:common]
+    differ_cycles = np.flatnonzero(differ)
+
+    windows = []
+    if len(differ_cycles):
+        # A window ends where the next differing cycle is not adjacent
+        breaks = np.flatnonzero(np.diff(differ_cycles) > 1)
+        starts = np.concatenate(([differ_cycles[0]],
+                                 differ_cycles[breaks + 1]))
+        ends = np.concatenate((differ_cycles[breaks] + 1,
+                               [differ_cycles[-1] + 1]))
+        if max_windows is not None:
+            starts = starts[:max_windows]
+            ends = ends[:max_windows]
+        windows = np.column_stack((starts, ends)).tolist()
+
+    return {"first_divergence": (int(differ_cycles[0])
+                                 if len(differ_cycles) else None),
+            "differing_cycles": int(len(differ_cycles)),
+            "golden_cycles": len(golden),
+            "current_cycles": len(current),
+            "windows": windows}
+
+
+def diff_trace_sets(golden_set, current_set, max_windows=None):
+    """Compare a trace set with a golden trace set.
+
+    Return a dictionary {signal_name: result} for every signal in either
+    set, where result is as returned by diff_signal, with "missing" set to
+    True if the signal is only in one of the sets.
+    """
+    result_dictionary = {}
+    for signal_name in list(golden_set) + [signal_name for signal_name
+                                           in current_set
+                                           if signal_name not in golden_set]:
+        missing = signal_name not in golden_set or \
+            signal_name not in current_set
+        result = diff_signal(golden_set.get(signal_name, []),
+                             current_set.get(signal_name, []), max_windows)
+        result["missing"] = missing
+        result_dictionary[signal_name] = result
+    return result_dictionary
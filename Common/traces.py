@@ -0,0 +1,739 @@
+"""Store signal traces in compact form.
+
+Used in the Logic Simulator project to keep the signal history of outputs
+without storing one value per simulation cycle.
+
+Classes
+-------
+ChangeTrace - stores a signal trace as the cycles at which it changes.
+EdgeTrace - stores a signal trace with an index of its rising and falling
+            edges.
+FileEdgeTrace - indexes the edges of a signal stored in a TraceFile.
+TraceFile - stores the traces of many signals in a memory-mapped file.
+"""
+import collections
+import mmap
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+class ChangeTrace:
+    """Store a signal trace as the cycles at which the signal changes.
+
+    A signal that stays at the same level for many cycles is stored as a
+    single change, so long runs of a slow signal take almost no memory.
+    Signal levels are stored as the signal constants of the
+    devices.Devices() class.
+
+    Parameters
+    ----------
+    No parameters.
+
+    Public methods
+    --------------
+    append(self, signal): Records the signal level for the next cycle.
+
+    clear(self): Deletes all recorded cycles.
+
+    get_signal(self, cycle): Returns the signal level at the given cycle.
+
+    get_changes(self): Returns the list of [cycle, signal] changes.
+
+    to_list(self, start=0, end=None): Returns the signal levels of a range
+                                      of cycles as a list.
+    """
+
+    def __init__(self):
+        """Initialise an empty trace."""
+        # change_cycles[i] is the first cycle at level change_signals[i]
+        self.change_cycles = array('q')
+        self.change_signals = array('b')
+        self.length = 0
+
+    def __len__(self):
+        """Return the number of cycles recorded."""
+        return self.length
+
+    def append(self, signal):
+        """Record the signal level for the next cycle."""
+        if not self.change_signals or self.change_signals[-1] != signal:
+            self.change_cycles.append(self.length)
+            self.change_signals.append(signal)
+        self.length += 1
+
+    def clear(self):
+        """Delete all recorded cycles."""
+        del self.change_cycles[:]
+        del self.change_signals[:]
+        self.length = 0
+
+    def get_signal(self, cycle):
+        """Return the signal level at the given cycle.
+
+        Return None if the cycle has not been recorded.
+        """
+        if cycle < 0 or cycle >= self.length:
+            return None
+        return self.change_signals[bisect_right(self.change_cycles,
+                                                cycle) - 1]
+
+    def get_changes(self):
+        """Return the list of [cycle, signal] changes."""
+        return [[cycle, signal] for cycle, signal in
+                zip(self.change_cycles, self.change_signals)]
+
+    def to_list(self, start=0, end=None):
+        """Return the signal levels of cycles start to end as a list.
+
+        end is excluded and defaults to the number of cycles recorded.
+        """
+        if end is None or end > self.length:
+            end = self.length
+        start = max(start, 0)
+        if start >= end:
+            return []
+        signal_list = []
+        index = bisect_right(self.change_cycles, start) - 1
+        cycle = start
+        while cycle < end:
+            if index + 1 < len(self.change_cycles):
+                next_cycle = min(self.change_cycles[index + 1], end)
+            else:
+                next_cycle = end
+            signal_list.extend([self.change_signals[index]] *
+                               (next_cycle - cycle))
+            cycle = next_cycle
+            index += 1
+        return signal_list
+
+
+class EdgeTrace(ChangeTrace):
+    """Store a signal trace with an index of its rising and falling edges.
+
+    The cycles of the edges are kept in sorted arrays as the signal is
+    recorded, so questions such as the cycle of the 1000th rising edge or the
+    number of falling edges between two cycles are answered by binary search
+    instead of scanning the trace. A rising edge is a cycle that is HIGH or
+    RISING after a cycle that is LOW or FALLING, and the reverse for a
+    falling edge. BLANK cycles have no level, so there is no edge next to
+    them.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    append(self, signal): Records the signal level for the next cycle.
+
+    extend(self, signal_list): Records the signal levels of the next cycles.
+
+    clear(self): Deletes all recorded cycles.
+
+    get_edge_cycles(self, edge): Returns the sorted array of the cycles of
+                                 one kind of edge.
+
+    count_edges(self, edge=None, start=0, end=None): Returns the number of
+                                                    edges in a range of
+                                                    cycles.
+
+    get_edges(self, edge=None, start=0, end=None): Returns the cycles of the
+                                                  edges in a range of cycles.
+
+    get_nth_edge(self, n, edge=None): Returns the cycle of the nth edge.
+
+    get_previous_edge(self, cycle, edge=None): Returns the cycle of the last
+                                               edge up to a cycle.
+
+    get_next_edge(self, cycle, edge=None): Returns the cycle of the first
+                                           edge after a cycle.
+
+    get_pulse_widths(self, level=None, start=0, end=None): Returns the start
+                                       and width of the pulses in a range of
+                                       cycles.
+    """
+
+    def __init__(self, devices):
+        """Initialise an empty trace and edge index."""
+        super().__init__()
+        self.devices = devices
+        # the level of each signal: True if high, False if low, None if BLANK
+        self.high_levels = {devices.HIGH: True, devices.RISING: True,
+                            devices.LOW: False, devices.FALLING: False}
+
+        self.rising_cycles = array('q')
+        self.falling_cycles = array('q')
+        self.edge_cycles = array('q')  # both kinds, in order
+        self.last_high = None  # level of the last cycle recorded
+
+    def append(self, signal):
+        """Record the signal level for the next cycle."""
+        high = self.high_levels.get(signal)
+        if high is not None and self.last_high is not None and \
+                high != self.last_high:
+            if high:
+                self.rising_cycles.append(self.length)
+            else:
+                self.falling_cycles.append(self.length)
+            self.edge_cycles.append(self.length)
+        self.last_high = high
+        super().append(signal)
+
+    def extend(self, signal_list):
+        """Record the signal levels of the next cycles."""
+        for signal in signal_list:
+            self.append(signal)
+
+    def clear(self):
+        """Delete all recorded cycles."""
+        super().clear()
+        del self.rising_cycles[:]
+        del self.falling_cycles[:]
+        del self.edge_cycles[:]
+        self.last_high = None
+
+    def get_edge_cycles(self, edge):
+        """Return the array of edge cycles of the given kind.
+
+        edge is devices.RISING, devices.FALLING, or None for both.
+        """
+        if edge == self.devices.RISING:
+            return self.rising_cycles
+        elif edge == self.devices.FALLING:
+            return self.falling_cycles
+        return self.edge_cycles
+
+    def count_edges(self, edge=None, start=0, end=None):
+        """Return the number of edges in cycles start to end.
+
+        end is excluded and defaults to the number of cycles recorded. edge
+        is devices.RISING, devices.FALLING, or None for both.
+        """
+        cycles = self.get_edge_cycles(edge)
+        if end is None:
+            end = self.length
+        return max(bisect_left(cycles, end) - bisect_left(cycles, start), 0)
+
+    def get_edges(self, edge=None, start=0, end=None):
+        """Return the list of cycles of the edges in cycles start to end.
+
+        end is excluded and defaults to the number of cycles recorded.
+        """
+        cycles = self.get_edge_cycles(edge)
+        if end is None:
+            end = self.length
+        return cycles[bisect_left(cycles, start):
+                      bisect_left(cycles, end)].tolist()
+
+    def get_nth_edge(self, n, edge=None):
+        """Return the cycle of the nth edge, counting from 1.
+
+        Return None if fewer than n edges have been recorded.
+        """
+        cycles = self.get_edge_cycles(edge)
+        if n < 1 or n > len(cycles):
+            return None
+        return cycles[n - 1]
+
+    def get_previous_edge(self, cycle, edge=None):
+        """Return the cycle of the last edge at or before the given cycle.
+
+        Return None if there is no such edge.
+        """
+        cycles = self.get_edge_cycles(edge)
+        index = bisect_right(cycles, cycle)
+        return cycles[index - 1] if index else None
+
+    def get_next_edge(self, cycle, edge=None):
+        """Return the cycle of the first edge after the given cycle.
+
+        Return None if there is no such edge.
+        """
+        cycles = self.get_edge_cycles(edge)
+        index = bisect_right(cycles, cycle)
+        return cycles[index] if index < len(cycles) else None
+
+    def get_pulse_widths(self, level=None, start=0, end=None):
+        """Return [start cycle, width] of the pulses in cycles start to end.
+
+        A HIGH pulse lasts from a rising edge to the next falling edge, and a
+        LOW pulse the reverse. level defaults to devices.HIGH. Only pulses
+        that start at or after start and end before end (default the number
+        of cycles recorded) are returned, and pulses broken by BLANK cycles
+        are skipped.
+        """
+        if level is None or level == self.devices.HIGH:
+            [start_cycles, end_cycles] = [self.rising_cycles,
+                                          self.falling_cycles]
+        else:
+            [start_cycles, end_cycles] = [self.falling_cycles,
+                                          self.rising_cycles]
+        if end is None:
+            end = self.length
+        return _get_pulse_widths(start_cycles, end_cycles, start, end)
+
+
+class FileEdgeTrace:
+    """Index the edges of one signal stored in a TraceFile.
+
+    Answers the same queries as EdgeTrace without keeping every edge in
+    memory. The file is read in chunks of cycles when a query needs them.
+    Only the number of rising and falling edges of each chunk read is kept,
+    with the edges of the last few chunks, so memory grows by a few bytes
+    per chunk however fast the signal toggles.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    trace_file: the TraceFile the signal is stored in.
+    index: index of the signal in trace_file.
+    chunk_size: number of cycles read from the file at a time.
+
+    Public methods
+    --------------
+    clear(self): Deletes the edge counts, after the file is cleared.
+
+    get_signal(self, cycle): Returns the signal level at the given cycle.
+
+    count_edges(self, edge=None, start=0, end=None): Returns the number of
+                                                    edges in a range of
+                                                    cycles.
+
+    get_edges(self, edge=None, start=0, end=None): Returns the cycles of the
+                                                  edges in a range of cycles.
+
+    get_nth_edge(self, n, edge=None): Returns the cycle of the nth edge.
+
+    get_previous_edge(self, cycle, edge=None): Returns the cycle of the last
+                                               edge up to a cycle.
+
+    get_next_edge(self, cycle, edge=None): Returns the cycle of the first
+                                           edge after a cycle.
+
+    get_pulse_widths(self, level=None, start=0, end=None): Returns the start
+                                       and width of the pulses in a range of
+                                       cycles.
+    """
+
+    def __init__(self, devices, trace_file, index, chunk_size=4096):
+        """Initialise the edge counts and the chunk cache."""
+        self.devices = devices
+        self.trace_file = trace_file
+        self.index = index
+        self.chunk_size = chunk_size
+        # the level of each signal: True if high, False if low, None if BLANK
+        self.high_levels = {devices.HIGH: True, devices.RISING: True,
+                            devices.LOW: False, devices.FALLING: False}
+
+        # number of rising and falling edges in each complete chunk, counted
+        # from the first chunk on
+        self.rising_counts = array('q')
+        self.falling_counts = array('q')
+        # {chunk: [rising_cycles, falling_cycles, edge_cycles]} of complete
+        # chunks, least recently used first
+        self.chunk_cache = collections.OrderedDict()
+        self.chunk_cache_size = 8
+
+    def __len__(self):
+        """Return the number of cycles recorded."""
+        return len(self.trace_file)
+
+    def clear(self):
+        """Delete the edge counts. Called when the file is cleared."""
+        del self.rising_counts[:]
+        del self.falling_counts[:]
+        self.chunk_cache.clear()
+
+    def get_signal(self, cycle):
+        """Return the signal level at the given cycle.
+
+        Return None if the cycle has not been recorded.
+        """
+        if cycle < 0 or cycle >= len(self):
+            return None
+        return self.trace_file.read_signal(self.index, cycle, cycle + 1)[0]
+
+    def _get_kind(self, edge):
+        """Return the position of an edge kind in the chunk edge lists."""
+        if edge == self.devices.RISING:
+            return 0
+        elif edge == self.devices.FALLING:
+            return 1
+        return 2
+
+    def _get_chunk_count(self):
+        """Return the number of chunks, including an incomplete last one."""
+        return -(-len(self) // self.chunk_size)
+
+    def _get_chunk_edges(self, chunk):
+        """Return [rising_cycles, falling_cycles, edge_cycles] of a chunk."""
+        if chunk in self.chunk_cache:
+            self.chunk_cache.move_to_end(chunk)
+            return self.chunk_cache[chunk]
+        start = chunk * self.chunk_size
+        end = min(start + self.chunk_size, len(self))
+        # the cycle before the chunk decides if its first cycle is an edge
+        first_cycle = max(start - 1, 0)
+        edge_lists = [array('q'), array('q'), array('q')]
+        last_high = None
+        for cycle, signal in enumerate(
+                self.trace_file.read_signal(self.index, first_cycle, end),
+                first_cycle):
+            high = self.high_levels.get(signal)
+            if high is not None and last_high is not None and \
+                    high != last_high:
+                edge_lists[0 if high else 1].append(cycle)
+                edge_lists[2].append(cycle)
+            last_high = high
+        if end == start + self.chunk_size:  # complete chunks do not change
+            self.chunk_cache[chunk] = edge_lists
+            if len(self.chunk_cache) > self.chunk_cache_size:
+                self.chunk_cache.popitem(last=False)
+        return edge_lists
+
+    def _count_chunk_edges(self, chunk, kind):
+        """Return the number of edges of a kind in a chunk."""
+        while len(self.rising_counts) <= chunk and \
+                (len(self.rising_counts) + 1) * self.chunk_size <= len(self):
+            edge_lists = self._get_chunk_edges(len(self.rising_counts))
+            self.rising_counts.append(len(edge_lists[0]))
+            self.falling_counts.append(len(edge_lists[1]))
+        if chunk < len(self.rising_counts):
+            return [self.rising_counts[chunk], self.falling_counts[chunk],
+                    self.rising_counts[chunk] +
+                    self.falling_counts[chunk]][kind]
+        return len(self._get_chunk_edges(chunk)[kind])
+
+    def count_edges(self, edge=None, start=0, end=None):
+        """Return the number of edges in cycles start to end.
+
+        end is excluded and defaults to the number of cycles recorded. edge
+        is devices.RISING, devices.FALLING, or None for both.
+        """
+        kind = self._get_kind(edge)
+        if end is None or end > len(self):
+            end = len(self)
+        start = max(start, 0)
+        count = 0
+        for chunk in range(start // self.chunk_size,
+                           -(-end // self.chunk_size)):
+            chunk_start = chunk * self.chunk_size
+            if start <= chunk_start and \
+                    chunk_start + self.chunk_size <= end:
+                count += self._count_chunk_edges(chunk, kind)
+            else:
+                cycles = self._get_chunk_edges(chunk)[kind]
+                count += max(bisect_left(cycles, end) -
+                             bisect_left(cycles, start), 0)
+        return count
+
+    def get_edges(self, edge=None, start=0, end=None):
+        """Return the list of cycles of the edges in cycles start to end.
+
+        end is excluded and defaults to the number of cycles recorded.
+        """
+        kind = self._get_kind(edge)
+        if end is None or end > len(self):
+            end = len(self)
+        start = max(start, 0)
+        edge_list = []
+        for chunk in range(start // self.chunk_size,
+                           -(-end // self.chunk_size)):
+            cycles = self._get_chunk_edges(chunk)[kind]
+            edge_list.extend(cycles[bisect_left(cycles, start):
+                                    bisect_left(cycles, end)])
+        return edge_list
+
+    def get_nth_edge(self, n, edge=None):
+        """Return the cycle of the nth edge, counting from 1.
+
+        Return None if fewer than n edges have been recorded.
+        """
+        kind = self._get_kind(edge)
+        if n < 1:
+            return None
+        for chunk in range(self._get_chunk_count()):
+            count = self._count_chunk_edges(chunk, kind)
+            if n <= count:
+                return self._get_chunk_edges(chunk)[kind][n - 1]
+            n -= count
+        return None
+
+    def get_previous_edge(self, cycle, edge=None):
+        """Return the cycle of the last edge at or before the given cycle.
+
+        Return None if there is no such edge.
+        """
+        kind = self._get_kind(edge)
+        cycle = min(cycle, len(self) - 1)
+        if cycle < 0:
+            return None
+        chunk = cycle // self.chunk_size
+        cycles = self._get_chunk_edges(chunk)[kind]
+        index = bisect_right(cycles, cycle)
+        if index:
+            return cycles[index - 1]
+        for chunk in range(chunk - 1, -1, -1):
+            if self._count_chunk_edges(chunk, kind):
+                return self._get_chunk_edges(chunk)[kind][-1]
+        return None
+
+    def get_next_edge(self, cycle, edge=None):
+        """Return the cycle of the first edge after the given cycle.
+
+        Return None if there is no such edge.
+        """
+        kind = self._get_kind(edge)
+        cycle = max(cycle, -1)
+        first_chunk = (cycle + 1) // self.chunk_size
+        for chunk in range(first_chunk, self._get_chunk_count()):
+            if chunk > first_chunk and \
+                    not self._count_chunk_edges(chunk, kind):
+                continue
+            cycles = self._get_chunk_edges(chunk)[kind]
+            index = bisect_right(cycles, cycle)
+            if index < len(cycles):
+                return cycles[index]
+        return None
+
+    def get_pulse_widths(self, level=None, start=0, end=None):
+        """Return [start cycle, width] of the pulses in cycles start to end.
+
+        As EdgeTrace.get_pulse_widths().
+        """
+        [start_edge, end_edge] = [self.devices.RISING, self.devices.FALLING]
+        if level is not None and level != self.devices.HIGH:
+            [start_edge, end_edge] = [end_edge, start_edge]
+        if end is None:
+            end = len(self)
+        return _get_pulse_widths(self.get_edges(start_edge, start, end),
+                                 self.get_edges(end_edge, start, end),
+                                 start, end)
+
+
+def _get_pulse_widths(start_cycles, end_cycles, start, end):
+    """Return [start cycle, width] of the pulses in cycles start to end.
+
+    start_cycles and end_cycles are the sorted cycles of the edges that
+    start and end a pulse, which include those in cycles start to end.
+    """
+    pulse_list = []
+    for index in range(bisect_left(start_cycles, start),
+                       bisect_left(start_cycles, end)):
+        pulse_start = start_cycles[index]
+        end_index = bisect_right(end_cycles, pulse_start)
+        if end_index == len(end_cycles) or end_cycles[end_index] >= end:
+            break  # the last pulse has not ended yet
+        pulse_end = end_cycles[end_index]
+        # Another pulse starting first means the level went BLANK
+        if index + 1 < len(start_cycles) and \
+                start_cycles[index + 1] < pulse_end:
+            continue
+        pulse_list.append([pulse_start, pulse_end - pulse_start])
+    return pulse_list
+
+
+class TraceFile:
+    """Store the traces of a fixed set of signals in a memory-mapped file.
+
+    Each cycle is stored as one byte per signal, cycle after cycle, so a
+    window of cycles is a single block of the file. The file is read through
+    a memory map, so only the windows that are looked at are loaded into
+    memory, and the last few windows read are cached. Signals can be
+    appended on one thread while windows are read on another, and windows
+    can be read ahead by a background thread.
+
+    Parameters
+    ----------
+    signal_count: number of signals stored each cycle.
+    path: path of the file, or None for a temporary file that is deleted
+          when closed.
+    cache_size: number of windows kept in the cache.
+
+    Public methods
+    --------------
+    append(self, signal_list): Records the signal levels for the next cycle.
+
+    flush(self): Writes the recorded cycles to the file.
+
+    get_window(self, start, end): Returns the signal levels of a range of
+                                  cycles as bytes.
+
+    get_signal(self, index, start, end): Returns the levels of one signal
+                                         over a range of cycles as a list.
+
+    read_signal(self, index, start, end): Returns the levels of one signal
+                                          over a range of cycles as bytes,
+                                          without caching the window.
+
+    prefetch(self, start, end): Reads a window into the cache on the
+                                background thread.
+
+    clear(self): Deletes all recorded cycles.
+
+    close(self): Closes the file.
+    """
+
+    def __init__(self, signal_count, path=None, cache_size=4):
+        """Open the file and initialise the write buffer and cache."""
+        self.signal_count = signal_count
+        if path is None:
+            self.file = tempfile.TemporaryFile()
+        else:
+            self.file = open(path, "w+b")
+        self.length = 0  # cycles recorded
+        self.file_length = 0  # cycles written to the file
+        self.pending = bytearray()  # cycles not yet written
+        self.pending_limit = 1 << 16  # bytes
+        self.map = None
+        self.map_length = 0  # cycles covered by the memory map
+
+        # {(start, end): bytes}, least recently used first
+        self.cache = collections.OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.RLock()
+
+        # Windows waiting to be read by the prefetch thread, which is started
+        # by the first call to prefetch. Only the latest requests are kept.
+        self.prefetch_requests = collections.deque(maxlen=2)
+        self.prefetch_ready = threading.Condition(self.lock)
+        self.prefetch_thread = None
+        self.closed = False
+
+    def __len__(self):
+        """Return the number of cycles recorded."""
+        return self.length
+
+    def append(self, signal_list):
+        """Record the signal levels for the next cycle."""
+        with self.lock:
+            self.pending.extend(signal_list)
+            self.length += 1
+            if len(self.pending) >= self.pending_limit:
+                self.flush()
+
+    def flush(self):
+        """Write the recorded cycles to the end of the file."""
+        with self.lock:
+            if self.pending:
+                self.file.seek(0, 2)
+                self.file.write(self.pending)
+                self.file.flush()
+                self.pending = bytearray()
+            self.file_length = self.length
+
+    def get_window(self, start, end):
+        """Return the signal levels of cycles start to end as bytes.
+
+        end is excluded. The levels of cycle c are bytes
+        (c - start) * signal_count onwards, one per signal.
+        """
+        with self.lock:
+            start = max(start, 0)
+            end = min(end, self.length)
+            if start >= end or self.signal_count == 0:
+                return bytes()
+            if (start, end) in self.cache:
+                self.cache.move_to_end((start, end))
+                return self.cache[(start, end)]
+
+            self._map_cycles(end)
+            window = self.map[start * self.signal_count:
+                              end * self.signal_count]
+
+            self.cache[(start, end)] = window
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return window
+
+    def _map_cycles(self, end):
+        """Make sure the memory map covers the cycles before end."""
+        if end > self.file_length:
+            self.flush()
+        if end > self.map_length:  # the file has grown, map it again
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+            self.map_length = self.file_length
+
+    def get_signal(self, index, start, end):
+        """Return the levels of signal index over cycles start to end.
+
+        end is excluded.
+        """
+        return list(self.get_window(start, end)[index::self.signal_count])
+
+    def read_signal(self, index, start, end):
+        """Return the levels of signal index over cycles start to end.
+
+        end is excluded. Only the bytes of the signal are read, and the
+        window is not cached, so long ranges can be scanned without
+        replacing the windows being displayed.
+        """
+        with self.lock:
+            start = max(start, 0)
+            end = min(end, self.length)
+            if start >= end:
+                return bytes()
+            self._map_cycles(end)
+            return self.map[start * self.signal_count + index:
+                            end * self.signal_count:self.signal_count]
+
+    def prefetch(self, start, end):
+        """Read the window of cycles start to end on the background thread.
+
+        A later call to get_window for the same cycles is then served from
+        the cache. The thread is started by the first call.
+        """
+        if max(start, 0) >= min(end, self.length):
+            return
+        with self.prefetch_ready:
+            if self.closed:
+                return
+            if self.prefetch_thread is None:
+                self.prefetch_thread = threading.Thread(
+                    target=self._prefetch_windows)
+                self.prefetch_thread.daemon = True
+                self.prefetch_thread.start()
+            self.prefetch_requests.append((start, end))
+            self.prefetch_ready.notify()
+
+    def _prefetch_windows(self):
+        """Read the requested windows until the file is closed."""
+        with self.prefetch_ready:
+            while True:
+                while not self.prefetch_requests and not self.closed:
+                    self.prefetch_ready.wait()
+                if self.closed:
+                    return
+                [start, end] = self.prefetch_requests.popleft()
+                self.get_window(start, end)
+
+    def clear(self):
+        """Delete all recorded cycles."""
+        with self.lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            self.file.truncate(0)
+            self.pending = bytearray()
+            self.length = 0
+            self.file_length = 0
+            self.map_length = 0
+            self.cache.clear()
+
+    def close(self):
+        """Close the file and stop the prefetch thread.
+
+        A temporary file is deleted.
+        """
+        with self.lock:
+            self.closed = True
+            self.prefetch_ready.notify()
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            self.file.close()
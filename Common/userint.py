@@ -1,12 +1,21 @@
 """Implement the interactive command line user interface.
 
 Used in the Logic Simulator project to enable the user to enter commands
-to run the simulation or adjust the network properties.
+to run the simulation or adjust the network properties, either interactively
+or from a script.
 
 Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+import contextlib
+import io
+import json
+import shutil
+import sys
+
+from stimulus import Stimulus
+from watchpoints import Watchpoints
 
 
 class UserInterface:
@@ -25,11 +34,28 @@ class UserInterface:
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
 
+    A script holds one command per line. Blank lines and text after '#' are
+    ignored. A command followed by '*N', with or without a space, is run N
+    times, and the lines between 'repeat N' and 'end' are run N times. Loops
+    can be nested. Text after the arguments of a command is an error.
+
     Public methods:
     ---------------
     command_interface(self): Reads in the commands and calls the corresponding
                              functions.
 
+    command_script(self, script, stream=None): Runs the commands in a script
+                                               and writes the result of each
+                                               one as a line of JSON.
+
+    parse_script(self, script): Returns the commands and loops of a script.
+
+    run_script_items(self, items, stream): Runs the commands and loops of a
+                                           script.
+
+    execute_command(self, command): Calls the function of a command and
+                                    returns True if it succeeded.
+
     get_line(self): Prints a prompt for the user and updates the user entry.
 
     read_command(self): Returns the first non-whitespace character.
@@ -49,6 +75,8 @@ class UserInterface:
 
     read_number(self, lower_bound, upper_bound): Returns the current number.
 
+    read_end(self): Returns True if nothing follows the command arguments.
+
     help_command(self): Prints a list of valid commands.
 
     switch_command(self): Sets the specified switch to the specified signal
@@ -58,6 +86,16 @@ class UserInterface:
 
     zap_command(self): Removes the specified monitor.
 
+    display_command(self): Displays the monitors over a range of cycles.
+
+    stimulus_command(self): Loads a stimulus file that sets switches while
+                            the simulation runs.
+
+    watch_command(self, kind): Adds a watch, break or assertion on a signal
+                               condition, or lists them and their hits.
+
+    clear_watch_command(self): Removes every watch, break and assertion.
+
     run_network(self, cycles): Runs the network for the specified number of
                                simulation cycles.
 
@@ -74,6 +112,16 @@ class UserInterface:
         self.network = network
 
         self.cycles_completed = 0  # number of simulation cycles completed
+        # display the monitors after every run or continue command
+        self.display_after_run = True
+
+        # width of the terminal that signal traces are wrapped to
+        self.display_width = shutil.get_terminal_size().columns
+
+        # switch changes applied while the simulation runs, if any
+        self.stimulus = None
+        # conditions checked after every cycle
+        self.watchpoints = Watchpoints(self.names, self.devices)
 
         self.character = ""  # current character
         self.line = ""  # current string entered by the user
@@ -86,23 +134,144 @@ class UserInterface:
         self.get_line()  # get the user entry
         command = self.read_command()  # read the first character
         while command != "q":
-            if command == "h":
-                self.help_command()
-            elif command == "s":
-                self.switch_command()
-            elif command == "m":
-                self.monitor_command()
-            elif command == "z":
-                self.zap_command()
-            elif command == "r":
-                self.run_command()
-            elif command == "c":
-                self.continue_command()
-            else:
-                print("Error: Invalid command. Enter 'h' for help.")
+            self.execute_command(command)
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
 
+    def execute_command(self, command):
+        """Call the function of the command given by its first character.
+
+        Return True if the command succeeded.
+        """
+        if command == "h":
+            return self.help_command()
+        elif command == "s":
+            return self.switch_command()
+        elif command == "m":
+            return self.monitor_command()
+        elif command == "z":
+            return self.zap_command()
+        elif command == "r":
+            return self.run_command()
+        elif command == "c":
+            return self.continue_command()
+        elif command == "d":
+            return self.display_command()
+        elif command == "t":
+            return self.stimulus_command()
+        elif command == "w":
+            return self.watch_command(self.watchpoints.WATCH)
+        elif command == "b":
+            return self.watch_command(self.watchpoints.BREAK)
+        elif command == "a":
+            return self.watch_command(self.watchpoints.ASSERT)
+        elif command == "x":
+            return self.clear_watch_command()
+        else:
+            print("Error: Invalid command. Enter 'h' for help.")
+            return False
+
+    def parse_script(self, script):
+        """Return the commands and loops of a script.
+
+        script is an iterable of lines, such as an open file. The result is a
+        list of items: ["command", line_number, text, count] runs the command
+        text count times, and ["repeat", line_number, count, items] runs the
+        items count times. Return [None, error message] if the script is not
+        valid.
+        """
+        block_stack = [[]]  # items of the open repeat blocks
+        for line_number, line in enumerate(script, 1):
+            text = line.split("#", 1)[0].strip()
+            if not text:
+                continue
+            words = text.split()
+            if words[0] == "repeat":
+                if len(words) != 2 or not words[1].isdigit():
+                    return [None, "Line {}: Expected 'repeat N'.".format(
+                        line_number)]
+                block = ["repeat", line_number, int(words[1]), []]
+                block_stack[-1].append(block)
+                block_stack.append(block[3])
+            elif words[0] == "end":
+                if len(block_stack) == 1:
+                    return [None, "Line {}: 'end' without 'repeat'.".format(
+                        line_number)]
+                block_stack.pop()
+            else:
+                count = 1
+                if "*" in words[-1]:  # either 'c 5 *2' or 'c 5*2'
+                    [last_word, star, count_string] = \
+                        words[-1].rpartition("*")
+                    if not count_string.isdigit():
+                        return [None, "Line {}: Expected '*N'.".format(
+                            line_number)]
+                    count = int(count_string)
+                    text = " ".join(words[:-1] + [last_word]).strip()
+                block_stack[-1].append(["command", line_number, text, count])
+        if len(block_stack) > 1:
+            return [None, "Missing 'end' for 'repeat'."]
+        return [block_stack[0], None]
+
+    def command_script(self, script, stream=None):
+        """Run the commands in a script without prompting.
+
+        script is an iterable of lines, such as an open file or sys.stdin.
+        After each command, a line of JSON is written to stream (default
+        standard output) with the line number, the command, whether it
+        succeeded, the cycles completed and the text it printed. Monitors are
+        not displayed after each run, use the 'd' command instead. Return
+        True if every command succeeded.
+        """
+        if stream is None:
+            stream = sys.stdout
+        [items, error] = self.parse_script(script)
+        if items is None:
+            stream.write(json.dumps({"line": None, "command": None,
+                                     "ok": False, "output": [error]}) + "\n")
+            return False
+        self.display_after_run = False
+        try:
+            [all_ok, quit_script] = self.run_script_items(items, stream)
+        finally:
+            self.display_after_run = True
+        return all_ok
+
+    def run_script_items(self, items, stream):
+        """Run a list of script items and write their results to stream.
+
+        Return [all_ok, quit_script], where quit_script is True once a 'q'
+        command has been run.
+        """
+        all_ok = True
+        for item in items:
+            if item[0] == "repeat":
+                [line_number, count, body] = item[1:]
+                for _ in range(count):
+                    [ok, quit_script] = self.run_script_items(body, stream)
+                    all_ok = all_ok and ok
+                    if quit_script:
+                        return [all_ok, True]
+                continue
+
+            [line_number, text, count] = item[1:]
+            for _ in range(count):
+                self.line = text
+                self.cursor = 0
+                command = self.read_command()
+                if command == "q":
+                    return [all_ok, True]
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    ok = self.execute_command(command)
+                output_lines = output.getvalue().splitlines()
+                all_ok = all_ok and ok
+                stream.write(json.dumps({
+                    "line": line_number, "command": text, "ok": ok,
+                    "cycles_completed": self.cycles_completed,
+                    "output": output_lines}) + "\n")
+        return [all_ok, False]
+
     def get_line(self):
         """Print prompt for the user and update the user entry."""
         self.cursor = 0
@@ -199,83 +368,238 @@ class UserInterface:
 
         return number
 
+    def read_end(self):
+        """Return True if nothing follows the arguments of the command.
+
+        Print an error and return False if there is more text.
+        """
+        if (self.character + self.line[self.cursor:]).strip():
+            print("Error: Unexpected text after the command.")
+            return False
+        return True
+
     def help_command(self):
-        """Print a list of valid commands."""
+        """Print a list of valid commands and return True."""
         print("User commands:")
         print("r N       - run the simulation for N cycles")
         print("c N       - continue the simulation for N cycles")
         print("s X N     - set switch X to N (0 or 1)")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("d [N M K] - display cycles N to M, runs longer than K as the")
+        print("            level, x and the run length, e.g. _x500")
+        print("t P       - load the stimulus file at path P")
+        print("w [E]     - record the cycles where condition E holds, or list")
+        print("            the watches and their hits, e.g. w d1.Q and not n1")
+        print("b E       - stop a run at the first cycle where E holds")
+        print("a E       - stop a run at the first cycle where E fails")
+        print("x         - remove every watch, break and assertion")
         print("h         - help (this command)")
         print("q         - quit the program")
+        return True
 
     def switch_command(self):
-        """Set the specified switch to the specified signal level."""
+        """Set the specified switch to the specified signal level.
+
+        Return True if successful.
+        """
         switch_id = self.read_name()
         if switch_id is not None:
             switch_state = self.read_number(0, 1)
-            if switch_state is not None:
+            if switch_state is not None and self.read_end():
                 if self.devices.set_switch(switch_id, switch_state):
                     print("Successfully set switch.")
+                    return True
+                elif switch_id in self.devices.fixed_switches:
+                    print("Error: Switch fixed by the optimiser.")
                 else:
                     print("Error: Invalid switch.")
+        return False
 
     def monitor_command(self):
-        """Set the specified monitor."""
+        """Set the specified monitor.
+
+        Return True if successful.
+        """
         monitor = self.read_signal_name()
-        if monitor is not None:
+        if monitor is not None and self.read_end():
             [device, port] = monitor
             monitor_error = self.monitors.make_monitor(device, port,
                                                        self.cycles_completed)
             if monitor_error == self.monitors.NO_ERROR:
                 print("Successfully made monitor.")
+                return True
             else:
                 print("Error: Could not make monitor.")
+        return False
 
     def zap_command(self):
-        """Remove the specified monitor."""
+        """Remove the specified monitor.
+
+        Return True if successful.
+        """
         monitor = self.read_signal_name()
-        if monitor is not None:
+        if monitor is not None and self.read_end():
             [device, port] = monitor
             if self.monitors.remove_monitor(device, port):
                 print("Successfully zapped monitor")
+                return True
             else:
                 print("Error: Could not zap monitor.")
+        return False
+
+    def display_command(self):
+        """Display the monitors over a range of cycles.
+
+        With no arguments all the cycles are displayed. The optional third
+        number K compresses runs of more than K equal signal levels. Return
+        True if the numbers are valid.
+        """
+        start = 0
+        end = None
+        compress = None
+        if self.line[self.cursor:].strip():
+            start = self.read_number(0, None)
+            if start is None:
+                return False
+            end = self.read_number(start, None)
+            if end is None:
+                return False
+            if self.line[self.cursor:].strip():
+                compress = self.read_number(1, None)
+                if compress is None or not self.read_end():
+                    return False
+        self.monitors.display_signals(start, end, self.display_width,
+                                      compress)
+        return True
+
+    def stimulus_command(self):
+        """Load a stimulus file that sets switches while the simulation runs.
+
+        The switch changes are applied from the next run or continue command.
+        Return True if the file was loaded.
+        """
+        path = self.line[self.cursor:].strip()
+        if not path:
+            print("Error: Expected a stimulus file path.")
+            return False
+        stimulus = Stimulus(self.names, self.devices)
+        error_list = stimulus.load_file(path)
+        if error_list:
+            for error in error_list:
+                print("Error: " + error)
+            return False
+        self.stimulus = stimulus
+        print("Successfully loaded stimulus.")
+        return True
+
+    def watch_command(self, kind):
+        """Add a watch, break or assertion on a signal condition.
+
+        A watch command with no condition lists the watches, breaks and
+        assertions with the cycles where they hit. Return True if
+        successful.
+        """
+        expression = self.line[self.cursor:].strip()
+        if not expression and kind == self.watchpoints.WATCH:
+            for line in self.watchpoints.get_report():
+                print(line)
+            return True
+        error = self.watchpoints.add_watch(expression, kind)
+        if error is None:
+            self.monitors.set_observed_signals(self.watchpoints.get_signals())
+            print("Successfully added {}.".format(
+                self.watchpoints.kind_strings[kind]))
+            return True
+        print("Error: " + error)
+        return False
+
+    def clear_watch_command(self):
+        """Remove every watch, break and assertion."""
+        self.watchpoints.clear()
+        self.monitors.set_observed_signals([])
+        print("Successfully removed watches.")
+        return True
 
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
-        Return True if successful.
+        Switch changes in the stimulus, if one is loaded, are applied before
+        the cycles they are scheduled at. The run stops early if a break hits
+        or an assertion fails. Return True if all the cycles were run.
         """
-        for _ in range(cycles):
+        self.watchpoints.stop = None
+        for cycle in range(self.cycles_completed,
+                           self.cycles_completed + cycles):
+            if self.stimulus is not None:
+                self.stimulus.apply(cycle)
             if self.network.execute_network():
                 self.monitors.record_signals()
             else:
                 print("Error: Network oscillating.")
                 return False
-        self.monitors.display_signals()
+            if self.watchpoints.check(cycle):
+                [watchpoint, cycle] = self.watchpoints.stop
+                if watchpoint.kind == self.watchpoints.ASSERT:
+                    print("Error: Assertion failed at cycle {}: {}".format(
+                        cycle, watchpoint.expression))
+                else:
+                    print("Stopped at cycle {}: {}".format(
+                        cycle, watchpoint.expression))
+                self.cycles_completed = cycle + 1
+                if self.display_after_run:
+                    self.monitors.display_signals(width=self.display_width)
+                return False
+        if self.display_after_run:
+            self.monitors.display_signals(width=self.display_width)
         return True
 
     def run_command(self):
-        """Run the simulation from scratch."""
+        """Run the simulation from scratch.
+
+        Return True if the cycles were run or a break stopped the run.
+        """
         self.cycles_completed = 0
         cycles = self.read_number(0, None)
 
-        if cycles is not None:  # if the number of cycles provided is valid
+        # if the number of cycles provided is valid
+        if cycles is not None and self.read_end():
             self.monitors.reset_monitors()
+            self.watchpoints.reset_hits()
             print("Running for {} cycles".format(cycles))
             self.devices.cold_startup()
             if self.run_network(cycles):
                 self.cycles_completed += cycles
+                return True
+            return self._stopped_at_break()
+        return False
 
     def continue_command(self):
-        """Continue a previously run simulation."""
+        """Continue a previously run simulation.
+
+        Return True if the cycles were run or a break stopped the run.
+        """
         cycles = self.read_number(0, None)
-        if cycles is not None:  # if the number of cycles provided is valid
+        # if the number of cycles provided is valid
+        if cycles is not None and self.read_end():
             if self.cycles_completed == 0:
                 print("Error: Nothing to continue. Run first.")
             elif self.run_network(cycles):
                 self.cycles_completed += cycles
                 print("Continuing for {} cycles. Total: {} "
                       .format(cycles, self.cycles_completed))
+                return True
+            else:
+                return self._stopped_at_break()
+        return False
+
+    def _stopped_at_break(self):
+        """Return True if the last run was stopped by a break.
+
+        A run that stops because the network oscillates or an assertion
+        fails has not succeeded.
+        """
+        if self.watchpoints.stop is None:
+            return False
+        [watchpoint, cycle] = self.watchpoints.stop
+        return watchpoint.kind == self.watchpoints.BREAK
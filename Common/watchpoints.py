@@ -0,0 +1,311 @@
+"""Watch signal conditions and stop simulations when they happen.
+
+Used in the Logic Simulator project to find the cycles where a condition on
+the signals holds, or to check that a condition always holds, without
+recording and searching the whole run.
+
+A condition is an expression over signal names, for example:
+
+    d1.Q == HIGH and n1 == LOW
+    not (sw1 or clk) or d1.QBAR != 1
+
+A signal name on its own means that the signal is HIGH. Signals can be
+compared with LOW, HIGH, RISING, FALLING, 0, 1 or other signals, and combined
+with 'and', 'or', 'not' and parentheses. Each expression is compiled once into
+a Python function that reads the outputs of the devices directly, so checking
+it after every cycle is cheap.
+
+Classes
+-------
+Watchpoint - stores a compiled condition and the cycles where it hit.
+Watchpoints - compiles conditions and checks them after each cycle.
+"""
+import re
+
+
+class Watchpoint:
+
+    """Store a compiled condition and the cycles where it hit.
+
+    Parameters
+    ----------
+    expression: text of the condition.
+    predicate: function with no arguments that returns True if the condition
+               holds.
+    kind: Watchpoints.WATCH, Watchpoints.BREAK or Watchpoints.ASSERT.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    def __init__(self, expression, predicate, kind):
+        """Initialise the watchpoint properties."""
+        self.expression = expression
+        self.predicate = predicate
+        self.kind = kind
+
+        self.hit_count = 0
+        # the first hit_limit cycles where the watchpoint hit
+        self.hit_cycles = []
+
+
+class Watchpoints:
+
+    """Compile conditions on signals and check them after each cycle.
+
+    A watch records the cycles where its condition holds. A break also stops
+    the run at the first such cycle. An assertion stops the run at the first
+    cycle where its condition does not hold.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+
+    Public methods
+    --------------
+    compile_expression(self, expression): Returns a function that evaluates
+                                          a condition, and an error message.
+
+    add_watch(self, expression, kind=None): Adds a watch, break or assertion
+                                            and returns an error message.
+
+    check(self, cycle): Checks every watchpoint after a cycle and returns
+                        True if the run must stop.
+
+    reset_hits(self): Deletes the hits recorded by every watchpoint.
+
+    clear(self): Deletes every watchpoint.
+
+    get_report(self): Returns a line of text for each watchpoint.
+
+    get_signals(self): Returns the outputs read by the watchpoints.
+    """
+
+    def __init__(self, names, devices):
+        """Initialise the watchpoint list and the expression tokens."""
+        self.names = names
+        self.devices = devices
+
+        [self.WATCH, self.BREAK, self.ASSERT] = range(3)
+        self.kind_strings = {self.WATCH: "watch", self.BREAK: "break",
+                             self.ASSERT: "assert"}
+
+        self.watchpoint_list = []
+        # maximum number of hit cycles stored by each watchpoint
+        self.hit_limit = 1000
+        # [watchpoint, cycle] that stopped the last run, or None
+        self.stop = None
+
+        self.level_names = {"LOW": self.devices.LOW,
+                            "HIGH": self.devices.HIGH,
+                            "RISING": self.devices.RISING,
+                            "FALLING": self.devices.FALLING,
+                            "0": self.devices.LOW, "1": self.devices.HIGH}
+        self.token_pattern = re.compile(
+            r"\s*(?:(==|!=|\(|\))|([A-Za-z_]\w*(?:\.\w+)?|\d+)|(\S))")
+
+    def compile_expression(self, expression):
+        """Compile a condition into a function with no arguments.
+
+        Return [predicate, error], where predicate returns True if the
+        condition holds for the current device outputs, or is None if the
+        expression is not valid, and error is the error message or None.
+        """
+        tokens = []
+        for token_match in self.token_pattern.finditer(expression):
+            [symbol, word, invalid] = token_match.groups()
+            if invalid is not None:
+                return [None, "Invalid character '{}'.".format(invalid)]
+            if symbol is not None or word is not None:
+                tokens.append(symbol if symbol is not None else word)
+        if not tokens:
+            return [None, "Expected a condition."]
+
+        # The outputs dictionaries of the devices read by the condition are
+        # bound to the names signal_0, signal_1, ... of the compiled function
+        namespace = {}
+        try:
+            [source, position] = self._parse_or(tokens, 0, namespace)
+            if position != len(tokens):
+                raise ValueError("Unexpected '{}'.".format(tokens[position]))
+        except ValueError as error:
+            return [None, str(error)]
+        code = compile("lambda: bool({})".format(source), "<watchpoint>",
+                       "eval")
+        return [eval(code, namespace), None]
+
+    def _parse_or(self, tokens, position, namespace):
+        """Return the source of an 'or' expression and the next position."""
+        [source, position] = self._parse_and(tokens, position, namespace)
+        while position < len(tokens) and tokens[position] == "or":
+            [right, position] = self._parse_and(tokens, position + 1,
+                                                namespace)
+            source = "{} or {}".format(source, right)
+        return [source, position]
+
+    def _parse_and(self, tokens, position, namespace):
+        """Return the source of an 'and' expression and the next position."""
+        [source, position] = self._parse_not(tokens, position, namespace)
+        while position < len(tokens) and tokens[position] == "and":
+            [right, position] = self._parse_not(tokens, position + 1,
+                                                namespace)
+            source = "{} and {}".format(source, right)
+        return [source, position]
+
+    def _parse_not(self, tokens, position, namespace):
+        """Return the source of a 'not' expression and the next position."""
+        if position < len(tokens) and tokens[position] == "not":
+            [source, position] = self._parse_not(tokens, position + 1,
+                                                 namespace)
+            return ["(not {})".format(source), position]
+        return self._parse_comparison(tokens, position, namespace)
+
+    def _parse_comparison(self, tokens, position, namespace):
+        """Return the source of a comparison and the next position."""
+        [source, kind, position] = self._parse_operand(tokens, position,
+                                                       namespace)
+        if position < len(tokens) and tokens[position] in ["==", "!="]:
+            operator = tokens[position]
+            [right, right_kind, position] = self._parse_operand(
+                tokens, position + 1, namespace)
+            if "condition" in [kind, right_kind]:
+                raise ValueError("Cannot compare a condition.")
+            return ["({} {} {})".format(source, operator, right), position]
+        if kind == "signal":  # a signal on its own means it is HIGH
+            return ["({} == {})".format(source, self.devices.HIGH), position]
+        if kind == "level":
+            raise ValueError("Expected a signal before or after a level.")
+        return [source, position]
+
+    def _parse_operand(self, tokens, position, namespace):
+        """Return the source of an operand, its kind and the next position.
+
+        The kind is "signal", "level" or "condition".
+        """
+        if position >= len(tokens):
+            raise ValueError("Unexpected end of condition.")
+        token = tokens[position]
+        if token == "(":
+            [source, position] = self._parse_or(tokens, position + 1,
+                                                namespace)
+            if position >= len(tokens) or tokens[position] != ")":
+                raise ValueError("Expected ')'.")
+            return ["({})".format(source), "condition", position + 1]
+        if token in self.level_names:
+            return [str(self.level_names[token]), "level", position + 1]
+        if token in ["==", "!=", ")", "and", "or", "not"] or \
+                token[0].isdigit():
+            raise ValueError("Unexpected '{}'.".format(token))
+        return [self._get_signal_source(token, namespace), "signal",
+                position + 1]
+
+    def _get_signal_source(self, signal_name, namespace):
+        """Return the source that reads a signal in the compiled function."""
+        [device_id, output_id] = self._get_signal(signal_name)
+        if device_id is None:
+            raise ValueError("{} is not an output.".format(signal_name))
+        variable = "signal_{}".format(len(namespace))
+        namespace[variable] = self.devices.get_device(device_id).outputs
+        return "{}[{!r}]".format(variable, output_id)
+
+    def _get_signal(self, signal_name):
+        """Return [device ID, output ID] of a signal name.
+
+        Return [None, None] if the name is not an output.
+        """
+        name_strings = signal_name.split(".")
+        device_id = self.names.query(name_strings[0])
+        device = self.devices.get_device(device_id)
+        if len(name_strings) == 2:
+            output_id = self.names.query(name_strings[1])
+        else:
+            output_id = None
+        if device is None or output_id not in device.outputs:
+            return [None, None]
+        return [device_id, output_id]
+
+    def add_watch(self, expression, kind=None):
+        """Compile a condition and add it as a watch, break or assertion.
+
+        kind defaults to self.WATCH. Return None if successful, or the error
+        message if the expression is not valid.
+        """
+        if kind is None:
+            kind = self.WATCH
+        [predicate, error] = self.compile_expression(expression)
+        if predicate is None:
+            return error
+        self.watchpoint_list.append(Watchpoint(expression.strip(), predicate,
+                                               kind))
+        return None
+
+    def check(self, cycle):
+        """Check every watchpoint after the given cycle has settled.
+
+        Record the hits and return True if a break hit or an assertion
+        failed, in which case self.stop is set to [watchpoint, cycle].
+        """
+        stop = False
+        for watchpoint in self.watchpoint_list:
+            hit = watchpoint.predicate()
+            if watchpoint.kind == self.ASSERT:
+                hit = not hit
+            if hit:
+                watchpoint.hit_count += 1
+                if len(watchpoint.hit_cycles) < self.hit_limit:
+                    watchpoint.hit_cycles.append(cycle)
+                if watchpoint.kind != self.WATCH and not stop:
+                    self.stop = [watchpoint, cycle]
+                    stop = True
+        return stop
+
+    def reset_hits(self):
+        """Delete the hits recorded by every watchpoint."""
+        for watchpoint in self.watchpoint_list:
+            watchpoint.hit_count = 0
+            watchpoint.hit_cycles = []
+        self.stop = None
+
+    def clear(self):
+        """Delete every watchpoint."""
+        self.watchpoint_list = []
+        self.stop = None
+
+    def get_report(self):
+        """Return a line of text for each watchpoint and its hits.
+
+        An assertion hits at the cycles where its condition does not hold.
+        """
+        line_list = []
+        for watchpoint in self.watchpoint_list:
+            cycle_text = ", ".join(str(cycle) for cycle
+                                   in watchpoint.hit_cycles[:10])
+            if watchpoint.hit_count > 10:
+                cycle_text += ", ..."
+            line_list.append("{} {}: {} hits{}".format(
+                self.kind_strings[watchpoint.kind], watchpoint.expression,
+                watchpoint.hit_count,
+                " at cycles " + cycle_text if cycle_text else ""))
+        return line_list
+
+    def get_signals(self):
+        """Return the (device ID, output ID) outputs read by the watchpoints.
+
+        The outputs are found again from the expressions, which only contain
+        valid names.
+        """
+        signal_list = []
+        for watchpoint in self.watchpoint_list:
+            for token_match in self.token_pattern.finditer(
+                    watchpoint.expression):
+                word = token_match.group(2)
+                if word is None or word in self.level_names or \
+                        word in ["and", "or", "not"]:
+                    continue
+                [device_id, output_id] = self._get_signal(word)
+                if device_id is not None and \
+                        (device_id, output_id) not in signal_list:
+                    signal_list.append((device_id, output_id))
+        return signal_list